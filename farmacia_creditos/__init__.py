@@ -0,0 +1,35 @@
+"""
+Lógica de datos del dashboard de créditos de la farmacia.
+
+Las funciones exportadas se importan al usarlas por primera vez (PEP 562):
+importar un submódulo liviano (figuras, instrumentacion, arranque) no carga
+pandas ni NumPy, lo que acorta el arranque en frío del dashboard.
+"""
+
+import importlib
+
+_EXPORTADOS = {
+    'apply_payments': 'farmacia_creditos.pagos',
+    'build_cuotas_schedule': 'farmacia_creditos.datos',
+    'compact_frames': 'farmacia_creditos.compacto',
+    'create_sqlite_database': 'farmacia_creditos.base_datos',
+    'load_dashboard_data': 'farmacia_creditos.base_datos',
+    'memory_report': 'farmacia_creditos.compacto',
+    'originate_credits': 'farmacia_creditos.originacion',
+    'read_portfolio_parquet': 'farmacia_creditos.generador',
+    'write_portfolio_parquet': 'farmacia_creditos.generador',
+}
+
+__all__ = sorted(_EXPORTADOS)
+
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTADOS:
+        raise AttributeError(f"module 'farmacia_creditos' has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(_EXPORTADOS[nombre]), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,254 @@
+"""
+=====================================================
+ALMACÉN DE DATOS COMPARTIDO ENTRE SESIONES
+Instantáneas de solo lectura con presupuesto de memoria
+=====================================================
+
+st.cache_data entrega a cada sesión una copia (pickle) de los DataFrames.
+El almacén guarda una sola instantánea por fuente de datos en el proceso y
+todas las sesiones reciben los mismos objetos, sin copiar: nadie debe
+modificarlos.
+
+- Cada carga publica una versión nueva (número creciente); los índices y
+  cubos derivados viven dentro de la instantánea y se liberan con ella.
+- Al refrescar se suelta la instantánea vieja antes de cargar la nueva, así
+  el pico de memoria no se duplica (las sesiones en curso conservan su
+  referencia hasta terminar el rerun).
+- Si las fuentes superan el presupuesto de bytes, se desalojan las menos
+  usadas; la última cargada siempre se conserva. Los bytes de una
+  instantánea incluyen sus derivados: los arreglos que no comparten con
+  los frames, cargados al primer derivado que los guarda. El presupuesto
+  se revisa al cargar una fuente.
+"""
+
+import itertools
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+MAX_DERIVADOS = 16
+
+_versiones = itertools.count(1)
+
+
+def _frames_bytes(frames):
+    return sum(int(df.memory_usage(index=True, deep=True).sum()) for df in frames)
+
+
+def _arrays(valor, vistos):
+    """Arreglos numpy alcanzables desde valor (DataFrames, contenedores y atributos de objetos)"""
+    if id(valor) in vistos or valor is None or isinstance(valor, (str, bytes, int, float, type, pd.RangeIndex)):
+        return
+    vistos.add(id(valor))
+    if isinstance(valor, np.ndarray):
+        yield valor
+    elif isinstance(valor, pd.DataFrame):
+        yield from _arrays(valor.index, vistos)
+        for _, serie in valor.items():
+            yield from _arrays(serie.array, vistos)
+    elif isinstance(valor, (pd.Series, pd.Index)):
+        yield from _arrays(valor.array, vistos)
+    elif isinstance(valor, pd.Categorical):
+        yield from _arrays(valor.codes, vistos)
+        yield from _arrays(valor.categories, vistos)
+    elif isinstance(valor, pd.api.extensions.ExtensionArray):
+        yield np.asarray(valor)
+    elif isinstance(valor, dict):
+        for elemento in itertools.chain(valor.keys(), valor.values()):
+            yield from _arrays(elemento, vistos)
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        for elemento in valor:
+            yield from _arrays(elemento, vistos)
+    elif hasattr(valor, '__dict__') and not callable(valor):
+        yield from _arrays(vars(valor), vistos)
+
+
+def _base(arreglo):
+    while isinstance(arreglo.base, np.ndarray):
+        arreglo = arreglo.base
+    return arreglo
+
+
+def _new_bytes(valor, contados):
+    """
+    Bytes de los arreglos de valor que no están en contados (id del arreglo
+    base → arreglo), que se agregan. Las vistas cuentan su arreglo base una
+    vez; los arreglos object suman el tamaño de sus objetos.
+    """
+    total = 0
+    for arreglo in map(_base, _arrays(valor, set())):
+        if id(arreglo) in contados:
+            continue
+        contados[id(arreglo)] = arreglo
+        total += arreglo.nbytes
+        if arreglo.dtype == object:
+            total += sum(map(sys.getsizeof, arreglo.ravel()))
+    return total
+
+
+class Snapshot:
+    """
+    Versión publicada de los datos de una fuente: frames (tupla de
+    DataFrames de solo lectura) y estructuras derivadas de ellos.
+    """
+
+    def __init__(self, fuente, frames, etiqueta=None):
+        self.fuente = fuente
+        self.version = next(_versiones)
+        self.etiqueta = etiqueta
+        self.frames = tuple(frames)
+        self.bytes = _frames_bytes(self.frames)
+        self.creado = time.time()
+        self._derivados = OrderedDict()
+        self._construyendo = {}
+        self._contados = None
+        self._lock = threading.Lock()
+        self._lock_bytes = threading.Lock()
+
+    def _get(self, clave):
+        with self._lock:
+            entrada = self._derivados.get(clave)
+            if entrada is None:
+                return None
+            self._derivados.move_to_end(clave)
+            return entrada
+
+    def derived(self, clave, construir):
+        """
+        Estructura derivada de esta versión (índice, cubo, ...), construida
+        una sola vez; se guardan las últimas MAX_DERIVADOS claves. La
+        construcción ocurre fuera del lock de la instantánea, con un lock por
+        clave: mientras se arma un cubo, las demás claves se siguen leyendo.
+        """
+        entrada = self._get(clave)
+        if entrada is not None:
+            return entrada[0]
+        with self._lock:
+            construyendo = self._construyendo.setdefault(clave, threading.Lock())
+
+        with construyendo:
+            entrada = self._get(clave)
+            if entrada is not None:
+                return entrada[0]
+            valor = construir()
+            with self._lock_bytes:
+                if self._contados is None:
+                    # Referencias débiles: un derivado desalojado no retiene sus arreglos
+                    self._contados = weakref.WeakValueDictionary(
+                        (id(arreglo), arreglo) for arreglo in map(_base, _arrays(self.frames, set()))
+                    )
+                tamano = _new_bytes(valor, self._contados)
+            with self._lock:
+                self._derivados[clave] = (valor, tamano)
+                self.bytes += tamano
+                while len(self._derivados) > MAX_DERIVADOS:
+                    _, (_, liberado) = self._derivados.popitem(last=False)
+                    self.bytes -= liberado
+                self._construyendo.pop(clave, None)
+            return valor
+
+
+class DataStore:
+    """
+    Instantáneas por fuente con presupuesto de memoria (max_bytes) y
+    vencimiento (ttl en segundos; None no vence).
+    """
+
+    def __init__(self, max_bytes, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._snapshots = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _fuente_lock(self, fuente):
+        with self._lock:
+            return self._locks.setdefault(fuente, threading.Lock())
+
+    def _vigente(self, snapshot):
+        return self.ttl is None or time.time() - snapshot.creado < self.ttl
+
+    def _lookup(self, fuente):
+        with self._lock:
+            snapshot = self._snapshots.get(fuente)
+            if snapshot is not None:
+                self._snapshots.move_to_end(fuente)
+            return snapshot
+
+    def _store(self, snapshot):
+        with self._lock:
+            self._snapshots[snapshot.fuente] = snapshot
+            self._snapshots.move_to_end(snapshot.fuente)
+            while self.bytes > self.max_bytes and len(self._snapshots) > 1:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def _release(self, fuente):
+        with self._lock:
+            self._snapshots.pop(fuente, None)
+
+    def get(self, fuente, cargar):
+        """
+        Instantánea vigente de la fuente; si falta o venció, se carga con
+        cargar() (una sola vez aunque varias sesiones la pidan a la vez).
+        """
+        snapshot = self._lookup(fuente)
+        if snapshot is not None and self._vigente(snapshot):
+            return snapshot
+
+        with self._fuente_lock(fuente):
+            snapshot = self._lookup(fuente)
+            if snapshot is not None and self._vigente(snapshot):
+                return snapshot
+            # Soltar la versión vieja antes de cargar la nueva
+            self._release(fuente)
+            del snapshot
+            return self._store(Snapshot(fuente, cargar()))
+
+    def publish(self, fuente, frames, etiqueta):
+        """
+        Publica frames mantenidos fuera del almacén (por ejemplo por el
+        cargador incremental); crea una versión nueva solo si cambia etiqueta.
+        """
+        with self._fuente_lock(fuente):
+            snapshot = self._lookup(fuente)
+            if snapshot is not None and snapshot.etiqueta == etiqueta:
+                return snapshot
+            self._release(fuente)
+            return self._store(Snapshot(fuente, frames, etiqueta))
+
+    def invalidate(self, fuente=None):
+        """Descarta una fuente (o todas); la próxima consulta vuelve a cargar"""
+        with self._lock:
+            if fuente is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(fuente, None)
+
+    def loaded(self):
+        """Instantáneas cargadas, de la menos a la más usada"""
+        with self._lock:
+            return list(self._snapshots.values())
+
+    @property
+    def bytes(self):
+        return sum(snapshot.bytes for snapshot in self._snapshots.values())
+
+    def stats(self):
+        """Fuentes cargadas con su versión, bytes y antigüedad"""
+        with self._lock:
+            return [
+                {
+                    'fuente': ' / '.join(map(str, snapshot.fuente)),
+                    'version': snapshot.version,
+                    'bytes': snapshot.bytes,
+                    'edad_s': time.time() - snapshot.creado,
+                }
+                for snapshot in self._snapshots.values()
+            ]
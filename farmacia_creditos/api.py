@@ -0,0 +1,213 @@
+"""
+=====================================================
+API JSON LOCAL DEL MOTOR DE LA CARTERA
+KPIs y datos de gráficos por HTTP, sin Streamlit
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.api --host 127.0.0.1 --puerto 8601
+
+La fuente de datos se elige con las mismas variables de entorno que el
+dashboard (FARMACIA_DB, FARMACIA_DATOS_PARQUET, ...). Cada petición se
+atiende en su propio hilo sobre un único PortfolioEngine: la instantánea,
+el índice y el cubo se comparten y los KPIs quedan memorizados.
+
+Rutas (todas GET, respuesta JSON):
+    /salud                          fuentes cargadas en el almacén
+    /kpis                           KPIs de la selección de filtros
+    /graficos                       nombres de los gráficos disponibles
+    /graficos/<nombre>              filas del gráfico (opciones: frecuencia, n)
+    /cuotas-vencidas                página de cuotas vencidas (pagina, tamano)
+    /escenarios-cobro               cobros semanales simulados con P5/P95
+                                    (dias, escenarios, semilla)
+
+Los filtros van en la query string: tipo_cliente, estado_credito y
+estado_cuota (repetidos o separados por comas; vacío = ninguno),
+fecha_inicio, fecha_fin y fecha_corte (AAAA-MM-DD). Los que faltan toman
+los valores por defecto del sidebar. Ejemplo:
+    /kpis?tipo_cliente=Natural&estado_credito=Activo,Moroso&fecha_corte=2025-06-30
+"""
+
+import argparse
+import inspect
+import json
+import math
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from farmacia_creditos.motor import COLUMNAS_VENCIDAS, GRAFICOS, PortfolioEngine
+from farmacia_creditos.paginacion import TAMANO_PAGINA
+
+
+FILTROS_LISTA = ('tipo_cliente', 'estado_credito', 'estado_cuota')
+FILTROS_FECHA = ('fecha_inicio', 'fecha_fin', 'fecha_corte')
+
+# Opciones de los gráficos y su conversión desde la query string
+OPCIONES_GRAFICO = {'frecuencia': str, 'n': int, 'dias': int}
+
+
+def parse_filters(consulta):
+    """Filtros del motor a partir de parse_qs (keep_blank_values=True)"""
+    filtros = {}
+    for clave in FILTROS_LISTA:
+        if clave in consulta:
+            filtros[clave] = [
+                valor.strip()
+                for parte in consulta[clave]
+                for valor in parte.split(',')
+                if valor.strip()
+            ]
+    for clave in FILTROS_FECHA:
+        if clave in consulta:
+            filtros[clave] = consulta[clave][-1]
+    return filtros
+
+
+def _json_value(valor):
+    """NaN (por ejemplo la mora promedio sin vencidas) se envía como null"""
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+
+def frame_records(df):
+    """Filas del DataFrame como lista de dicts (fechas en ISO 8601)"""
+    if df is None:
+        return []
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+class EngineRequestHandler(BaseHTTPRequestHandler):
+    """Atiende las rutas GET de la API con el motor del servidor"""
+
+    server_version = 'FarmaciaCreditosAPI/1.0'
+
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        ruta = partes.path.rstrip('/') or '/'
+        consulta = parse_qs(partes.query, keep_blank_values=True)
+
+        try:
+            if ruta == '/salud':
+                self._send(HTTPStatus.OK, {'estado': 'ok', 'fuentes': self.server.motor.store.stats()})
+            elif ruta == '/kpis':
+                self._send(HTTPStatus.OK, self._kpis(consulta))
+            elif ruta == '/graficos':
+                self._send(HTTPStatus.OK, {'graficos': sorted(GRAFICOS)})
+            elif ruta.startswith('/graficos/'):
+                self._send(HTTPStatus.OK, self._grafico(ruta[len('/graficos/'):], consulta))
+            elif ruta == '/cuotas-vencidas':
+                self._send(HTTPStatus.OK, self._cuotas_vencidas(consulta))
+            elif ruta == '/escenarios-cobro':
+                self._send(HTTPStatus.OK, self._escenarios_cobro(consulta))
+            else:
+                self._send(HTTPStatus.NOT_FOUND, {'error': f"Ruta desconocida: {ruta}"})
+        except ValueError as e:
+            self._send(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            self.log_error("Error al atender %s: %r", self.path, e)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Error interno del motor'})
+
+    def _view(self, consulta):
+        return self.server.motor.view(parse_filters(consulta))
+
+    def _header(self, vista):
+        return {
+            'version': vista.datos.version,
+            'fecha_corte': vista.filtros['fecha_corte'].date().isoformat(),
+            'clave_filtros': vista.clave_filtros,
+        }
+
+    def _kpis(self, consulta):
+        vista = self._view(consulta)
+        kpis = self.server.motor.kpis(vista)
+        return {**self._header(vista), 'kpis': {clave: _json_value(valor) for clave, valor in kpis.items()}}
+
+    def _grafico(self, nombre, consulta):
+        if nombre not in GRAFICOS:
+            raise ValueError(f"Gráfico desconocido: {nombre}")
+        admitidas = inspect.signature(GRAFICOS[nombre]).parameters
+        opciones = {
+            clave: convertir(consulta[clave][-1])
+            for clave, convertir in OPCIONES_GRAFICO.items()
+            if clave in consulta
+        }
+        for clave in opciones:
+            if clave not in admitidas:
+                raise ValueError(f"El gráfico {nombre} no admite la opción {clave}")
+        vista = self._view({clave: valor for clave, valor in consulta.items() if clave not in opciones})
+        return {**self._header(vista), 'grafico': nombre, 'filas': frame_records(vista.chart(nombre, **opciones))}
+
+    def _cuotas_vencidas(self, consulta):
+        pagina = int(consulta.pop('pagina', ['1'])[-1])
+        tamano = int(consulta.pop('tamano', [str(TAMANO_PAGINA)])[-1])
+        if pagina < 1 or tamano < 1:
+            raise ValueError("pagina y tamano deben ser positivos")
+        vista = self._view(consulta)
+        filas = vista.overdue_rows()
+        return {
+            **self._header(vista),
+            'total': len(filas),
+            'pagina': pagina,
+            'paginas': filas.n_paginas(tamano),
+            'filas': frame_records(filas.page(pagina, tamano, COLUMNAS_VENCIDAS)),
+        }
+
+    def _escenarios_cobro(self, consulta):
+        opciones = {
+            clave: int(consulta.pop(clave)[-1])
+            for clave in ('dias', 'escenarios', 'semilla')
+            if clave in consulta
+        }
+        vista = self._view(consulta)
+        return {**self._header(vista), **opciones, 'filas': frame_records(vista.collection_scenarios(**opciones))}
+
+    def _send(self, estado, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, formato, *args):
+        if self.server.registrar:
+            super().log_message(formato, *args)
+
+
+class EngineServer(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por petición sobre un PortfolioEngine compartido"""
+
+    daemon_threads = True
+
+    def __init__(self, direccion, motor, registrar=False):
+        super().__init__(direccion, EngineRequestHandler)
+        self.motor = motor
+        self.registrar = registrar
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='API JSON local con los KPIs y gráficos de la cartera')
+    parser.add_argument('--host', default='127.0.0.1', help='Dirección en la que escuchar')
+    parser.add_argument('--puerto', type=int, default=8601, help='Puerto HTTP')
+    parser.add_argument('--precargar', action='store_true', help='Cargar los datos antes de aceptar peticiones')
+    parser.add_argument('--registrar', action='store_true', help='Registrar cada petición en stderr')
+    args = parser.parse_args(argv)
+
+    motor = PortfolioEngine.from_env()
+    if args.precargar:
+        motor.kpis(motor.view())
+
+    servidor = EngineServer((args.host, args.puerto), motor, registrar=args.registrar)
+    print(f"[INFO] API de la cartera en http://{args.host}:{args.puerto} (Ctrl+C para detener)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+=====================================================
+ARRANQUE EN FRÍO DEL DASHBOARD
+Motor del proceso, calentamiento en segundo plano y tiempo hasta el primer KPI
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.arranque [opciones de streamlit run]
+
+Lanza en un hilo el calentamiento (carga de datos, mora, índice, cubo, KPIs
+y gráficos de los filtros por defecto) y arranca Streamlit con el dashboard
+en el mismo proceso: el primer usuario de una réplica nueva encuentra los
+datos listos. Con `streamlit run` a secas el calentamiento empieza con la
+primera sesión, mientras se dibujan el encabezado y el esqueleto de KPIs.
+
+Este módulo no importa pandas al cargarse; el motor se importa dentro del
+hilo de calentamiento o al pedirlo por primera vez.
+"""
+
+import os
+import sys
+import threading
+import time
+
+
+RUTA_DASHBOARD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'farmacia_creditos_dashboard.py')
+
+# Inicio del proceso (aproximado: la primera importación de este módulo)
+INICIO_PROCESO = time.time()
+
+_motor = None
+_calentamiento = None
+_estado = {'calentamiento_s': None, 'primer_kpi_s': None, 'error': None}
+_lock = threading.Lock()
+
+
+def shared_engine():
+    """PortfolioEngine del proceso (configurado por entorno), creado una sola vez"""
+    global _motor
+    with _lock:
+        if _motor is None:
+            from farmacia_creditos.motor import PortfolioEngine
+
+            _motor = PortfolioEngine.from_env()
+        return _motor
+
+
+def warm_up(motor=None):
+    """
+    Deja listos los datos y agregados de la selección por defecto del
+    sidebar: instantánea, mora a hoy, índice, cubo, KPIs y datos de todos
+    los gráficos. Devuelve los segundos que tomó.
+    """
+    from farmacia_creditos.motor import GRAFICOS
+
+    inicio = time.perf_counter()
+    motor = motor if motor is not None else shared_engine()
+    vista = motor.view()
+    motor.kpis(vista)
+    for nombre in GRAFICOS:
+        vista.chart(nombre)
+    return time.perf_counter() - inicio
+
+
+def _run_warm_up():
+    try:
+        segundos = warm_up()
+    except Exception as e:
+        # El dashboard vuelve a cargar por su cuenta; solo se informa
+        _estado['error'] = repr(e)
+        print(f"[ERROR] Calentamiento fallido: {e!r}", file=sys.stderr)
+        return
+    _estado['calentamiento_s'] = segundos
+    print(f"[INFO] Datos y agregados precalculados en {segundos:.1f}s")
+
+
+def start_warm_up():
+    """Lanza warm_up en un hilo de fondo, una sola vez por proceso"""
+    global _calentamiento
+    with _lock:
+        if _calentamiento is None:
+            _calentamiento = threading.Thread(target=_run_warm_up, name='calentamiento-cartera', daemon=True)
+            _calentamiento.start()
+        return _calentamiento
+
+
+def record_first_kpi():
+    """
+    Registra el tiempo desde el inicio del proceso hasta el primer KPI
+    mostrado. Devuelve los segundos la primera vez y None las siguientes.
+    """
+    with _lock:
+        if _estado['primer_kpi_s'] is not None:
+            return None
+        _estado['primer_kpi_s'] = time.time() - INICIO_PROCESO
+    print(f"[INFO] Tiempo hasta el primer KPI: {_estado['primer_kpi_s']:.1f}s")
+    return _estado['primer_kpi_s']
+
+
+def startup_stats():
+    """Calentamiento (en curso o su duración), primer KPI y error, si hubo"""
+    return {
+        'calentando': _calentamiento is not None and _calentamiento.is_alive(),
+        **_estado,
+    }
+
+
+def main(argv=None):
+    # Streamlit primero: Plotly (que Streamlit importa) consulta pandas en
+    # sys.modules y fallaría si el hilo de calentamiento lo está importando
+    from streamlit.web import cli
+
+    start_warm_up()
+    sys.argv = ['streamlit', 'run', RUTA_DASHBOARD, *(sys.argv[1:] if argv is None else argv)]
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    # Con -m este archivo corre como __main__; el dashboard importa
+    # farmacia_creditos.arranque, así que el estado debe vivir en ese módulo
+    from farmacia_creditos import arranque
+
+    arranque.main()
@@ -0,0 +1,416 @@
+"""
+=====================================================
+ACCESO A DATOS - BASE FarmaciaCreditos
+Carga Clientes, Créditos y Cuotas mediante una conexión DB-API
+=====================================================
+
+Solo se seleccionan las columnas que usa el dashboard, las filas se leen
+por bloques con fetchmany y los tipos se convierten al ingresar. Los filtros
+del sidebar (tipo_cliente, estado, rango de fecha_desembolso) se envían al
+WHERE para que trabajen los índices idx_creditos_fecha, idx_cuotas_estado,
+etc. definidos en farmacia_creditos_database.sql.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+
+# Columnas que consume el dashboard: (expresión SQL, nombre, tipo)
+COLUMNAS_CLIENTES = [
+    ('cl.id_cliente', 'id', 'int'),
+    ('cl.nombre', 'nombre', 'str'),
+    ('cl.tipo_cliente', 'tipo', 'str'),
+    ('cl.nit', 'nit', 'str'),
+    ('cl.telefono', 'telefono', 'str'),
+    ('cl.riesgo', 'riesgo', 'str'),
+    ('cl.razon_social', 'razon_social', 'str'),
+]
+
+COLUMNAS_CREDITOS = [
+    ('cr.id_credito', 'id_credito', 'int'),
+    ('cr.id_cliente', 'id_cliente', 'int'),
+    ('cl.nombre', 'nombre_cliente', 'str'),
+    ('cl.tipo_cliente', 'tipo_cliente', 'str'),
+    ('cr.monto_capital', 'monto_capital', 'float'),
+    ('cr.tasa_interes', 'tasa_interes', 'float'),
+    ('cr.fecha_desembolso', 'fecha_desembolso', 'fecha'),
+    ('cr.plazo_meses', 'plazo_meses', 'int'),
+    ('cr.estado', 'estado', 'str'),
+]
+
+COLUMNAS_CUOTAS = [
+    ('cu.id_cuota', 'id_cuota', 'int'),
+    ('cu.id_credito', 'id_credito', 'int'),
+    ('cu.id_cliente', 'id_cliente', 'int'),
+    ('cl.nombre', 'nombre_cliente', 'str'),
+    ('cl.tipo_cliente', 'tipo_cliente', 'str'),
+    ('cu.numero_cuota', 'numero_cuota', 'int'),
+    ('cu.monto_capital', 'monto_capital', 'float'),
+    ('cu.interes', 'interes', 'float'),
+    ('cu.monto_total', 'monto_total', 'float'),
+    ('cu.fecha_programada', 'fecha_programada', 'fecha'),
+    ('cu.fecha_pago', 'fecha_pago', 'fecha'),
+    ('cu.estado', 'estado', 'str'),
+    ('cu.dias_mora', 'dias_mora', 'int'),
+]
+
+CHUNK_SIZE = 50_000
+
+# Ids por consulta con IN: por debajo del límite de 2100 parámetros de SQL Server
+LOTE_IDS = 2000
+
+# Marca de última modificación por tabla: las filas nuevas solo tienen la
+# fecha de creación, las modificadas también fecha_actualizacion
+MARCAS_ACTUALIZACION = {
+    'Clientes': 'COALESCE(cl.fecha_actualizacion, cl.fecha_registro)',
+    'Creditos': 'COALESCE(cr.fecha_actualizacion, cr.fecha_creacion)',
+    'Cuotas': 'COALESCE(cu.fecha_actualizacion, cu.fecha_creacion)',
+}
+
+
+# Réplica en SQLite de las tablas de farmacia_creditos_database.sql.
+# dias_mora es una columna normal: SQLite no permite GETDATE()/date('now')
+# en columnas calculadas. date(..., '+N months') pasa al mes siguiente si
+# el día no existe (31/01 + 1 mes = 02/03); el MIN con el último día del
+# mes destino lo lleva a fin de mes, como DATEADD(MONTH, ...).
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Clientes (
+    id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo_cliente VARCHAR(20) NOT NULL CHECK (tipo_cliente IN ('Natural', 'Jurídico')),
+    nombre VARCHAR(200) NOT NULL,
+    nit VARCHAR(20) NOT NULL UNIQUE,
+    telefono VARCHAR(20),
+    email VARCHAR(100),
+    direccion VARCHAR(300),
+    razon_social VARCHAR(200),
+    representante_legal VARCHAR(200),
+    riesgo VARCHAR(10) CHECK (riesgo IN ('Bajo', 'Medio', 'Alto')),
+    fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
+    usuario_registro VARCHAR(50),
+    fecha_actualizacion DATETIME,
+    usuario_actualizacion VARCHAR(50),
+    estado VARCHAR(20) DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Inactivo', 'Suspendido'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_clientes_tipo ON Clientes(tipo_cliente);
+CREATE INDEX IF NOT EXISTS idx_clientes_nit ON Clientes(nit);
+CREATE INDEX IF NOT EXISTS idx_clientes_estado ON Clientes(estado);
+
+CREATE TABLE IF NOT EXISTS Creditos (
+    id_credito INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cliente INT NOT NULL REFERENCES Clientes(id_cliente),
+    monto_capital DECIMAL(18,2) NOT NULL CHECK (monto_capital > 0),
+    tasa_interes DECIMAL(5,2) NOT NULL CHECK (tasa_interes >= 0),
+    plazo_meses INT NOT NULL CHECK (plazo_meses > 0),
+    fecha_desembolso DATE NOT NULL,
+    fecha_vencimiento_final DATE GENERATED ALWAYS AS (MIN(
+        date(fecha_desembolso, '+' || plazo_meses || ' months'),
+        date(fecha_desembolso, 'start of month', '+' || (plazo_meses + 1) || ' months', '-1 day')
+    )) VIRTUAL,
+    estado VARCHAR(20) DEFAULT 'Activo' CHECK (estado IN ('Activo', 'Cancelado', 'Moroso', 'Castigado')),
+    observaciones TEXT,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    usuario_creacion VARCHAR(50),
+    fecha_actualizacion DATETIME,
+    usuario_actualizacion VARCHAR(50)
+);
+
+CREATE INDEX IF NOT EXISTS idx_creditos_cliente ON Creditos(id_cliente);
+CREATE INDEX IF NOT EXISTS idx_creditos_estado ON Creditos(estado);
+CREATE INDEX IF NOT EXISTS idx_creditos_fecha ON Creditos(fecha_desembolso);
+
+CREATE TABLE IF NOT EXISTS Cuotas (
+    id_cuota INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_credito INT NOT NULL REFERENCES Creditos(id_credito),
+    id_cliente INT NOT NULL REFERENCES Clientes(id_cliente),
+    numero_cuota INT NOT NULL CHECK (numero_cuota > 0),
+    monto_capital DECIMAL(18,2) NOT NULL CHECK (monto_capital > 0),
+    interes DECIMAL(18,2) NOT NULL CHECK (interes >= 0),
+    monto_total DECIMAL(18,2) GENERATED ALWAYS AS (monto_capital + interes) STORED,
+    fecha_programada DATE NOT NULL,
+    fecha_pago DATE,
+    estado VARCHAR(20) DEFAULT 'Pendiente' CHECK (estado IN ('Pendiente', 'Pagada', 'Vencida', 'Parcial')),
+    dias_mora INT DEFAULT 0,
+    monto_pagado DECIMAL(18,2) DEFAULT 0,
+    saldo_pendiente DECIMAL(18,2) GENERATED ALWAYS AS (monto_capital + interes - IFNULL(monto_pagado, 0)) STORED,
+    observaciones TEXT,
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    usuario_creacion VARCHAR(50),
+    fecha_actualizacion DATETIME,
+    usuario_actualizacion VARCHAR(50),
+    CONSTRAINT uq_cuota_credito UNIQUE (id_credito, numero_cuota)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cuotas_credito ON Cuotas(id_credito);
+CREATE INDEX IF NOT EXISTS idx_cuotas_cliente ON Cuotas(id_cliente);
+CREATE INDEX IF NOT EXISTS idx_cuotas_estado ON Cuotas(estado);
+CREATE INDEX IF NOT EXISTS idx_cuotas_fecha_programada ON Cuotas(fecha_programada);
+CREATE INDEX IF NOT EXISTS idx_cuotas_fecha_pago ON Cuotas(fecha_pago);
+
+CREATE TABLE IF NOT EXISTS Pagos (
+    id_pago INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cuota INT NOT NULL REFERENCES Cuotas(id_cuota),
+    id_credito INT NOT NULL REFERENCES Creditos(id_credito),
+    monto_pago DECIMAL(18,2) NOT NULL CHECK (monto_pago > 0),
+    fecha_pago DATETIME DEFAULT CURRENT_TIMESTAMP,
+    metodo_pago VARCHAR(50) CHECK (metodo_pago IN ('Efectivo', 'Tarjeta', 'Transferencia', 'Cheque', 'Otro')),
+    numero_referencia VARCHAR(50),
+    comprobante VARCHAR(100),
+    observaciones TEXT,
+    fecha_registro DATETIME DEFAULT CURRENT_TIMESTAMP,
+    usuario_registro VARCHAR(50)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pagos_cuota ON Pagos(id_cuota);
+CREATE INDEX IF NOT EXISTS idx_pagos_credito ON Pagos(id_credito);
+CREATE INDEX IF NOT EXISTS idx_pagos_fecha ON Pagos(fecha_pago);
+"""
+
+
+# =====================================================
+# CONEXIÓN Y BASE SQLITE DE PRUEBA
+# =====================================================
+
+def connect(destino):
+    """
+    Abre una conexión DB-API.
+
+    'sqlite:///ruta.db' usa sqlite3; cualquier otro valor se toma como
+    cadena de conexión ODBC para SQL Server (requiere pyodbc).
+    """
+    if destino.startswith('sqlite:///'):
+        return sqlite3.connect(destino[len('sqlite:///'):], check_same_thread=False)
+
+    import pyodbc
+    return pyodbc.connect(destino)
+
+
+def create_sqlite_database(ruta=':memory:'):
+    """Crea (o abre) una base SQLite con el esquema de FarmaciaCreditos"""
+    conn = sqlite3.connect(ruta, check_same_thread=False)
+    conn.executescript(SQLITE_SCHEMA)
+    return conn
+
+
+def _fecha_sql(serie):
+    """Convierte una serie de fechas a texto ISO (YYYY-MM-DD), None para NaT"""
+    texto = pd.to_datetime(serie).dt.strftime('%Y-%m-%d')
+    return texto.astype(object).where(texto.notna(), None)
+
+
+def insert_dataframes(conn, df_clientes, df_creditos, df_cuotas):
+    """
+    Inserta los DataFrames del dashboard (mismo esquema que
+    generate_sample_data) en las tablas de la base, en una transacción.
+    """
+    clientes = pd.DataFrame({
+        'id_cliente': df_clientes['id'],
+        'tipo_cliente': df_clientes['tipo'],
+        'nombre': df_clientes['nombre'],
+        'nit': df_clientes['nit'],
+        'telefono': df_clientes['telefono'],
+        'razon_social': df_clientes.get('razon_social'),
+        'riesgo': df_clientes['riesgo'],
+    })
+
+    creditos = df_creditos[['id_credito', 'id_cliente', 'monto_capital', 'tasa_interes',
+                            'plazo_meses', 'estado']].copy()
+    creditos['fecha_desembolso'] = _fecha_sql(df_creditos['fecha_desembolso'])
+
+    cuotas = df_cuotas[['id_cuota', 'id_credito', 'id_cliente', 'numero_cuota', 'monto_capital',
+                        'interes', 'estado', 'dias_mora']].copy()
+    cuotas['fecha_programada'] = _fecha_sql(df_cuotas['fecha_programada'])
+    cuotas['fecha_pago'] = _fecha_sql(df_cuotas['fecha_pago'])
+
+    with conn:
+        for tabla, df in (('Clientes', clientes), ('Creditos', creditos), ('Cuotas', cuotas)):
+            df = df.astype(object).where(df.notna(), None)
+            columnas = ', '.join(df.columns)
+            marcadores = ', '.join('?' * len(df.columns))
+            conn.executemany(
+                f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores})",
+                df.itertuples(index=False, name=None)
+            )
+
+
+# =====================================================
+# LECTURA POR BLOQUES
+# =====================================================
+
+def _coerce_dtypes(df, columnas):
+    """Convierte los tipos de un bloque recién leído"""
+    for _, nombre, tipo in columnas:
+        if tipo == 'int':
+            df[nombre] = pd.to_numeric(df[nombre]).fillna(0).astype('int64')
+        elif tipo == 'float':
+            df[nombre] = pd.to_numeric(df[nombre].astype(float))
+        elif tipo == 'fecha':
+            df[nombre] = pd.to_datetime(df[nombre], errors='coerce')
+    return df
+
+
+def _read_chunks(conn, sql, params, columnas, chunk_size=CHUNK_SIZE):
+    """Ejecuta la consulta y arma el DataFrame bloque a bloque con fetchmany"""
+    nombres = [nombre for _, nombre, _ in columnas]
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+
+    bloques = []
+    try:
+        while True:
+            filas = cursor.fetchmany(chunk_size)
+            if not filas:
+                break
+            bloque = pd.DataFrame.from_records(filas, columns=nombres)
+            bloques.append(_coerce_dtypes(bloque, columnas))
+    finally:
+        cursor.close()
+
+    if not bloques:
+        return _coerce_dtypes(pd.DataFrame({nombre: pd.Series(dtype=object) for nombre in nombres}), columnas)
+    return pd.concat(bloques, ignore_index=True)
+
+
+def _build_where(condiciones, marcador='?'):
+    """
+    Arma la cláusula WHERE a partir de (columna, operador, valor).
+
+    Las condiciones con valor None se omiten; el operador IN expande una
+    lista de parámetros. Una lista vacía en IN no devuelve filas, igual que
+    isin([]) en pandas.
+    """
+    partes = []
+    params = []
+    for columna, operador, valor in condiciones:
+        if valor is None:
+            continue
+        if operador == 'IN':
+            valores = list(valor)
+            if not valores:
+                partes.append('1 = 0')
+                continue
+            partes.append(f"{columna} IN ({', '.join([marcador] * len(valores))})")
+            params.extend(valores)
+        else:
+            partes.append(f"{columna} {operador} {marcador}")
+            params.append(valor)
+
+    where = ' WHERE ' + ' AND '.join(partes) if partes else ''
+    return where, params
+
+
+def _read_by_ids(conn, consulta, columna, ids, columnas, marcador='?', lote=LOTE_IDS):
+    """
+    Ejecuta `consulta` (sin WHERE) filtrando columna IN ids, por bloques de
+    lote ids. Con ids vacío se consulta igual (IN vacío no trae filas) para
+    conservar columnas y tipos.
+    """
+    bloques = []
+    for inicio in range(0, max(len(ids), 1), lote):
+        where, params = _build_where([(columna, 'IN', ids[inicio:inicio + lote].tolist())], marcador)
+        bloques.append(_read_chunks(conn, consulta + where, params, columnas))
+    return pd.concat(bloques, ignore_index=True)
+
+
+def _fecha_param(fecha):
+    """Convierte una fecha de filtro a texto ISO, comparable en cualquier motor"""
+    if fecha is None:
+        return None
+    return pd.Timestamp(fecha).strftime('%Y-%m-%d')
+
+
+def _select(columnas):
+    return ', '.join(f"{expresion} AS {nombre}" for expresion, nombre, _ in columnas)
+
+
+def load_clientes(conn, tipo_cliente=None, desde=None, chunk_size=CHUNK_SIZE, marcador='?'):
+    """Carga Clientes con el esquema de df_clientes (desde: solo modificados desde esa marca)"""
+    where, params = _build_where([
+        ('cl.tipo_cliente', 'IN', tipo_cliente),
+        (MARCAS_ACTUALIZACION['Clientes'], '>=', desde),
+    ], marcador)
+    sql = f"SELECT {_select(COLUMNAS_CLIENTES)} FROM Clientes cl{where} ORDER BY cl.id_cliente"
+    return _read_chunks(conn, sql, params, COLUMNAS_CLIENTES, chunk_size)
+
+
+def load_creditos(conn, tipo_cliente=None, estado=None, fecha_inicio=None, fecha_fin=None,
+                  desde=None, chunk_size=CHUNK_SIZE, marcador='?'):
+    """Carga Créditos (con nombre y tipo de cliente) filtrando en la base"""
+    where, params = _build_where([
+        ('cl.tipo_cliente', 'IN', tipo_cliente),
+        ('cr.estado', 'IN', estado),
+        ('cr.fecha_desembolso', '>=', _fecha_param(fecha_inicio)),
+        ('cr.fecha_desembolso', '<=', _fecha_param(fecha_fin)),
+        (MARCAS_ACTUALIZACION['Creditos'], '>=', desde),
+    ], marcador)
+    sql = (
+        f"SELECT {_select(COLUMNAS_CREDITOS)} "
+        f"FROM Creditos cr INNER JOIN Clientes cl ON cr.id_cliente = cl.id_cliente"
+        f"{where} ORDER BY cr.id_credito"
+    )
+    return _read_chunks(conn, sql, params, COLUMNAS_CREDITOS, chunk_size)
+
+
+def load_cuotas(conn, tipo_cliente=None, estado=None, estado_credito=None, fecha_inicio=None,
+                fecha_fin=None, desde=None, chunk_size=CHUNK_SIZE, marcador='?'):
+    """
+    Carga Cuotas (con nombre y tipo de cliente) filtrando en la base.
+    estado_credito y el rango de fecha_desembolso filtran por el crédito de
+    la cuota, igual que load_creditos.
+    """
+    where, params = _build_where([
+        ('cl.tipo_cliente', 'IN', tipo_cliente),
+        ('cu.estado', 'IN', estado),
+        ('cr.estado', 'IN', estado_credito),
+        ('cr.fecha_desembolso', '>=', _fecha_param(fecha_inicio)),
+        ('cr.fecha_desembolso', '<=', _fecha_param(fecha_fin)),
+        (MARCAS_ACTUALIZACION['Cuotas'], '>=', desde),
+    ], marcador)
+    sql = (
+        f"SELECT {_select(COLUMNAS_CUOTAS)} "
+        f"FROM Cuotas cu INNER JOIN Clientes cl ON cu.id_cliente = cl.id_cliente"
+        f" INNER JOIN Creditos cr ON cu.id_credito = cr.id_credito"
+        f"{where} ORDER BY cu.id_cuota"
+    )
+    return _read_chunks(conn, sql, params, COLUMNAS_CUOTAS, chunk_size)
+
+
+def read_watermark(conn, tabla):
+    """Devuelve la marca de modificación más reciente de la tabla (None si está vacía)"""
+    alias = {'Clientes': 'cl', 'Creditos': 'cr', 'Cuotas': 'cu'}[tabla]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MAX({MARCAS_ACTUALIZACION[tabla]}) FROM {tabla} {alias}")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def read_schema_signature(conn, tablas=('Clientes', 'Creditos', 'Cuotas')):
+    """Nombres de columnas de cada tabla, para detectar cambios de esquema"""
+    firma = {}
+    cursor = conn.cursor()
+    try:
+        for tabla in tablas:
+            cursor.execute(f"SELECT * FROM {tabla} WHERE 1 = 0")
+            firma[tabla] = tuple(columna[0] for columna in cursor.description)
+    finally:
+        cursor.close()
+    return firma
+
+
+def load_dashboard_data(conn, tipo_cliente=None, estado_credito=None, estado_cuota=None,
+                        fecha_inicio=None, fecha_fin=None, chunk_size=CHUNK_SIZE, marcador='?'):
+    """
+    Carga (df_clientes, df_creditos, df_cuotas) aplicando los filtros del
+    sidebar en la base. Los créditos se filtran por tipo, estado y fecha;
+    las cuotas por tipo y estado y por los filtros de su crédito, igual que
+    la sección APLICAR FILTROS.
+    """
+    df_clientes = load_clientes(conn, chunk_size=chunk_size, marcador=marcador)
+    df_creditos = load_creditos(conn, tipo_cliente, estado_credito, fecha_inicio, fecha_fin,
+                                chunk_size=chunk_size, marcador=marcador)
+    df_cuotas = load_cuotas(conn, tipo_cliente, estado_cuota, estado_credito, fecha_inicio, fecha_fin,
+                            chunk_size=chunk_size, marcador=marcador)
+    return df_clientes, df_creditos, df_cuotas
@@ -0,0 +1,144 @@
+"""
+=====================================================
+REPRESENTACIÓN COMPACTA EN MEMORIA
+Categorías, enteros angostos y tasas float32
+=====================================================
+
+df_cuotas repite nombre_cliente, tipo_cliente y estado como cadenas de
+Python en cada cuota. Aquí se convierten a categóricas, los ids a int32,
+las tasas a float32 y las fechas a datetime64 con NaT.
+
+Uso (reporte de bytes por fila):
+    python -m farmacia_creditos.compacto --creditos 100000
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+ESTADOS_CREDITO = ['Activo', 'Cancelado', 'Moroso', 'Castigado']
+ESTADOS_CUOTA = ['Pendiente', 'Pagada', 'Vencida', 'Parcial']
+TIPOS_CLIENTE = ['Natural', 'Jurídico']
+RIESGOS = ['Bajo', 'Medio', 'Alto']
+
+# Las tasas caben en float32 sin perder los dos decimales. Los montos se
+# quedan en float64: pandas devuelve la suma de una columna float32 como
+# float32, y los totales de millones perderían los centavos en los KPIs.
+LIMITE_FLOAT32 = 2 ** 17
+
+ESQUEMA_CLIENTES = {
+    'id': 'id',
+    'tipo': TIPOS_CLIENTE,
+    'riesgo': RIESGOS,
+}
+
+ESQUEMA_CREDITOS = {
+    'id_credito': 'id',
+    'id_cliente': 'id',
+    'nombre_cliente': 'categoria',
+    'tipo_cliente': TIPOS_CLIENTE,
+    'monto_capital': np.float64,
+    'tasa_interes': 'tasa',
+    'fecha_desembolso': 'fecha',
+    'plazo_meses': np.int16,
+    'estado': ESTADOS_CREDITO,
+}
+
+ESQUEMA_CUOTAS = {
+    'id_cuota': 'id',
+    'id_credito': 'id',
+    'id_cliente': 'id',
+    'nombre_cliente': 'categoria',
+    'tipo_cliente': TIPOS_CLIENTE,
+    'numero_cuota': np.int16,
+    'monto_capital': np.float64,
+    'interes': np.float64,
+    'monto_total': np.float64,
+    'fecha_programada': 'fecha',
+    'fecha_pago': 'fecha',
+    'estado': ESTADOS_CUOTA,
+    'dias_mora': np.int32,
+}
+
+
+def _compact_column(serie, tipo):
+    if tipo == 'id':
+        # int32 mientras los ids quepan; si no, se mantiene int64
+        if len(serie) == 0 or serie.max() < np.iinfo(np.int32).max:
+            return serie.astype(np.int32)
+        return serie.astype(np.int64)
+    if tipo == 'tasa':
+        if len(serie) == 0 or serie.abs().max() < LIMITE_FLOAT32:
+            return serie.astype(np.float32)
+        return serie.astype(np.float64)
+    if tipo == 'fecha':
+        return pd.to_datetime(serie, errors='coerce')
+    if tipo == 'categoria':
+        return serie.astype('category')
+    if isinstance(tipo, list):
+        # Categorías fijas: se agregan al final los valores no previstos
+        extras = sorted(set(serie.dropna().unique()) - set(tipo))
+        return pd.Categorical(serie, categories=tipo + extras)
+    return serie.astype(tipo)
+
+
+def compact_frame(df, esquema):
+    """Devuelve una copia de df con los tipos compactos del esquema"""
+    compacto = df.copy()
+    for columna, tipo in esquema.items():
+        if columna in compacto.columns:
+            compacto[columna] = _compact_column(compacto[columna], tipo)
+    return compacto
+
+
+def compact_frames(df_clientes, df_creditos, df_cuotas):
+    """Compacta los tres DataFrames del dashboard"""
+    return (
+        compact_frame(df_clientes, ESQUEMA_CLIENTES),
+        compact_frame(df_creditos, ESQUEMA_CREDITOS),
+        compact_frame(df_cuotas, ESQUEMA_CUOTAS),
+    )
+
+
+def memory_report(**frames):
+    """
+    Reporte de memoria por tabla: filas, bytes totales y bytes por fila
+    (incluye el contenido de las cadenas, memory_usage(deep=True)).
+    """
+    filas = []
+    for nombre, df in frames.items():
+        total = int(df.memory_usage(index=True, deep=True).sum())
+        filas.append({
+            'tabla': nombre,
+            'filas': len(df),
+            'bytes': total,
+            'bytes_por_fila': total / len(df) if len(df) else 0.0,
+        })
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    from farmacia_creditos.generador import iter_portfolio_chunks
+
+    parser = argparse.ArgumentParser(description='Compara la memoria por fila antes y después de compactar')
+    parser.add_argument('--clientes', type=int, default=10_000, help='Número de clientes')
+    parser.add_argument('--creditos', type=int, default=100_000, help='Número de créditos')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla aleatoria')
+    args = parser.parse_args(argv)
+
+    df_creditos, df_cuotas = next(iter_portfolio_chunks(
+        args.clientes, args.creditos, seed=args.seed, chunk_size=args.creditos
+    ))
+    antes = memory_report(creditos=df_creditos, cuotas=df_cuotas)
+    _, df_creditos, df_cuotas = compact_frames(pd.DataFrame(), df_creditos, df_cuotas)
+    despues = memory_report(creditos=df_creditos, cuotas=df_cuotas)
+
+    reporte = antes.merge(despues, on=['tabla', 'filas'], suffixes=('_antes', '_despues'))
+    reporte['reduccion'] = 1 - reporte['bytes_despues'] / reporte['bytes_antes']
+    print(reporte.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+
+if __name__ == '__main__':
+    main()
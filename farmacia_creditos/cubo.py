@@ -0,0 +1,254 @@
+"""
+=====================================================
+CUBO OLAP PREAGREGADO DE LA CARTERA
+Cuboides materializados para todos los gráficos del dashboard
+=====================================================
+
+El cubo de cuotas tiene las dimensiones tipo_cliente × estado del crédito ×
+fecha_desembolso del crédito × estado de la cuota × rango de mora × cliente,
+y el de créditos tipo_cliente × estado × fecha_desembolso
+× cliente. Guardan sumas y conteos (y máximos de mora). Las dimensiones del
+crédito permiten aplicar a las cuotas los mismos filtros que a los créditos.
+
+No se materializa el cuboide base: con el cliente y la fecha exacta como
+dimensiones tendría casi tantas filas como las cuotas. Se construyen los
+cuboides (grouping sets) que necesitan los gráficos, una vez por refresco
+de datos, y cada consulta filtra y agrupa el cuboide más chico que tenga
+las dimensiones pedidas. Las fechas se guardan exactas (no por mes) para
+que los rangos del sidebar y el corte de 90 días den el mismo resultado
+que filtrar las filas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.mora import ETIQUETAS_MORA, aging_bucket
+
+
+MEDIDAS_CUOTAS = {'monto_total': 'sum', 'cantidad': 'sum', 'dias_mora': 'sum', 'max_mora': 'max'}
+MEDIDAS_CREDITOS = {'monto_capital': 'sum', 'cantidad': 'sum'}
+
+# Cuboides materializados: los gráficos de cuotas se filtran por tipo,
+# estado y fecha de desembolso del crédito y estado de la cuota; cada uno
+# agrega una dimensión
+FILTROS_CUOTAS = ['tipo_cliente', 'estado_credito', 'fecha_desembolso', 'estado']
+CUBOIDES_CUOTAS = [
+    FILTROS_CUOTAS + ['rango_mora'],
+    FILTROS_CUOTAS + ['nombre_cliente'],
+]
+
+CUBOIDES_CREDITOS = [
+    ['tipo_cliente', 'estado', 'fecha_desembolso'],
+    ['tipo_cliente', 'estado', 'fecha_desembolso', 'nombre_cliente'],
+]
+
+
+def _credito_por_cuota(df_creditos, df_cuotas):
+    """
+    Estado y fecha_desembolso del crédito dueño de cada cuota (NaN/NaT si el
+    crédito no está cargado, de modo que ningún filtro de créditos la incluye).
+    """
+    estado = df_creditos['estado'].astype('category')
+    filas = pd.Index(df_creditos['id_credito']).get_indexer(df_cuotas['id_credito'])
+    encontrado = filas >= 0
+
+    codigos = np.full(len(df_cuotas), -1, dtype=np.int16)
+    codigos[encontrado] = estado.cat.codes.to_numpy()[filas[encontrado]]
+
+    fechas = np.full(len(df_cuotas), np.datetime64('NaT'), dtype='datetime64[ns]')
+    fechas[encontrado] = df_creditos['fecha_desembolso'].to_numpy(dtype='datetime64[ns]')[filas[encontrado]]
+
+    return (
+        pd.Series(pd.Categorical.from_codes(codigos, estado.cat.categories), index=df_cuotas.index),
+        pd.Series(fechas, index=df_cuotas.index),
+    )
+
+
+def _rollup(df, dimensiones, medidas):
+    """Agrupa df por las dimensiones aplicando la agregación de cada medida"""
+    return df.groupby(dimensiones, observed=True, dropna=False, sort=True).agg(medidas).reset_index()
+
+
+class Cube:
+    """
+    Cuboides materializados de un hecho (cuotas o créditos).
+
+    query() elige el cuboide más chico que contiene las dimensiones
+    filtradas y agrupadas, aplica los filtros y vuelve a agregar.
+    """
+
+    def __init__(self, hechos, cuboides, medidas):
+        self.medidas = medidas
+        self.cuboides = [
+            (frozenset(dimensiones), _rollup(hechos, dimensiones, medidas))
+            for dimensiones in cuboides
+        ]
+        self.cuboides.sort(key=lambda par: len(par[1]))
+
+    def query(self, por, valores=None, rangos=None):
+        """
+        Agrega las medidas por las dimensiones de `por`.
+
+        valores: {dimensión: valores permitidos}; rangos: {dimensión: (desde, hasta)}
+        inclusivos, cualquiera de los dos puede ser None.
+        """
+        valores = valores or {}
+        rangos = rangos or {}
+        necesarias = set(por) | set(valores) | set(rangos)
+
+        for dimensiones, cuboide in self.cuboides:
+            if necesarias <= dimensiones:
+                break
+        else:
+            raise KeyError(f"Ningún cuboide contiene las dimensiones {sorted(necesarias)}")
+
+        mascara = np.ones(len(cuboide), dtype=bool)
+        for dimension, permitidos in valores.items():
+            mascara &= cuboide[dimension].isin(list(permitidos)).to_numpy()
+        for dimension, (desde, hasta) in rangos.items():
+            columna = cuboide[dimension]
+            if desde is not None:
+                mascara &= (columna >= desde).to_numpy()
+            if hasta is not None:
+                mascara &= (columna <= hasta).to_numpy()
+
+        return cuboide[mascara].groupby(list(por), observed=True, sort=True).agg(self.medidas).reset_index()
+
+    @property
+    def filas(self):
+        return sum(len(cuboide) for _, cuboide in self.cuboides)
+
+
+class PortfolioCube:
+    """
+    Cubo de la cartera: un Cube de cuotas y uno de créditos, con una
+    consulta por gráfico del dashboard. Se construye una vez por refresco.
+    """
+
+    def __init__(self, df_creditos, df_cuotas):
+        estado_credito, fecha_desembolso = _credito_por_cuota(df_creditos, df_cuotas)
+        cuotas = pd.DataFrame({
+            'tipo_cliente': df_cuotas['tipo_cliente'],
+            'estado_credito': estado_credito,
+            'fecha_desembolso': fecha_desembolso,
+            'estado': df_cuotas['estado'],
+            'rango_mora': (df_cuotas['rango_mora'] if 'rango_mora' in df_cuotas
+                           else aging_bucket(df_cuotas['dias_mora'])),
+            'nombre_cliente': df_cuotas['nombre_cliente'],
+            'monto_total': df_cuotas['monto_total'].astype(np.float64),
+            'cantidad': np.ones(len(df_cuotas), dtype=np.int64),
+            'dias_mora': df_cuotas['dias_mora'].astype(np.int64),
+            'max_mora': df_cuotas['dias_mora'],
+        })
+        creditos = pd.DataFrame({
+            'tipo_cliente': df_creditos['tipo_cliente'],
+            'estado': df_creditos['estado'],
+            'fecha_desembolso': df_creditos['fecha_desembolso'],
+            'nombre_cliente': df_creditos['nombre_cliente'],
+            'monto_capital': df_creditos['monto_capital'].astype(np.float64),
+            'cantidad': np.ones(len(df_creditos), dtype=np.int64),
+        })
+
+        self.cuotas = Cube(cuotas, CUBOIDES_CUOTAS, MEDIDAS_CUOTAS)
+        self.creditos = Cube(creditos, CUBOIDES_CREDITOS, MEDIDAS_CREDITOS)
+
+    # -------------------------------------------------
+    # Filtros del sidebar
+    # -------------------------------------------------
+
+    @staticmethod
+    def _filtros_creditos(tipo_cliente, estado_credito, fecha_inicio, fecha_fin):
+        valores = {'tipo_cliente': tipo_cliente, 'estado': estado_credito}
+        rangos = {'fecha_desembolso': (pd.to_datetime(fecha_inicio), pd.to_datetime(fecha_fin))}
+        return valores, rangos
+
+    @staticmethod
+    def _filtros_cuotas(tipo_cliente, estado_cuota, estado_credito, fecha_inicio, fecha_fin):
+        """Filtros de cuotas: los de la cuota más los de su crédito"""
+        valores = {'tipo_cliente': tipo_cliente, 'estado': estado_cuota, 'estado_credito': estado_credito}
+        rangos = {'fecha_desembolso': (pd.to_datetime(fecha_inicio), pd.to_datetime(fecha_fin))}
+        return valores, rangos
+
+    # -------------------------------------------------
+    # Tab 1: Estado de Créditos
+    # -------------------------------------------------
+
+    def estado_cuotas(self, tipo_cliente, estado_credito, estado_cuota, fecha_inicio, fecha_fin):
+        """Monto y cantidad de cuotas por estado (gráfico de torta)"""
+        valores, rangos = self._filtros_cuotas(tipo_cliente, estado_cuota, estado_credito, fecha_inicio, fecha_fin)
+        resultado = self.cuotas.query(['estado'], valores, rangos)
+        resultado = resultado[['estado', 'monto_total', 'cantidad']]
+        resultado.columns = ['Estado', 'Monto', 'Cantidad']
+        return resultado
+
+    def creditos_por_tipo(self, tipo_cliente, estado_credito, fecha_inicio, fecha_fin):
+        """Monto de créditos por tipo de cliente"""
+        valores, rangos = self._filtros_creditos(tipo_cliente, estado_credito, fecha_inicio, fecha_fin)
+        return self.creditos.query(['tipo_cliente'], valores, rangos)[['tipo_cliente', 'monto_capital']]
+
+    def evolucion_creditos(self, tipo_cliente, estado_credito, fecha_inicio, fecha_fin, frecuencia='M'):
+        """
+        Monto y cantidad de créditos otorgados por período de desembolso
+        (frecuencia 'D', 'W' o 'M'); Periodo es la fecha de inicio del período.
+        """
+        valores, rangos = self._filtros_creditos(tipo_cliente, estado_credito, fecha_inicio, fecha_fin)
+        por_fecha = self.creditos.query(['fecha_desembolso'], valores, rangos)
+        por_fecha['periodo'] = por_fecha['fecha_desembolso'].dt.to_period(frecuencia).dt.start_time
+        resultado = por_fecha.groupby('periodo').agg({'monto_capital': 'sum', 'cantidad': 'sum'}).reset_index()
+        resultado.columns = ['Periodo', 'Monto', 'Cantidad']
+        return resultado
+
+    # -------------------------------------------------
+    # Tab 2: Análisis de Morosidad
+    # -------------------------------------------------
+
+    def top_morosos(self, tipo_cliente, estado_credito, estado_cuota, fecha_inicio, fecha_fin, n=10):
+        """Los n clientes con más deuda vencida, de menor a mayor"""
+        if 'Vencida' not in estado_cuota:
+            return pd.DataFrame({'Cliente': [], 'Deuda': [], 'Cuotas': []})
+        valores, rangos = self._filtros_cuotas(tipo_cliente, ['Vencida'], estado_credito, fecha_inicio, fecha_fin)
+        resultado = self.cuotas.query(['nombre_cliente'], valores, rangos)
+        resultado = resultado[['nombre_cliente', 'monto_total', 'cantidad']]
+        resultado = resultado.sort_values('monto_total', ascending=True).tail(n)
+        resultado.columns = ['Cliente', 'Deuda', 'Cuotas']
+        return resultado
+
+    def antiguedad(self, tipo_cliente, estado_credito, estado_cuota, fecha_inicio, fecha_fin):
+        """Deuda vencida por rango de días de mora (None si no hay vencidas)"""
+        if 'Vencida' not in estado_cuota:
+            return None
+        valores, rangos = self._filtros_cuotas(tipo_cliente, ['Vencida'], estado_credito, fecha_inicio, fecha_fin)
+        if self.cuotas.query(['estado'], valores, rangos)['cantidad'].sum() == 0:
+            return None
+
+        por_rango = self.cuotas.query(['rango_mora'], valores, rangos).set_index('rango_mora')['monto_total']
+        resultado = por_rango.reindex(ETIQUETAS_MORA, fill_value=0.0)
+        resultado = pd.DataFrame({
+            'rango_dias': pd.Categorical(ETIQUETAS_MORA, categories=ETIQUETAS_MORA, ordered=True),
+            'monto_total': resultado.to_numpy(),
+        })
+        return resultado
+
+    # -------------------------------------------------
+    # Tab 3: Clientes
+    # -------------------------------------------------
+
+    def top_clientes_activos(self, tipo_cliente, estado_credito, fecha_inicio, fecha_fin, n=10):
+        """Clientes con mayor monto en créditos activos (todos si n es None)"""
+        if 'Activo' not in estado_credito:
+            return pd.DataFrame({'Cliente': [], 'Créditos': [], 'Monto Total': []})
+        valores, rangos = self._filtros_creditos(tipo_cliente, ['Activo'], fecha_inicio, fecha_fin)
+        resultado = self.creditos.query(['nombre_cliente'], valores, rangos)
+        resultado = resultado[['nombre_cliente', 'cantidad', 'monto_capital']]
+        resultado = resultado.sort_values('monto_capital', ascending=False, kind='stable')
+        if n is not None:
+            resultado = resultado.head(n)
+        resultado.columns = ['Cliente', 'Créditos', 'Monto Total']
+        return resultado
+
+    def estado_creditos(self, tipo_cliente, estado_credito, fecha_inicio, fecha_fin):
+        """Cantidad de créditos por estado"""
+        valores, rangos = self._filtros_creditos(tipo_cliente, estado_credito, fecha_inicio, fecha_fin)
+        resultado = self.creditos.query(['estado'], valores, rangos)[['estado', 'cantidad']]
+        resultado.columns = ['Estado', 'Cantidad']
+        return resultado
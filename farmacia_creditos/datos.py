@@ -0,0 +1,114 @@
+"""
+=====================================================
+GENERACIÓN VECTORIZADA DE CUOTAS
+Cronogramas de pago construidos con operaciones NumPy
+=====================================================
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Columnas de df_cuotas en el orden que usa el dashboard
+COLUMNAS_CUOTAS = [
+    'id_cuota', 'id_credito', 'id_cliente', 'nombre_cliente', 'tipo_cliente',
+    'numero_cuota', 'monto_capital', 'interes', 'monto_total',
+    'fecha_programada', 'fecha_pago', 'estado', 'dias_mora'
+]
+
+UN_DIA = np.timedelta64(1, 'D')
+
+
+def add_months(fechas, meses):
+    """
+    DATEADD(MONTH, meses, fecha) vectorizado: el mismo día del mes destino,
+    o su último día si el mes es más corto (31-ene + 1 mes = 28/29-feb).
+    Devuelve datetime64[D].
+    """
+    fechas = np.asarray(fechas, dtype='datetime64[D]')
+    mes = fechas.astype('datetime64[M]')
+    dia = (fechas - mes.astype('datetime64[D]')) // UN_DIA
+    destino = mes + np.asarray(meses, dtype=np.int64)
+    inicio = destino.astype('datetime64[D]')
+    largo = ((destino + 1).astype('datetime64[D]') - inicio) // UN_DIA
+    return inicio + np.minimum(dia, largo - 1) * UN_DIA
+
+
+def build_cuotas_schedule(df_creditos, today=None, rng=None, id_cuota_inicial=1):
+    """
+    Expande cada crédito en sus cuotas mensuales sin bucles de Python.
+
+    Las cuotas se generan con np.repeat sobre plazo_meses y el número de
+    cuota se obtiene restando el offset acumulado de cada crédito. Estado,
+    fecha_pago y dias_mora siguen las mismas reglas que el generador
+    original (cuotas cada 30 días desde el desembolso).
+    """
+    if today is None:
+        today = datetime.now()
+    if rng is None:
+        rng = np.random.default_rng()
+
+    plazos = df_creditos['plazo_meses'].to_numpy(dtype=np.int64)
+    total = int(plazos.sum())
+
+    # Índice del crédito dueño de cada cuota y número de cuota (1..plazo)
+    fila_credito = np.repeat(np.arange(len(plazos)), plazos)
+    offsets = np.cumsum(plazos) - plazos
+    numero_cuota = np.arange(total, dtype=np.int64) - offsets[fila_credito] + 1
+
+    monto_capital_credito = df_creditos['monto_capital'].to_numpy(dtype=np.float64)
+    tasa_interes = df_creditos['tasa_interes'].to_numpy(dtype=np.float64)
+    monto_cuota = (monto_capital_credito / plazos)[fila_credito]
+    interes_mensual = ((monto_capital_credito * tasa_interes / 100) / 12)[fila_credito]
+
+    fecha_desembolso = df_creditos['fecha_desembolso'].to_numpy(dtype='datetime64[ns]')
+    fecha_programada = fecha_desembolso[fila_credito] + (30 * numero_cuota) * UN_DIA
+
+    # Clasificación de cada cuota según su antigüedad respecto a hoy
+    hoy = np.datetime64(pd.Timestamp(today).to_datetime64(), 'ns')
+    antigua = fecha_programada < hoy - 30 * UN_DIA
+    reciente = ~antigua & (fecha_programada < hoy)
+    moroso = (df_creditos['estado'].to_numpy() == 'Moroso')[fila_credito]
+
+    azar = rng.random(total)
+    vencida = (antigua & moroso & (azar > 0.3)) | (reciente & (azar > 0.7))
+    pagada = (antigua | reciente) & ~vencida
+
+    # Desfase de pago: -5..9 días en cuotas antiguas, -3..4 en recientes
+    desfase = np.where(
+        antigua,
+        rng.integers(-5, 10, total),
+        rng.integers(-3, 5, total)
+    )
+
+    fecha_pago = np.where(
+        pagada,
+        fecha_programada + desfase * UN_DIA,
+        np.datetime64('NaT', 'ns')
+    )
+
+    dias_mora = np.zeros(total, dtype=np.int64)
+    dias_mora[vencida] = (hoy - fecha_programada[vencida]) // UN_DIA
+    dias_mora[pagada] = np.maximum(desfase[pagada], 0)
+
+    estado = np.full(total, 'Pendiente', dtype=object)
+    estado[vencida] = 'Vencida'
+    estado[pagada] = 'Pagada'
+
+    return pd.DataFrame({
+        'id_cuota': np.arange(id_cuota_inicial, id_cuota_inicial + total, dtype=np.int64),
+        'id_credito': df_creditos['id_credito'].to_numpy()[fila_credito],
+        'id_cliente': df_creditos['id_cliente'].to_numpy()[fila_credito],
+        'nombre_cliente': df_creditos['nombre_cliente'].to_numpy()[fila_credito],
+        'tipo_cliente': df_creditos['tipo_cliente'].to_numpy()[fila_credito],
+        'numero_cuota': numero_cuota,
+        'monto_capital': monto_cuota,
+        'interes': interes_mensual,
+        'monto_total': monto_cuota + interes_mensual,
+        'fecha_programada': fecha_programada,
+        'fecha_pago': fecha_pago,
+        'estado': estado,
+        'dias_mora': dias_mora
+    }, columns=COLUMNAS_CUOTAS)
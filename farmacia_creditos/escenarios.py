@@ -0,0 +1,231 @@
+"""
+=====================================================
+ESCENARIOS DE COBRANZA (MONTE CARLO)
+Cobros esperados por semana con bandas P5/P95 e impagos
+=====================================================
+
+La proyección de cobros del dashboard suma las cuotas pendientes por semana
+y supone que todas se pagan al vencer. Aquí se simulan miles de escenarios a
+la vez con NumPy a partir del comportamiento histórico de cada nivel de
+riesgo del cliente (Bajo, Medio, Alto):
+
+- Calibración (una vez por versión de datos y fecha de corte): de las cuotas
+  que vencieron hace al menos SEMANAS_IMPAGO semanas, la semana de atraso
+  con que se pagaron (dias_mora de las Pagada) o el impago si no se pagaron
+  en ese plazo. Los niveles con poca historia se acercan a la distribución
+  de toda la cartera (PESO_PREVIO cuotas ficticias).
+- Cuotas abiertas: las que vencen dentro del horizonte se agrupan por nivel
+  de riesgo y semana de vencimiento; las atrasadas, por nivel y semanas de
+  atraso. Una cuota atrasada j semanas solo puede pagarse con atraso de j
+  semanas o más (distribución condicionada).
+- Escenarios: la tasa de impago de cada nivel cambia de un escenario a otro
+  (beta con correlación CORRELACION_IMPAGO: un mes malo afecta a muchos
+  clientes a la vez) y las cuotas de cada grupo se reparten entre semanas
+  de pago e impago con una multinomial.
+
+La simulación trabaja sobre grupos (nivel de riesgo × semana), no sobre
+cuotas, así que su costo no depende del tamaño de la cartera: filtrar es un
+bincount sobre las filas de la vista y simular, operaciones sobre arreglos
+de escenarios × grupos × semanas. Dentro de un grupo se usa el monto medio
+de sus cuotas y las cuotas Parcial cuentan por su monto total.
+"""
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.compacto import ESTADOS_CUOTA, RIESGOS
+from farmacia_creditos.mora import as_of_day
+
+
+SEMANAS_IMPAGO = 13
+MAX_SEMANAS = 52
+ESCENARIOS = 2000
+MAX_ESCENARIOS = 100_000
+SEMILLA = 42
+CORRELACION_IMPAGO = 0.05
+PESO_PREVIO = 50
+PERCENTILES = (5, 95)
+
+# Niveles de riesgo más uno para clientes sin nivel conocido (sin historia
+# propia: toma la distribución de toda la cartera)
+N_GRUPOS = len(RIESGOS) + 1
+
+# Resultados de una cuota: pagada con 0..SEMANAS_IMPAGO-1 semanas de atraso o impaga
+N_RESULTADOS = SEMANAS_IMPAGO + 1
+IMPAGO = SEMANAS_IMPAGO
+
+# Celdas de cada grupo: semana de vencimiento futura (0..MAX_SEMANAS-1) o
+# semanas de atraso (MAX_SEMANAS + 0..SEMANAS_IMPAGO-1)
+CELDAS_GRUPO = MAX_SEMANAS + SEMANAS_IMPAGO
+
+PAGADA = ESTADOS_CUOTA.index('Pagada')
+
+
+def _risk_groups(df_clientes, df_cuotas):
+    """Grupo de riesgo del cliente de cada cuota (el último si no se conoce)"""
+    riesgo = pd.Categorical(df_clientes['riesgo'], categories=RIESGOS).codes.astype(np.int64)
+    filas = pd.Index(df_clientes['id']).get_indexer(df_cuotas['id_cliente'])
+    grupos = np.full(len(df_cuotas), N_GRUPOS - 1, dtype=np.int64)
+    encontrado = filas >= 0
+    grupos[encontrado] = riesgo[filas[encontrado]]
+    grupos[grupos < 0] = N_GRUPOS - 1
+    return grupos
+
+
+def _days_since_due(fechas, corte):
+    """Días entre fecha_programada y el corte (negativos si aún no vence) y máscara de NaT"""
+    dias = fechas.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    vacia = np.isnat(dias)
+    atraso = np.zeros(len(dias), dtype=np.int64)
+    atraso[~vacia] = (np.datetime64(corte.date(), 'D') - dias[~vacia]).astype(np.int64)
+    return atraso, vacia
+
+
+def _default_rates(rng, impago, escenarios, correlacion):
+    """
+    Tasa de impago de cada grupo en cada escenario (escenarios × grupos):
+    beta con media `impago` y correlación `correlacion` entre cuotas.
+    """
+    tasas = np.tile(impago, (escenarios, 1))
+    variable = (impago > 0) & (impago < 1)
+    if correlacion > 0 and variable.any():
+        escala = (1 - correlacion) / correlacion
+        media = impago[variable]
+        tasas[:, variable] = rng.beta(media * escala, (1 - media) * escala, size=(escenarios, variable.sum()))
+    return tasas
+
+
+class CollectionSimulator:
+    """
+    Modelo de cobranza calibrado a una fecha de corte sobre df_cuotas (con
+    estado y dias_mora a esa fecha, ver AgingEngine). simulate() proyecta
+    los cobros semanales de cualquier subconjunto de filas.
+    """
+
+    def __init__(self, df_clientes, df_cuotas, corte, correlacion=CORRELACION_IMPAGO):
+        self.corte = as_of_day(corte)
+        self.correlacion = correlacion
+
+        grupos = _risk_groups(df_clientes, df_cuotas)
+        atraso, vacia = _days_since_due(df_cuotas['fecha_programada'], self.corte)
+        pagada = df_cuotas['estado'].cat.codes.to_numpy() == PAGADA
+        dias_mora = df_cuotas['dias_mora'].to_numpy()
+
+        # Calibración: cuotas con SEMANAS_IMPAGO semanas completas de historia
+        observada = ~vacia & (atraso >= 7 * SEMANAS_IMPAGO)
+        resultado = np.where(pagada, np.minimum(dias_mora // 7, IMPAGO), IMPAGO)
+        conteos = np.bincount(
+            grupos[observada] * N_RESULTADOS + resultado[observada], minlength=N_GRUPOS * N_RESULTADOS
+        ).reshape(N_GRUPOS, N_RESULTADOS)
+        cartera = conteos.sum(axis=0)
+        if cartera.sum() > 0:
+            previa = cartera / cartera.sum()
+        else:
+            # Sin historia suficiente se supone pago puntual
+            previa = np.zeros(N_RESULTADOS)
+            previa[0] = 1.0
+        self.historia = conteos
+        self.probabilidades = (conteos + PESO_PREVIO * previa) / (conteos.sum(axis=1, keepdims=True) + PESO_PREVIO)
+
+        # Celda de cada cuota abierta (-1 si está pagada, sin fecha, vence
+        # después de MAX_SEMANAS o lleva SEMANAS_IMPAGO semanas de atraso)
+        posicion = np.full(len(df_cuotas), -1, dtype=np.int64)
+        futura = ~pagada & ~vacia & (atraso <= 0) & (-atraso < 7 * MAX_SEMANAS)
+        atrasada = ~pagada & ~vacia & (atraso > 0) & (atraso < 7 * SEMANAS_IMPAGO)
+        posicion[futura] = -atraso[futura] // 7
+        posicion[atrasada] = MAX_SEMANAS + atraso[atrasada] // 7
+        self.celda = np.where(posicion >= 0, grupos * CELDAS_GRUPO + posicion, -1)
+        self.monto = df_cuotas['monto_total'].to_numpy(dtype=np.float64)
+
+    def _cells(self, filas, semanas):
+        """Cantidad y monto de las cuotas abiertas de `filas` por celda (solo celdas no vacías)"""
+        celda = self.celda if filas is None else self.celda[filas]
+        monto = self.monto if filas is None else self.monto[filas]
+        posicion = celda % CELDAS_GRUPO
+        # Las que vencen después del horizonte no aportan cobros
+        incluida = (celda >= 0) & ((posicion < semanas) | (posicion >= MAX_SEMANAS))
+        cantidad = np.bincount(celda[incluida], minlength=N_GRUPOS * CELDAS_GRUPO)
+        montos = np.bincount(celda[incluida], weights=monto[incluida], minlength=N_GRUPOS * CELDAS_GRUPO)
+        activas = np.flatnonzero(cantidad)
+        return activas, cantidad[activas], montos[activas]
+
+    def _cell_probabilities(self, rng, grupo, atraso, escenarios):
+        """Probabilidad de cada resultado por escenario y celda (escenarios × celdas × resultados)"""
+        impago = self.probabilidades[:, IMPAGO]
+        pagadores = np.divide(
+            self.probabilidades[:, :IMPAGO], (1 - impago)[:, None],
+            out=np.zeros((N_GRUPOS, IMPAGO)), where=(impago < 1)[:, None]
+        )
+        tasas = _default_rates(rng, impago, escenarios, self.correlacion)
+        por_grupo = np.concatenate([(1 - tasas)[:, :, None] * pagadores[None], tasas[:, :, None]], axis=2)
+
+        # Una cuota atrasada j semanas solo se paga con atraso >= j
+        posible = np.arange(N_RESULTADOS)[None, :] >= atraso[:, None]
+        pvals = por_grupo[:, grupo, :] * posible[None]
+        total = pvals.sum(axis=2, keepdims=True)
+        pvals = np.divide(pvals, total, out=np.zeros_like(pvals), where=total > 0)
+        pvals[..., IMPAGO] = np.where(total[..., 0] > 0, pvals[..., IMPAGO], 1.0)
+        return pvals
+
+    def simulate(self, filas=None, dias=90, escenarios=ESCENARIOS, semilla=SEMILLA):
+        """
+        Cobros de las cuotas abiertas de `filas` (posiciones en df_cuotas;
+        None = todas) en las próximas ceil(dias / 7) semanas desde el corte.
+
+        Devuelve un DataFrame por semana: periodo (inicio), programado (lo que
+        vence), esperado, p5 y p95, y los mismos valores acumulados desde el
+        corte (los percentiles del acumulado, no la suma de los semanales).
+        Vacío si no hay cuotas abiertas. Con la misma semilla el resultado es
+        el mismo. Lanza ValueError si dias o escenarios están fuera de rango.
+        """
+        if not 1 <= dias <= 7 * MAX_SEMANAS:
+            raise ValueError(f"dias debe estar entre 1 y {7 * MAX_SEMANAS}")
+        if not 1 <= escenarios <= MAX_ESCENARIOS:
+            raise ValueError(f"escenarios debe estar entre 1 y {MAX_ESCENARIOS:,}")
+        semanas = -(-dias // 7)
+
+        activas, cantidad, montos = self._cells(filas, semanas)
+        if len(activas) == 0:
+            return pd.DataFrame({
+                columna: pd.Series([], dtype='datetime64[ns]' if columna == 'periodo' else np.float64)
+                for columna in ['periodo', 'programado', 'esperado', 'p5', 'p95',
+                                'acumulado_esperado', 'acumulado_p5', 'acumulado_p95']
+            })
+
+        grupo = activas // CELDAS_GRUPO
+        posicion = activas % CELDAS_GRUPO
+        atrasada = posicion >= MAX_SEMANAS
+        atraso = np.where(atrasada, posicion - MAX_SEMANAS, 0)
+
+        rng = np.random.default_rng(semilla)
+        pvals = self._cell_probabilities(rng, grupo, atraso, escenarios)
+        cuotas = rng.multinomial(cantidad, pvals)
+
+        # Semana de cobro (desde el corte) de cada celda y resultado: la de
+        # vencimiento más el atraso, o el atraso que le falta a una atrasada
+        resultado = np.arange(N_RESULTADOS)
+        destino = np.where(atrasada, -atraso, posicion)[:, None] + resultado[None, :]
+        cobrable = (resultado[None, :] < IMPAGO) & (destino >= 0) & (destino < semanas)
+        # Matriz (celda, resultado) → semana con el monto medio de la celda:
+        # un solo producto matricial pasa de cuotas a montos por semana
+        reparto = np.zeros((len(activas) * N_RESULTADOS, semanas))
+        indices = np.flatnonzero(cobrable.ravel())
+        monto_medio = np.repeat(montos / cantidad, N_RESULTADOS)
+        reparto[indices, destino.ravel()[indices]] = monto_medio[indices]
+
+        cobros = cuotas.reshape(escenarios, -1).astype(np.float64) @ reparto
+        acumulado = np.cumsum(cobros, axis=1)
+
+        programado = np.bincount(posicion[~atrasada], weights=montos[~atrasada], minlength=semanas)[:semanas]
+        bajo, alto = np.percentile(cobros, PERCENTILES, axis=0)
+        acumulado_bajo, acumulado_alto = np.percentile(acumulado, PERCENTILES, axis=0)
+        return pd.DataFrame({
+            'periodo': self.corte + pd.to_timedelta(7 * np.arange(semanas), unit='D'),
+            'programado': programado,
+            'esperado': cobros.mean(axis=0),
+            'p5': bajo,
+            'p95': alto,
+            'acumulado_esperado': acumulado.mean(axis=0),
+            'acumulado_p5': acumulado_bajo,
+            'acumulado_p95': acumulado_alto,
+        })
@@ -0,0 +1,91 @@
+"""
+=====================================================
+CACHÉ DE FIGURAS PLOTLY COMPARTIDA
+LRU con presupuesto de memoria y contadores de aciertos
+=====================================================
+
+Una sola caché por proceso, compartida por todas las sesiones. La clave es
+(id del gráfico, versión de los datos, hash de los filtros, parámetros del
+gráfico); cuando cambia la versión de los datos las claves viejas dejan de
+consultarse y salen por LRU. El tamaño de cada figura se mide por su JSON,
+que es lo que se envía al navegador.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+MAX_BYTES_FIGURAS = 64 * 1024 * 1024
+
+
+def _figure_size(fig):
+    """Bytes del JSON de la figura (0 para None)"""
+    return 0 if fig is None else len(fig.to_json())
+
+
+class FigureCache:
+    """
+    Caché LRU de figuras con presupuesto de bytes.
+
+    get_or_build devuelve la figura guardada o la construye con construir();
+    la construcción ocurre fuera del lock. Las figuras guardadas se
+    comparten entre sesiones y no deben modificarse después de guardarlas.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES_FIGURAS):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, clave, construir):
+        with self._lock:
+            if clave in self._figuras:
+                self._figuras.move_to_end(clave)
+                self.hits += 1
+                return self._figuras[clave][0]
+            self.misses += 1
+
+        fig = construir()
+        tamano = _figure_size(fig)
+        if tamano > self.max_bytes:
+            return fig
+
+        with self._lock:
+            if clave not in self._figuras:
+                self._figuras[clave] = (fig, tamano)
+                self.bytes += tamano
+            while self.bytes > self.max_bytes:
+                _, (_, liberado) = self._figuras.popitem(last=False)
+                self.bytes -= liberado
+                self.evictions += 1
+        return fig
+
+    def size_of(self, clave):
+        """Bytes del JSON de la figura guardada con esa clave (None si no está)"""
+        with self._lock:
+            entrada = self._figuras.get(clave)
+            return None if entrada is None else entrada[1]
+
+    def invalidate(self):
+        """Vacía la caché (por ejemplo tras una recarga completa de datos)"""
+        with self._lock:
+            self._figuras.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Aciertos, fallos, desalojos, entradas y bytes ocupados"""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'aciertos': self.hits,
+                'fallos': self.misses,
+                'tasa_aciertos': self.hits / consultas if consultas else 0.0,
+                'desalojos': self.evictions,
+                'entradas': len(self._figuras),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+            }
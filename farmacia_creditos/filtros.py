@@ -0,0 +1,181 @@
+"""
+=====================================================
+ÍNDICE DE FILTROS DEL SIDEBAR
+Bitmaps por valor y fechas ordenadas con búsqueda binaria
+=====================================================
+
+El índice se construye una vez por conjunto de datos. Cada rerun de
+Streamlit solo combina bitmaps empaquetados (un bit por fila) con OR/AND y
+resuelve el rango de fecha_desembolso con np.searchsorted, en lugar de
+evaluar isin y comparaciones de fechas sobre todas las filas.
+
+Los filtros de créditos (estado y rango de desembolso) se propagan a las
+cuotas con un índice de offsets estilo CSR: las posiciones de las cuotas
+ordenadas por crédito y, por cada crédito, el inicio y fin de su tramo.
+Propagar una selección cuesta O(cuotas de los créditos elegidos), sin merge.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _value_bitmaps(serie):
+    """Bitmap empaquetado (np.packbits) de las filas de cada valor de la serie"""
+    codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+    return {
+        valor: np.packbits(codigos == codigo)
+        for codigo, valor in enumerate(valores)
+    }
+
+
+def _union(bitmaps, valores, bytes_bitmap):
+    """OR de los bitmaps de los valores elegidos (vacío si no hay ninguno)"""
+    resultado = np.zeros(bytes_bitmap, dtype=np.uint8)
+    for valor in valores:
+        if valor in bitmaps:
+            np.bitwise_or(resultado, bitmaps[valor], out=resultado)
+    return resultado
+
+
+def _credit_offsets(df_creditos, df_cuotas):
+    """
+    Índice CSR crédito → cuotas.
+
+    Devuelve (offsets, posiciones): las cuotas del crédito en la fila i de
+    df_creditos son posiciones[offsets[i]:offsets[i + 1]]. Las cuotas cuyo
+    crédito no está en df_creditos no aparecen en posiciones.
+    """
+    fila_credito = pd.Index(df_creditos['id_credito']).get_indexer(df_cuotas['id_credito'])
+    orden = np.argsort(fila_credito, kind='stable')
+    huerfanas = int(np.count_nonzero(fila_credito < 0))
+
+    cantidad = np.bincount(fila_credito[fila_credito >= 0], minlength=len(df_creditos))
+    offsets = np.zeros(len(df_creditos) + 1, dtype=np.int64)
+    np.cumsum(cantidad, out=offsets[1:])
+    return offsets, orden[huerfanas:].astype(np.int32)
+
+
+class FilteredView:
+    """
+    Vista perezosa de las filas seleccionadas de un DataFrame.
+
+    Las columnas se copian recién cuando alguien las pide y quedan en caché
+    para el resto del rerun. Si el filtro selecciona todas las filas se
+    devuelven las columnas originales sin copiar.
+    """
+
+    def __init__(self, df, filas=None):
+        self.df = df
+        self.filas = filas
+        self._columnas = {}
+
+    def __len__(self):
+        return len(self.df) if self.filas is None else len(self.filas)
+
+    def column(self, nombre):
+        """Columna filtrada (Series), materializada una sola vez"""
+        if self.filas is None:
+            return self.df[nombre]
+        if nombre not in self._columnas:
+            self._columnas[nombre] = self.df[nombre].take(self.filas).reset_index(drop=True)
+        return self._columnas[nombre]
+
+    def frame(self, columnas=None):
+        """DataFrame con las columnas pedidas (todas si columnas es None)"""
+        if self.filas is None and columnas is None:
+            return self.df
+        columnas = list(self.df.columns) if columnas is None else list(columnas)
+        return pd.DataFrame({nombre: self.column(nombre) for nombre in columnas}, copy=False)
+
+
+class FilterIndex:
+    """
+    Índice de filtros para df_creditos y df_cuotas.
+
+    Guarda bitmaps por tipo_cliente y estado (de créditos y de cuotas) y el
+    orden de fecha_desembolso, más el índice CSR crédito → cuotas. No guarda
+    los datos: cada consulta recibe el DataFrame sobre el que arma la vista.
+    """
+
+    def __init__(self, df_creditos, df_cuotas):
+        self.n_creditos = len(df_creditos)
+        self.n_cuotas = len(df_cuotas)
+
+        self.creditos_tipo = _value_bitmaps(df_creditos['tipo_cliente'])
+        self.creditos_estado = _value_bitmaps(df_creditos['estado'])
+        self.cuotas_tipo = _value_bitmaps(df_cuotas['tipo_cliente'])
+        self.cuotas_estado = _value_bitmaps(df_cuotas['estado'])
+
+        fechas = df_creditos['fecha_desembolso'].to_numpy(dtype='datetime64[ns]')
+        self.orden_fecha = np.argsort(fechas, kind='stable').astype(np.int32)
+        self.fechas_ordenadas = fechas[self.orden_fecha]
+
+        self.offsets_cuotas, self.cuotas_por_credito = _credit_offsets(df_creditos, df_cuotas)
+
+    def _date_bitmap(self, fecha_inicio, fecha_fin):
+        """Bitmap de créditos con fecha_inicio <= fecha_desembolso <= fecha_fin"""
+        inicio = np.searchsorted(self.fechas_ordenadas, np.datetime64(pd.to_datetime(fecha_inicio), 'ns'), side='left')
+        fin = np.searchsorted(self.fechas_ordenadas, np.datetime64(pd.to_datetime(fecha_fin), 'ns'), side='right')
+        if inicio == 0 and fin == self.n_creditos:
+            return None
+
+        seleccion = np.zeros(self.n_creditos, dtype=bool)
+        seleccion[self.orden_fecha[inicio:fin]] = True
+        return np.packbits(seleccion)
+
+    def _positions(self, bitmap, n):
+        """Posiciones de las filas marcadas; None si están todas (sin copia)"""
+        if int(np.bitwise_count(bitmap).sum()) == n:
+            return None
+        return np.flatnonzero(np.unpackbits(bitmap, count=n)).astype(np.int32)
+
+    def filter_creditos(self, df_creditos, tipo_cliente, estado, fecha_inicio, fecha_fin):
+        """Vista de créditos por tipo de cliente, estado y rango de desembolso"""
+        bytes_bitmap = (self.n_creditos + 7) // 8
+        bitmap = _union(self.creditos_tipo, tipo_cliente, bytes_bitmap)
+        np.bitwise_and(bitmap, _union(self.creditos_estado, estado, bytes_bitmap), out=bitmap)
+
+        fechas = self._date_bitmap(fecha_inicio, fecha_fin)
+        if fechas is not None:
+            np.bitwise_and(bitmap, fechas, out=bitmap)
+
+        return FilteredView(df_creditos, self._positions(bitmap, self.n_creditos))
+
+    def _cuotas_bitmap(self, filas_creditos):
+        """
+        Bitmap de las cuotas de los créditos elegidos (filas de df_creditos).
+        None si están todos los créditos y todas las cuotas tienen crédito.
+        """
+        if filas_creditos is None:
+            if len(self.cuotas_por_credito) == self.n_cuotas:
+                return None
+            filas_creditos = np.arange(self.n_creditos)
+
+        # Tramos [inicio, fin) de cada crédito concatenados sin bucles
+        inicio = self.offsets_cuotas[filas_creditos]
+        largo = self.offsets_cuotas[filas_creditos + 1] - inicio
+        total = int(largo.sum())
+        salto = np.repeat(inicio - (np.cumsum(largo) - largo), largo)
+        posiciones = self.cuotas_por_credito[salto + np.arange(total)]
+
+        seleccion = np.zeros(self.n_cuotas, dtype=bool)
+        seleccion[posiciones] = True
+        return np.packbits(seleccion)
+
+    def filter_cuotas(self, df_cuotas, tipo_cliente, estado, creditos=None):
+        """
+        Vista de cuotas por tipo de cliente y estado de cuota.
+
+        creditos es la vista devuelta por filter_creditos: si se pasa, solo
+        quedan las cuotas de esos créditos (estado del crédito y fechas).
+        """
+        bytes_bitmap = (self.n_cuotas + 7) // 8
+        bitmap = _union(self.cuotas_tipo, tipo_cliente, bytes_bitmap)
+        np.bitwise_and(bitmap, _union(self.cuotas_estado, estado, bytes_bitmap), out=bitmap)
+
+        if creditos is not None:
+            de_creditos = self._cuotas_bitmap(creditos.filas)
+            if de_creditos is not None:
+                np.bitwise_and(bitmap, de_creditos, out=bitmap)
+
+        return FilteredView(df_cuotas, self._positions(bitmap, self.n_cuotas))
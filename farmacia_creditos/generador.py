@@ -0,0 +1,223 @@
+"""
+=====================================================
+GENERADOR DE CARTERAS SINTÉTICAS A GRAN ESCALA
+Escribe Clientes, Créditos y Cuotas en Parquet por bloques
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.generador --clientes 100000 \\
+        --creditos 1000000 --dias 730 --seed 42 --salida datos_cartera
+
+Estructura de salida (particionada por mes de desembolso):
+    datos_cartera/clientes/parte-00000.parquet
+    datos_cartera/creditos/mes_desembolso=2025-01/parte-00000-0.parquet
+    datos_cartera/cuotas/mes_desembolso=2025-01/parte-00000-0.parquet
+"""
+
+import argparse
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.datos import build_cuotas_schedule
+
+
+PLAZOS_MESES = np.array([3, 6, 12, 18, 24])
+ESTADOS_CREDITO = np.array(['Activo', 'Cancelado', 'Moroso'], dtype=object)
+PROB_ESTADOS_CREDITO = [0.6, 0.25, 0.15]
+RIESGOS = np.array(['Bajo', 'Medio', 'Alto'], dtype=object)
+PROB_RIESGOS = [0.6, 0.3, 0.1]
+
+COLUMNA_PARTICION = 'mes_desembolso'
+
+TABLAS = ('clientes', 'creditos', 'cuotas')
+
+
+def generate_clientes(id_inicial, cantidad, rng):
+    """Genera un bloque de clientes con el mismo esquema que df_clientes"""
+
+    ids = np.arange(id_inicial, id_inicial + cantidad, dtype=np.int64)
+    juridico = rng.random(cantidad) < 0.5
+    sufijo = pd.Series(ids).astype(str).str.zfill(7)
+
+    nombre = np.where(juridico, ('Empresa ' + sufijo + ' S.A.').to_numpy(), ('Cliente ' + sufijo).to_numpy())
+
+    return pd.DataFrame({
+        'id': ids,
+        'nombre': nombre,
+        'tipo': np.where(juridico, 'Jurídico', 'Natural').astype(object),
+        'nit': np.where(juridico, ('9' + sufijo).to_numpy(), ('1' + sufijo).to_numpy()),
+        'telefono': ('555-' + sufijo.str[-4:]).to_numpy(),
+        'riesgo': rng.choice(RIESGOS, size=cantidad, p=PROB_RIESGOS),
+        'razon_social': np.where(juridico, ('Empresa ' + sufijo + ' Sociedad Anónima').to_numpy(), None)
+    })
+
+
+def generate_creditos(id_inicial, cantidad, df_clientes, start_date, dias, rng):
+    """Genera un bloque de créditos sobre clientes elegidos al azar"""
+
+    fila_cliente = rng.integers(0, len(df_clientes), cantidad)
+    fecha_inicio = np.datetime64(pd.Timestamp(start_date).to_datetime64(), 'ns')
+
+    return pd.DataFrame({
+        'id_credito': np.arange(id_inicial, id_inicial + cantidad, dtype=np.int64),
+        'id_cliente': df_clientes['id'].to_numpy()[fila_cliente],
+        'nombre_cliente': df_clientes['nombre'].to_numpy()[fila_cliente],
+        'tipo_cliente': df_clientes['tipo'].to_numpy()[fila_cliente],
+        'monto_capital': rng.uniform(500, 15000, cantidad),
+        'tasa_interes': rng.uniform(5, 18, cantidad),
+        'fecha_desembolso': fecha_inicio + rng.integers(0, dias, cantidad) * np.timedelta64(1, 'D'),
+        'plazo_meses': rng.choice(PLAZOS_MESES, size=cantidad),
+        'estado': rng.choice(ESTADOS_CREDITO, size=cantidad, p=PROB_ESTADOS_CREDITO)
+    })
+
+
+def iter_clientes_chunks(n_clientes, seed=42, chunk_size=100_000):
+    """Genera los clientes por bloques; cada bloque tiene su propia semilla derivada"""
+    for parte, id_inicial in enumerate(range(1, n_clientes + 1, chunk_size)):
+        cantidad = min(chunk_size, n_clientes - id_inicial + 1)
+        yield generate_clientes(id_inicial, cantidad, np.random.default_rng([seed, parte]))
+
+
+def iter_portfolio_chunks(n_clientes, n_creditos, dias=365, seed=42, chunk_size=100_000, today=None):
+    """
+    Genera la cartera por bloques de como máximo chunk_size créditos.
+
+    Devuelve un iterador de (df_creditos, df_cuotas); solo un bloque vive
+    en memoria a la vez. De los clientes se conservan id, nombre y tipo
+    porque los créditos los desnormalizan igual que generate_sample_data.
+    """
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    start_date = today - timedelta(days=dias)
+
+    df_clientes = pd.concat(
+        [bloque[['id', 'nombre', 'tipo']] for bloque in iter_clientes_chunks(n_clientes, seed, chunk_size)],
+        ignore_index=True
+    )
+
+    id_cuota = 1
+    for id_inicial in range(1, n_creditos + 1, chunk_size):
+        cantidad = min(chunk_size, n_creditos - id_inicial + 1)
+        df_creditos = generate_creditos(id_inicial, cantidad, df_clientes, start_date, dias, rng)
+        df_cuotas = build_cuotas_schedule(df_creditos, today=today, rng=rng, id_cuota_inicial=id_cuota)
+        id_cuota += len(df_cuotas)
+
+        yield df_creditos, df_cuotas
+
+
+def _write_partitioned(df, ruta, parte):
+    """
+    Escribe un bloque como dataset Parquet particionado por mes de
+    desembolso. Los bloques de una misma corrida comparten particiones, así
+    que los archivos existentes se conservan: write_portfolio_parquet vacía
+    las carpetas antes del primer bloque.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(
+        tabla,
+        root_path=ruta,
+        partition_cols=[COLUMNA_PARTICION],
+        basename_template=f'parte-{parte:05d}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+
+def write_portfolio_parquet(salida, n_clientes, n_creditos, dias=365, seed=42,
+                            chunk_size=100_000, today=None, verbose=False):
+    """
+    Escribe una cartera sintética completa en salida/ con memoria acotada.
+
+    Las carpetas clientes/, creditos/ y cuotas/ de salida se borran antes de
+    escribir: las particiones dependen de today y mezclar dos corridas
+    duplicaría ids. Devuelve un dict con el número de filas escritas por tabla.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    today = pd.Timestamp(today or datetime.now()).normalize()
+
+    for tabla in TABLAS:
+        shutil.rmtree(os.path.join(salida, tabla), ignore_errors=True)
+
+    # Clientes: se escriben por bloques sin particionar
+    os.makedirs(os.path.join(salida, 'clientes'), exist_ok=True)
+    for parte, bloque in enumerate(iter_clientes_chunks(n_clientes, seed, chunk_size)):
+        pq.write_table(
+            pa.Table.from_pandas(bloque, preserve_index=False),
+            os.path.join(salida, 'clientes', f'parte-{parte:05d}.parquet')
+        )
+
+    totales = {'clientes': n_clientes, 'creditos': 0, 'cuotas': 0}
+    bloques = iter_portfolio_chunks(n_clientes, n_creditos, dias=dias, seed=seed,
+                                    chunk_size=chunk_size, today=today)
+
+    for parte, (df_creditos, df_cuotas) in enumerate(bloques):
+        inicio = time.perf_counter()
+        mes = df_creditos['fecha_desembolso'].dt.strftime('%Y-%m')
+        df_cuotas[COLUMNA_PARTICION] = mes.to_numpy()[
+            np.repeat(np.arange(len(df_creditos)), df_creditos['plazo_meses'].to_numpy())
+        ]
+        df_creditos[COLUMNA_PARTICION] = mes
+
+        _write_partitioned(df_creditos, os.path.join(salida, 'creditos'), parte)
+        _write_partitioned(df_cuotas, os.path.join(salida, 'cuotas'), parte)
+
+        totales['creditos'] += len(df_creditos)
+        totales['cuotas'] += len(df_cuotas)
+        if verbose:
+            print(f"[OK] Bloque {parte}: {len(df_creditos):,} créditos, "
+                  f"{len(df_cuotas):,} cuotas ({time.perf_counter() - inicio:.1f}s)")
+
+    return totales
+
+
+def read_portfolio_parquet(ruta, meses=None):
+    """
+    Lee una cartera escrita por write_portfolio_parquet.
+
+    meses permite cargar solo algunas particiones ('2025-01', ...).
+    Devuelve (df_clientes, df_creditos, df_cuotas) como generate_sample_data.
+    """
+    filtros = [(COLUMNA_PARTICION, 'in', list(meses))] if meses else None
+
+    df_clientes = pd.read_parquet(os.path.join(ruta, 'clientes'))
+    df_creditos = pd.read_parquet(os.path.join(ruta, 'creditos'), filters=filtros)
+    df_cuotas = pd.read_parquet(os.path.join(ruta, 'cuotas'), filters=filtros)
+
+    df_creditos = df_creditos.drop(columns=COLUMNA_PARTICION).sort_values('id_credito', ignore_index=True)
+    df_cuotas = df_cuotas.drop(columns=COLUMNA_PARTICION).sort_values('id_cuota', ignore_index=True)
+
+    return df_clientes, df_creditos, df_cuotas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera una cartera sintética de créditos en Parquet')
+    parser.add_argument('--clientes', type=int, default=100_000, help='Número de clientes')
+    parser.add_argument('--creditos', type=int, default=1_000_000, help='Número de créditos')
+    parser.add_argument('--dias', type=int, default=365, help='Días hacia atrás para las fechas de desembolso')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla aleatoria')
+    parser.add_argument('--chunk', type=int, default=100_000, help='Créditos por bloque')
+    parser.add_argument('--salida', default='datos_cartera', help='Carpeta de salida')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    totales = write_portfolio_parquet(
+        args.salida, args.clientes, args.creditos, dias=args.dias, seed=args.seed,
+        chunk_size=args.chunk, verbose=True
+    )
+
+    print(f"\n[SUCCESS] {totales['clientes']:,} clientes, {totales['creditos']:,} créditos, "
+          f"{totales['cuotas']:,} cuotas en {time.perf_counter() - inicio:.1f}s")
+    print(f"Revisa la carpeta '{args.salida}/'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+=====================================================
+CAPA DE RENDERIZADO DE SERIES DE TIEMPO
+Reducción en el servidor y trazas WebGL
+=====================================================
+
+Las series se reducen antes de llegar al navegador, así el tamaño del
+gráfico no depende de la cantidad de datos ni del rango elegido:
+
+- Líneas/áreas: Largest-Triangle-Three-Buckets (LTTB) hasta MAX_PUNTOS,
+  que conserva picos y valles. Sobre UMBRAL_WEBGL puntos se usa Scattergl.
+- Barras: las barras consecutivas se suman hasta quedar en MAX_BARRAS.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+
+MAX_PUNTOS = 1500
+UMBRAL_WEBGL = 1000
+MAX_BARRAS = 120
+
+
+def _as_float(valores):
+    """Valores numéricos o fechas como float64 (las fechas en nanosegundos)"""
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        return valores.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return valores.astype(np.float64)
+
+
+def lttb_indices(x, y, n_puntos):
+    """
+    Posiciones de los n_puntos que elige LTTB (siempre el primero y el último).
+
+    Los puntos interiores se reparten en n_puntos - 2 grupos; de cada grupo
+    se toma el que forma el triángulo de mayor área con el punto elegido en
+    el grupo anterior y el promedio del grupo siguiente.
+    """
+    n = len(x)
+    if n_puntos >= n or n_puntos < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    bordes = np.linspace(1, n - 1, n_puntos - 1).astype(np.int64)
+
+    elegidos = np.empty(n_puntos, dtype=np.int64)
+    elegidos[0] = 0
+    elegidos[-1] = n - 1
+    anterior = 0
+    for grupo in range(n_puntos - 2):
+        inicio, fin = bordes[grupo], bordes[grupo + 1]
+        siguiente_fin = bordes[grupo + 2] if grupo + 2 < len(bordes) else n
+        x_medio = x[fin:siguiente_fin].mean()
+        y_medio = y[fin:siguiente_fin].mean()
+
+        area = np.abs(
+            (x[anterior] - x_medio) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (y_medio - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(area))
+        elegidos[grupo + 1] = anterior
+    return elegidos
+
+
+def time_series_trace(x, y, max_puntos=MAX_PUNTOS, umbral_webgl=UMBRAL_WEBGL, **estilo):
+    """
+    Traza de línea/área con a lo sumo max_puntos puntos (LTTB); Scattergl
+    si quedan más de umbral_webgl puntos.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    posiciones = lttb_indices(x, y, max_puntos)
+    x, y = x[posiciones], y[posiciones]
+
+    clase = go.Scattergl if len(x) > umbral_webgl else go.Scatter
+    return clase(x=x, y=y, **estilo)
+
+
+def bar_bins(x, y, max_barras=MAX_BARRAS):
+    """
+    Suma barras consecutivas hasta quedar en max_barras como máximo; cada
+    barra resultante toma la x de la primera que agrupa.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= max_barras:
+        return x, y
+
+    ancho = -(-len(x) // max_barras)
+    grupo = np.arange(len(x)) // ancho
+    return x[::ancho], np.bincount(grupo, weights=y)
+
+
+def bar_trace(x, y, max_barras=MAX_BARRAS, **estilo):
+    """Traza de barras con a lo sumo max_barras barras"""
+    x, y = bar_bins(x, y, max_barras)
+    return go.Bar(x=x, y=y, **estilo)
@@ -0,0 +1,157 @@
+"""
+=====================================================
+INSTRUMENTACIÓN DE LOS RERUNS DEL DASHBOARD
+Tiempos por sección, perfil cProfile y exportación JSONL
+=====================================================
+
+Cada rerun (o rerun de un fragmento) tiene un RerunTimer; cada sección del
+script se mide con `with temporizador.section('nombre') as seccion:` y
+puede anotar datos propios (seccion['filas'] = ...). Al terminar, el
+registro se escribe como una línea JSON con JsonlExporter, así se pueden
+juntar los reruns de todos los usuarios y calcular percentiles:
+
+    python -m farmacia_creditos.instrumentacion tiempos.jsonl
+
+Pandas se importa solo al armar tablas: el temporizador se crea antes de
+las importaciones pesadas del dashboard y mide también su costo.
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class RerunTimer:
+    """
+    Tiempos de las secciones de un rerun. Con perfilar=True se captura un
+    perfil cProfile del hilo del rerun hasta finish().
+    """
+
+    def __init__(self, tipo='rerun', sesion=None, perfilar=False):
+        self.tipo = tipo
+        self.sesion = sesion
+        self.secciones = []
+        self.datos = {}
+        self.terminado = False
+        self.total_ms = None
+        self.inicio = time.perf_counter()
+        self.fecha = datetime.now()
+        self.perfil = None
+        if perfilar:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+                self.perfil = perfil
+            except ValueError:
+                # Python 3.12+: solo un perfil activo por proceso (otra sesión perfilando)
+                pass
+
+    @contextmanager
+    def section(self, nombre, **datos):
+        """Mide el bloque; el dict entregado acepta datos adicionales (filas, bytes, ...)"""
+        seccion = {'nombre': nombre, **datos}
+        inicio = time.perf_counter()
+        try:
+            yield seccion
+        finally:
+            seccion['ms'] = (time.perf_counter() - inicio) * 1000
+            self.secciones.append(seccion)
+
+    def elapsed_ms(self):
+        """Milisegundos desde el inicio del rerun"""
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def finish(self):
+        """Cierra el rerun (y el perfil) y devuelve su registro"""
+        if not self.terminado:
+            self.total_ms = self.elapsed_ms()
+            if self.perfil is not None:
+                self.perfil.disable()
+            self.terminado = True
+        return self.record()
+
+    def record(self):
+        """Registro serializable: fecha, sesión, tipo, total y secciones"""
+        return {
+            'fecha': self.fecha.isoformat(timespec='milliseconds'),
+            'sesion': self.sesion,
+            'tipo': self.tipo,
+            **self.datos,
+            'total_ms': self.total_ms if self.total_ms is not None else self.elapsed_ms(),
+            'secciones': self.secciones,
+        }
+
+    def frame(self):
+        """Secciones como DataFrame (nombre, ms y datos anotados)"""
+        import pandas as pd
+
+        return pd.DataFrame(self.secciones)
+
+    def profile_text(self, lineas=30, orden='cumulative'):
+        """Las `lineas` funciones más costosas del perfil (texto de pstats)"""
+        if self.perfil is None:
+            return ''
+        salida = io.StringIO()
+        pstats.Stats(self.perfil, stream=salida).sort_stats(orden).print_stats(lineas)
+        return salida.getvalue()
+
+
+class JsonlExporter:
+    """Agrega registros como líneas JSON a un archivo; seguro entre hilos"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def write(self, registro):
+        linea = json.dumps(registro, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.ruta, 'a', encoding='utf-8') as archivo:
+                archivo.write(linea + '\n')
+
+
+def read_jsonl(ruta):
+    """Una fila por sección de cada registro del archivo JSONL"""
+    import pandas as pd
+
+    filas = []
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            if not linea.strip():
+                continue
+            registro = json.loads(linea)
+            filas.append({'tipo': registro['tipo'], 'nombre': 'total', 'ms': registro['total_ms']})
+            for seccion in registro['secciones']:
+                filas.append({'tipo': registro['tipo'], **seccion})
+    return pd.DataFrame(filas)
+
+
+def summarize_timings(df):
+    """Cantidad, p50, p95 y máximo en ms por tipo de rerun y sección"""
+    resumen = df.groupby(['tipo', 'nombre'])['ms'].describe(percentiles=[0.5, 0.95])
+    resumen = resumen[['count', '50%', '95%', 'max']].reset_index()
+    resumen.columns = ['tipo', 'seccion', 'cantidad', 'p50_ms', 'p95_ms', 'max_ms']
+    resumen['cantidad'] = resumen['cantidad'].astype(int)
+    return resumen.sort_values(['tipo', 'p95_ms'], ascending=[True, False], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Percentiles de los tiempos exportados por el dashboard')
+    parser.add_argument('archivos', nargs='+', help='Archivos JSONL (FARMACIA_TIEMPOS_JSONL)')
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    df = pd.concat([read_jsonl(ruta) for ruta in args.archivos], ignore_index=True)
+    with pd.option_context('display.max_rows', None, 'display.width', 120):
+        print(summarize_timings(df).to_string(index=False, float_format=lambda valor: f'{valor:,.1f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+=====================================================
+MOTOR DE KPIs
+Tarjetas del encabezado y métricas de la pestaña Detalle de Cuotas
+=====================================================
+
+Todas las métricas salen de una sola pasada agrupada por estado de cuota
+(np.bincount sobre los códigos de la categoría) y de una única máscara de
+cuotas vencidas. filter_key normaliza la selección del sidebar para
+memoizar los resultados.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def filter_key(tipo_cliente, estado_credito, estado_cuota, fecha_inicio, fecha_fin):
+    """Hash estable de la selección de filtros (independiente del orden elegido)"""
+    seleccion = {
+        'tipo_cliente': sorted(tipo_cliente),
+        'estado_credito': sorted(estado_credito),
+        'estado_cuota': sorted(estado_cuota),
+        'fecha_inicio': pd.Timestamp(fecha_inicio).isoformat(),
+        'fecha_fin': pd.Timestamp(fecha_fin).isoformat(),
+    }
+    return hashlib.sha1(json.dumps(seleccion, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _codes(serie):
+    """Códigos enteros y valores de una columna categórica u object"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), list(serie.cat.categories)
+    codigos, valores = pd.factorize(serie)
+    return codigos, list(valores)
+
+
+def compute_kpis(vista_creditos, vista_cuotas):
+    """
+    Calcula los KPIs del encabezado y de la pestaña 4.
+
+    Recibe las vistas filtradas (FilteredView) y solo materializa las
+    columnas monto_capital, estado, monto_total, dias_mora y nombre_cliente.
+    """
+    total_creditos = float(vista_creditos.column('monto_capital').sum())
+
+    codigos, estados = _codes(vista_cuotas.column('estado'))
+    monto_total = vista_cuotas.column('monto_total').to_numpy(dtype=np.float64)
+
+    # Pasada agrupada: cantidad y monto por estado de cuota
+    validos = codigos >= 0
+    cantidad = np.bincount(codigos[validos], minlength=len(estados))
+    monto = np.bincount(codigos[validos], weights=monto_total[validos], minlength=len(estados))
+    por_estado = {
+        estado: (int(cantidad[i]), float(monto[i]))
+        for i, estado in enumerate(estados)
+    }
+
+    cuotas_vencidas, deuda_impaga = por_estado.get('Vencida', (0, 0.0))
+    _, por_cobrar = por_estado.get('Pendiente', (0, 0.0))
+
+    # Métricas de mora sobre la misma máscara de vencidas
+    if cuotas_vencidas > 0:
+        vencida = codigos == estados.index('Vencida')
+        dias_mora = vista_cuotas.column('dias_mora').to_numpy()[vencida]
+        promedio_mora = float(dias_mora.mean())
+        max_mora = float(dias_mora.max())
+        clientes, _ = _codes(vista_cuotas.column('nombre_cliente'))
+        clientes_morosos = int(np.count_nonzero(np.bincount(clientes[vencida][clientes[vencida] >= 0])))
+    else:
+        promedio_mora = float('nan')
+        max_mora = float('nan')
+        clientes_morosos = 0
+
+    return {
+        'total_creditos': total_creditos,
+        'deuda_impaga': deuda_impaga,
+        'cuotas_vencidas': cuotas_vencidas,
+        'por_cobrar': por_cobrar,
+        'tasa_morosidad': (deuda_impaga / total_creditos * 100) if total_creditos > 0 else 0,
+        'promedio_mora': promedio_mora,
+        'max_mora': max_mora,
+        'clientes_morosos': clientes_morosos,
+    }
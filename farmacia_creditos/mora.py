@@ -0,0 +1,135 @@
+"""
+=====================================================
+MOTOR DE ANTIGÜEDAD A UNA FECHA DE CORTE
+Estado, días de mora y rango de mora calculados al consultar
+=====================================================
+
+El estado y los dias_mora guardados quedan fijos al generar o cargar los
+datos. Aquí se recalculan para cualquier fecha de corte (as_of) a partir de
+fecha_programada y fecha_pago, con las mismas reglas que la columna
+calculada dias_mora y sp_ActualizarCuotasVencidas de
+farmacia_creditos_database.sql:
+
+- Pagada: fecha_pago anterior o igual al día de corte; mora = días entre
+  fecha_programada y fecha_pago (0 si se pagó antes).
+- Vencida: sin pagar y fecha_programada anterior al día de corte; mora =
+  días entre fecha_programada y el día de corte (DATEDIFF(DAY, ...)).
+- Parcial se conserva mientras no haya pago total; el resto queda Pendiente.
+
+Los resultados se memorizan por día de corte, así que la misma cartera puede
+verse "como estaba" en cualquier fecha pasada.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.compacto import ESTADOS_CUOTA
+
+
+RANGOS_MORA = [0, 30, 60, 90, 180, 999]
+ETIQUETAS_MORA = ['0-30 días', '31-60 días', '61-90 días', '91-180 días', '>180 días']
+
+PENDIENTE, PAGADA, VENCIDA, PARCIAL = (ESTADOS_CUOTA.index(estado) for estado in
+                                       ('Pendiente', 'Pagada', 'Vencida', 'Parcial'))
+
+# Día (desde 1970-01-01) de las fechas vacías: nunca vence ni se paga
+SIN_FECHA = np.iinfo(np.int64).max
+
+
+def aging_bucket(dias_mora):
+    """Rango de antigüedad de la deuda (mismos cortes que el dashboard)"""
+    return pd.cut(dias_mora, bins=RANGOS_MORA, labels=ETIQUETAS_MORA)
+
+
+def _aging_codes(dias_mora):
+    """Código del rango de mora de cada cuota, equivalente a pd.cut (-1 fuera de rango)"""
+    codigos = np.searchsorted(RANGOS_MORA, dias_mora, side='left') - 1
+    codigos[(dias_mora <= RANGOS_MORA[0]) | (dias_mora > RANGOS_MORA[-1])] = -1
+    return codigos
+
+
+def _day_numbers(fechas):
+    """Días enteros desde 1970-01-01 (SIN_FECHA para NaT)"""
+    dias = fechas.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    numeros = dias.astype(np.int64)
+    numeros[np.isnat(dias)] = SIN_FECHA
+    return numeros
+
+
+def as_of_day(as_of=None):
+    """Normaliza la fecha de corte al día (hoy si es None)"""
+    return pd.Timestamp(as_of if as_of is not None else pd.Timestamp.now()).normalize()
+
+
+class AgingEngine:
+    """
+    Recalcula estado, dias_mora y rango_mora de df_cuotas a una fecha de corte.
+
+    Las fechas se convierten una sola vez a números de día; cada consulta es
+    un puñado de comparaciones vectorizadas. Se guardan los resultados de los
+    últimos max_dias días de corte consultados.
+    """
+
+    def __init__(self, df_cuotas, max_dias=8):
+        self.df = df_cuotas
+        self.max_dias = max_dias
+        self.programada = _day_numbers(df_cuotas['fecha_programada'])
+        self.pago = _day_numbers(df_cuotas['fecha_pago'])
+
+        estado = df_cuotas['estado']
+        self.parcial = (estado == 'Parcial').to_numpy()
+        # Cuotas registradas como pagadas sin fecha de pago: se consideran
+        # pagadas en cualquier fecha de corte
+        self.pagada_sin_fecha = ((estado == 'Pagada') & df_cuotas['fecha_pago'].isna()).to_numpy()
+
+        self._resultados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _compute(self, dia):
+        corte = int(dia.to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+        pagada = (self.pago <= corte) | self.pagada_sin_fecha
+        vencida = ~pagada & ~self.parcial & (self.programada < corte)
+
+        codigos = np.full(len(self.df), PENDIENTE, dtype=np.int8)
+        codigos[self.parcial & ~pagada] = PARCIAL
+        codigos[vencida] = VENCIDA
+        codigos[pagada] = PAGADA
+
+        dias_mora = np.zeros(len(self.df), dtype=np.int32)
+        dias_mora[vencida] = corte - self.programada[vencida]
+        con_fecha = pagada & ~self.pagada_sin_fecha
+        dias_mora[con_fecha] = np.maximum(self.pago[con_fecha] - self.programada[con_fecha], 0)
+        # Pagadas sin fecha: se conserva la mora registrada
+        dias_mora[self.pagada_sin_fecha] = self.df['dias_mora'].to_numpy()[self.pagada_sin_fecha]
+
+        return (
+            pd.Categorical.from_codes(codigos, ESTADOS_CUOTA),
+            dias_mora,
+            pd.Categorical.from_codes(_aging_codes(dias_mora), ETIQUETAS_MORA, ordered=True),
+        )
+
+    def at(self, as_of=None):
+        """
+        df_cuotas a la fecha de corte: mismas columnas (estado y dias_mora
+        recalculados) más rango_mora. Las demás columnas no se copian.
+        """
+        dia = as_of_day(as_of)
+        with self._lock:
+            if dia in self._resultados:
+                self._resultados.move_to_end(dia)
+                estado, dias_mora, rango_mora = self._resultados[dia]
+            else:
+                estado, dias_mora, rango_mora = self._compute(dia)
+                self._resultados[dia] = (estado, dias_mora, rango_mora)
+                if len(self._resultados) > self.max_dias:
+                    self._resultados.popitem(last=False)
+
+        columnas = {nombre: self.df[nombre] for nombre in self.df.columns}
+        columnas['estado'] = pd.Series(estado, index=self.df.index)
+        columnas['dias_mora'] = pd.Series(dias_mora, index=self.df.index)
+        columnas['rango_mora'] = pd.Series(rango_mora, index=self.df.index)
+        return pd.DataFrame(columnas, copy=False)
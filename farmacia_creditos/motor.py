@@ -0,0 +1,353 @@
+"""
+=====================================================
+MOTOR DE ANALÍTICA DE LA CARTERA
+Filtros, KPIs, agregaciones, mora y proyecciones sin Streamlit
+=====================================================
+
+Reúne lo que antes hacía el script del dashboard: elegir la fuente de
+datos, guardar la instantánea en el DataStore, recalcular la mora a la
+fecha de corte, filtrar con el FilterIndex, consultar el cubo, calcular
+los KPIs y simular los escenarios de cobranza. Lo usan el dashboard y la
+API JSON (farmacia_creditos.api), que solo dan formato a los resultados.
+
+update_overdue corre el vencimiento incremental de cuotas sobre la base y
+las instantáneas, para quien embebe el motor. Ni el dashboard ni la API lo
+llaman: la tarea programada es python -m farmacia_creditos.vencimientos, y
+sus cambios llegan a los frames del dashboard con el refresco incremental
+(FARMACIA_DB_INCREMENTAL=1) o con la próxima recarga de la base.
+
+Los filtros son un dict con las claves de default_filters();
+normalize_filters completa los que falten. Todo es de solo lectura sobre
+la instantánea, así que una misma instancia atiende consultas concurrentes.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+
+from farmacia_creditos.almacen import DataStore
+from farmacia_creditos.base_datos import connect, load_dashboard_data
+from farmacia_creditos.compacto import compact_frames
+from farmacia_creditos.cubo import PortfolioCube
+from farmacia_creditos.escenarios import ESCENARIOS, SEMILLA, CollectionSimulator
+from farmacia_creditos.filtros import FilterIndex
+from farmacia_creditos.generador import read_portfolio_parquet
+from farmacia_creditos.kpis import compute_kpis, filter_key
+from farmacia_creditos.mora import AgingEngine, as_of_day
+from farmacia_creditos.muestra import generate_sample_data
+from farmacia_creditos.paginacion import PagedRows, sort_order
+from farmacia_creditos.refresco import IncrementalLoader
+from farmacia_creditos.vencimientos import USUARIO, OverdueJob, apply_overdue, due_date_order
+
+
+TIPOS_CLIENTE = ['Natural', 'Jurídico']
+ESTADOS_CREDITO = ['Activo', 'Cancelado', 'Moroso']
+ESTADOS_CUOTA_FILTRO = ['Pendiente', 'Pagada', 'Vencida']
+
+DIAS_PERIODO = 180
+DIAS_PROYECCION = 90
+MAX_KPIS = 256
+
+COLUMNAS_VENCIDAS = ['nombre_cliente', 'tipo_cliente', 'numero_cuota', 'monto_total', 'fecha_programada', 'dias_mora']
+
+
+def default_filters(hoy=None):
+    """Selección inicial del sidebar: últimos DIAS_PERIODO días, corte hoy"""
+    hoy = as_of_day(hoy)
+    return {
+        'tipo_cliente': list(TIPOS_CLIENTE),
+        'estado_credito': ['Activo', 'Moroso'],
+        'estado_cuota': list(ESTADOS_CUOTA_FILTRO),
+        'fecha_inicio': hoy - timedelta(days=DIAS_PERIODO),
+        'fecha_fin': hoy,
+        'fecha_corte': hoy,
+    }
+
+
+def normalize_filters(filtros=None):
+    """
+    Completa los filtros que falten con los valores por defecto; las listas
+    quedan como listas y las fechas como Timestamp al día. Lanza ValueError
+    ante claves desconocidas o fechas inválidas.
+    """
+    normalizados = default_filters()
+    desconocidas = set(filtros or {}) - set(normalizados)
+    if desconocidas:
+        raise ValueError(f"Filtros desconocidos: {', '.join(sorted(desconocidas))}")
+
+    for clave, valor in (filtros or {}).items():
+        if valor is None:
+            continue
+        if clave.startswith('fecha'):
+            normalizados[clave] = as_of_day(valor)
+        else:
+            normalizados[clave] = [valor] if isinstance(valor, str) else list(valor)
+    return normalizados
+
+
+# Datos de cada gráfico a partir del cubo y los filtros; opciones propias
+# de cada uno (frecuencia, n) con los valores que usa el dashboard
+GRAFICOS = {
+    'estado_cuotas': lambda cubo, f: cubo.estado_cuotas(
+        f['tipo_cliente'], f['estado_credito'], f['estado_cuota'], f['fecha_inicio'], f['fecha_fin']),
+    'creditos_por_tipo': lambda cubo, f: cubo.creditos_por_tipo(
+        f['tipo_cliente'], f['estado_credito'], f['fecha_inicio'], f['fecha_fin']),
+    'evolucion_creditos': lambda cubo, f, frecuencia='M': cubo.evolucion_creditos(
+        f['tipo_cliente'], f['estado_credito'], f['fecha_inicio'], f['fecha_fin'], frecuencia=frecuencia),
+    'top_morosos': lambda cubo, f, n=10: cubo.top_morosos(
+        f['tipo_cliente'], f['estado_credito'], f['estado_cuota'], f['fecha_inicio'], f['fecha_fin'], n=n),
+    'antiguedad': lambda cubo, f: cubo.antiguedad(
+        f['tipo_cliente'], f['estado_credito'], f['estado_cuota'], f['fecha_inicio'], f['fecha_fin']),
+    'top_clientes_activos': lambda cubo, f, n=10: cubo.top_clientes_activos(
+        f['tipo_cliente'], f['estado_credito'], f['fecha_inicio'], f['fecha_fin'], n=n),
+    'estado_creditos': lambda cubo, f: cubo.estado_creditos(
+        f['tipo_cliente'], f['estado_credito'], f['fecha_inicio'], f['fecha_fin']),
+}
+
+
+class PortfolioView:
+    """
+    Una selección de filtros aplicada a una versión de los datos.
+
+    df_cuotas tiene estado y mora a la fecha de corte; creditos y cuotas son
+    las vistas filtradas (FilteredView). El cubo se construye recién cuando
+    se pide un gráfico y se guarda en la instantánea.
+    """
+
+    def __init__(self, datos, filtros):
+        self.datos = datos
+        self.filtros = filtros
+        corte = filtros['fecha_corte']
+
+        self.df_clientes, self.df_creditos, df_cuotas = datos.frames
+        self.df_cuotas = datos.derived('mora', lambda: AgingEngine(df_cuotas)).at(corte)
+        self.version = (datos.version, corte)
+
+        # Las vistas combinan bitmaps precalculados; recién al pedir una
+        # columna se copian las filas seleccionadas
+        indice = datos.derived(('indice', corte), lambda: FilterIndex(self.df_creditos, self.df_cuotas))
+        self.creditos = indice.filter_creditos(
+            self.df_creditos, filtros['tipo_cliente'], filtros['estado_credito'],
+            filtros['fecha_inicio'], filtros['fecha_fin']
+        )
+        # Solo las cuotas de los créditos filtrados (índice crédito → cuotas)
+        self.cuotas = indice.filter_cuotas(self.df_cuotas, filtros['tipo_cliente'], filtros['estado_cuota'], self.creditos)
+
+        self.clave_filtros = filter_key(
+            filtros['tipo_cliente'], filtros['estado_credito'], filtros['estado_cuota'],
+            filtros['fecha_inicio'], filtros['fecha_fin']
+        )
+
+    @property
+    def clave(self):
+        """Versión de datos (con fecha de corte) y hash de los filtros"""
+        return (self.version, self.clave_filtros)
+
+    @property
+    def cubo(self):
+        corte = self.filtros['fecha_corte']
+        return self.datos.derived(('cubo', corte), lambda: PortfolioCube(self.df_creditos, self.df_cuotas))
+
+    def chart(self, nombre, **opciones):
+        """DataFrame del gráfico `nombre` (ver GRAFICOS); KeyError si no existe"""
+        return GRAFICOS[nombre](self.cubo, self.filtros, **opciones)
+
+    def overdue_rows(self):
+        """Cuotas vencidas de la vista, de mayor a menor mora (PagedRows)"""
+        corte = self.filtros['fecha_corte']
+        vencida = (self.cuotas.column('estado') == 'Vencida').to_numpy()
+        filas = self.cuotas.filas if self.cuotas.filas is not None else np.arange(len(self.cuotas))
+        # El orden por dias_mora se calcula una vez por versión y fecha de corte
+        orden_mora = self.datos.derived(
+            ('orden_mora', corte), lambda: sort_order(self.df_cuotas['dias_mora'], ascending=False)
+        )
+        return PagedRows(self.df_cuotas, orden_mora, filas[vencida])
+
+    def collection_scenarios(self, dias=DIAS_PROYECCION, escenarios=ESCENARIOS, semilla=SEMILLA):
+        """
+        Cobros semanales simulados de las cuotas abiertas de la vista, con
+        bandas P5/P95 (ver farmacia_creditos.escenarios). El modelo se
+        calibra una vez por versión y fecha de corte.
+        """
+        corte = self.filtros['fecha_corte']
+        simulador = self.datos.derived(
+            ('escenarios', corte), lambda: CollectionSimulator(self.df_clientes, self.df_cuotas, corte)
+        )
+        return simulador.simulate(self.cuotas.filas, dias, escenarios, semilla)
+
+
+class PortfolioEngine:
+    """
+    Motor de la cartera sobre una fuente de datos: base de datos
+    (destino_db, con recarga incremental si incremental), Parquet
+    (ruta_parquet) o datos de ejemplo si no se indica ninguna.
+
+    Las instantáneas viven en store (DataStore) y los KPIs se memorizan por
+    versión de datos y selección de filtros (las últimas MAX_KPIS).
+    estado_vencimientos es el JSON donde OverdueJob recuerda su última
+    corrida sobre la base; sin base, la marca se guarda en la instantánea.
+    """
+
+    def __init__(self, destino_db=None, ruta_parquet=None, incremental=False, ttl_db=60, store=None,
+                 estado_vencimientos=None):
+        self.destino_db = destino_db
+        self.ruta_parquet = ruta_parquet
+        self.ttl_db = ttl_db
+        self.store = store if store is not None else DataStore(max_bytes=2048 * 1024 * 1024)
+        self.loader = None
+        if destino_db and incremental:
+            self.loader = IncrementalLoader(lambda: connect(destino_db), transform=compact_frames)
+        self.vencimientos = OverdueJob(estado_vencimientos)
+        self._kpis = OrderedDict()
+        self._lock = threading.Lock()
+        self._lock_vencimientos = threading.Lock()
+
+    @classmethod
+    def from_env(cls, entorno=None):
+        """
+        Motor configurado por variables de entorno: FARMACIA_DB ('sqlite:///ruta.db'
+        o cadena ODBC), FARMACIA_DATOS_PARQUET, FARMACIA_DB_INCREMENTAL=1 con
+        FARMACIA_DB_TTL segundos entre refrescos, FARMACIA_MEMORIA_MB,
+        FARMACIA_DATOS_TTL (vencimiento del almacén, sin vencimiento si falta)
+        y FARMACIA_VENCIMIENTOS (JSON de la última corrida de vencimientos
+        sobre la base).
+        """
+        entorno = os.environ if entorno is None else entorno
+        ttl = entorno.get('FARMACIA_DATOS_TTL')
+        return cls(
+            destino_db=entorno.get('FARMACIA_DB'),
+            ruta_parquet=entorno.get('FARMACIA_DATOS_PARQUET'),
+            incremental=entorno.get('FARMACIA_DB_INCREMENTAL') == '1',
+            ttl_db=float(entorno.get('FARMACIA_DB_TTL', 60)),
+            store=DataStore(
+                max_bytes=int(float(entorno.get('FARMACIA_MEMORIA_MB', 2048)) * 1024 * 1024),
+                ttl=float(ttl) if ttl else None
+            ),
+            estado_vencimientos=entorno.get('FARMACIA_VENCIMIENTOS'),
+        )
+
+    @property
+    def incremental(self):
+        return self.loader is not None
+
+    # -------------------------------------------------
+    # Carga de datos
+    # -------------------------------------------------
+
+    def _load_db(self, filtros):
+        """
+        Carga desde la base con los filtros de créditos en el WHERE. El estado
+        de la cuota no se filtra en la base: depende de la fecha de corte.
+        """
+        conn = connect(self.destino_db)
+        try:
+            return compact_frames(*load_dashboard_data(
+                conn, tipo_cliente=filtros['tipo_cliente'], estado_credito=filtros['estado_credito'],
+                fecha_inicio=filtros['fecha_inicio'], fecha_fin=filtros['fecha_fin']
+            ))
+        finally:
+            conn.close()
+
+    def _load_parquet(self):
+        """Carga una cartera generada con python -m farmacia_creditos.generador"""
+        return compact_frames(*read_portfolio_parquet(self.ruta_parquet))
+
+    def snapshot(self, filtros, recargar=False):
+        """
+        Instantánea de los datos para los filtros (solo la fuente sin
+        incremental de base de datos depende de ellos). recargar fuerza una
+        recarga completa en modo incremental.
+        """
+        if self.loader is not None:
+            if recargar:
+                self.loader.refresh(full=True)
+            else:
+                self.loader.refresh_if_stale(self.ttl_db)
+            # La revisión se lee antes que los frames: un cambio en el medio
+            # solo provoca una publicación más. El cargador reemplaza sus
+            # frames en cada refresco sin modificarlos (copy-on-write), así
+            # que los de versiones ya publicadas no cambian
+            revision = self.loader.revision
+            return self.store.publish(('incremental', self.destino_db), self.loader.frames, revision)
+        if self.destino_db:
+            fuente = ('db', self.destino_db, tuple(filtros['tipo_cliente']), tuple(filtros['estado_credito']),
+                      filtros['fecha_inicio'], filtros['fecha_fin'])
+            return self.store.get(fuente, lambda: self._load_db(filtros))
+        if self.ruta_parquet:
+            return self.store.get(('parquet', self.ruta_parquet), self._load_parquet)
+        return self.store.get(('muestra',), generate_sample_data)
+
+    # -------------------------------------------------
+    # Consultas
+    # -------------------------------------------------
+
+    def view(self, filtros=None, recargar=False):
+        """PortfolioView de los filtros (normalizados) sobre la instantánea vigente"""
+        filtros = normalize_filters(filtros)
+        return PortfolioView(self.snapshot(filtros, recargar), filtros)
+
+    def kpis(self, vista):
+        """KPIs de la vista, memorizados por vista.clave"""
+        with self._lock:
+            if vista.clave in self._kpis:
+                self._kpis.move_to_end(vista.clave)
+                return self._kpis[vista.clave]
+
+        resultado = compute_kpis(vista.creditos, vista.cuotas)
+        with self._lock:
+            self._kpis[vista.clave] = resultado
+            while len(self._kpis) > MAX_KPIS:
+                self._kpis.popitem(last=False)
+        return resultado
+
+    def update_overdue(self, hoy=None, usuario=USUARIO):
+        """
+        Vencimiento incremental de cuotas (farmacia_creditos.vencimientos):
+        con base de datos se actualiza la base y los mismos ids se aplican a
+        las instantáneas cargadas; sin base, a la instantánea en memoria,
+        desde la marca guardada en ella (sin marca, por ejemplo tras una
+        recarga, se revisan todas las cuotas). Las instantáneas cambiadas
+        se publican como versiones nuevas. Devuelve las estadísticas de la
+        corrida.
+        """
+        with self._lock_vencimientos:
+            if self.destino_db:
+                conn = connect(self.destino_db)
+                try:
+                    cambios = self.vencimientos.run_db(conn, hoy, usuario)
+                finally:
+                    conn.close()
+
+                def aplicar(frames):
+                    return apply_overdue(frames, cambios['cuotas'], cambios['creditos'])
+
+                if self.loader is not None:
+                    # Se publica en la próxima consulta (cambia la revisión)
+                    self.loader.update_frames(aplicar)
+                else:
+                    for snapshot in self.store.loaded():
+                        self._republish(snapshot, aplicar(snapshot.frames))
+            else:
+                snapshot = self.snapshot(normalize_filters())
+                orden = snapshot.derived('orden_vencimiento', lambda: due_date_order(snapshot.frames[2]))
+                marca = snapshot.derived('vencimientos', dict)
+                frames, cambios = self.vencimientos.run_frames(
+                    snapshot.frames, hoy, orden, marca.get('hasta'), marca.get('ultimo_id_cuota')
+                )
+                nuevo = self._republish(snapshot, frames)
+                # fecha_programada no cambia: el orden sirve para la versión nueva
+                nuevo.derived('orden_vencimiento', lambda: orden)
+                nuevo.derived('vencimientos', dict).update(
+                    hasta=cambios['hasta'], ultimo_id_cuota=cambios['ultimo_id_cuota']
+                )
+            return self.vencimientos.last_stats
+
+    def _republish(self, snapshot, frames):
+        """Publica frames como versión nueva de la fuente del snapshot (si cambiaron)"""
+        if all(nuevo is viejo for nuevo, viejo in zip(frames, snapshot.frames)):
+            return snapshot
+        return self.store.publish(snapshot.fuente, frames, ('vencimientos', time.time()))
@@ -0,0 +1,72 @@
+"""
+=====================================================
+DATOS DE EJEMPLO
+Cartera de demostración cuando no hay base ni Parquet
+=====================================================
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.compacto import compact_frames
+from farmacia_creditos.datos import build_cuotas_schedule
+
+
+def generate_sample_data():
+    """Genera datos de ejemplo para el sistema de créditos"""
+
+    np.random.seed(42)
+
+    # Fechas
+    today = datetime.now()
+    start_date = today - timedelta(days=365)
+
+    # Clientes Naturales (5)
+    clientes_natural = [
+        {'id': 1, 'nombre': 'Juan Pérez García', 'tipo': 'Natural', 'nit': '12345001', 'telefono': '555-1001', 'riesgo': 'Bajo'},
+        {'id': 2, 'nombre': 'María López Sánchez', 'tipo': 'Natural', 'nit': '12345002', 'telefono': '555-1002', 'riesgo': 'Bajo'},
+        {'id': 3, 'nombre': 'Carlos Rodríguez Méndez', 'tipo': 'Natural', 'nit': '12345003', 'telefono': '555-1003', 'riesgo': 'Medio'},
+        {'id': 4, 'nombre': 'Ana Martínez Torres', 'tipo': 'Natural', 'nit': '12345004', 'telefono': '555-1004', 'riesgo': 'Bajo'},
+        {'id': 5, 'nombre': 'Luis Gómez Ramírez', 'tipo': 'Natural', 'nit': '12345005', 'telefono': '555-1005', 'riesgo': 'Alto'}
+    ]
+
+    # Clientes Jurídicos (5)
+    clientes_juridico = [
+        {'id': 6, 'nombre': 'Farmacia Central S.A.', 'tipo': 'Jurídico', 'nit': '987654001', 'telefono': '555-2001', 'razon_social': 'Farmacia Central Sociedad Anónima', 'riesgo': 'Bajo'},
+        {'id': 7, 'nombre': 'Distribuidora Médica Ltda.', 'tipo': 'Jurídico', 'nit': '987654002', 'telefono': '555-2002', 'razon_social': 'Distribuidora Médica Limitada', 'riesgo': 'Medio'},
+        {'id': 8, 'nombre': 'Clínica San Rafael', 'tipo': 'Jurídico', 'nit': '987654003', 'telefono': '555-2003', 'razon_social': 'Clínica San Rafael S.A.', 'riesgo': 'Bajo'},
+        {'id': 9, 'nombre': 'Hospital Metropolitano', 'tipo': 'Jurídico', 'nit': '987654004', 'telefono': '555-2004', 'razon_social': 'Hospital Metropolitano S.A.', 'riesgo': 'Bajo'},
+        {'id': 10, 'nombre': 'Laboratorios Unidos S.A.', 'tipo': 'Jurídico', 'nit': '987654005', 'telefono': '555-2005', 'razon_social': 'Laboratorios Unidos Sociedad Anónima', 'riesgo': 'Medio'}
+    ]
+
+    df_clientes = pd.DataFrame(clientes_natural + clientes_juridico)
+
+    # Créditos
+    creditos_data = []
+    for i in range(200):
+        cliente = df_clientes.sample(1).iloc[0]
+        monto_capital = np.random.uniform(500, 15000)
+        tasa_interes = np.random.uniform(5, 18)
+        fecha_desembolso = start_date + timedelta(days=np.random.randint(0, 365))
+        plazo_meses = np.random.choice([3, 6, 12, 18, 24])
+
+        creditos_data.append({
+            'id_credito': i + 1,
+            'id_cliente': cliente['id'],
+            'nombre_cliente': cliente['nombre'],
+            'tipo_cliente': cliente['tipo'],
+            'monto_capital': monto_capital,
+            'tasa_interes': tasa_interes,
+            'fecha_desembolso': fecha_desembolso,
+            'plazo_meses': plazo_meses,
+            'estado': np.random.choice(['Activo', 'Cancelado', 'Moroso'], p=[0.6, 0.25, 0.15])
+        })
+
+    df_creditos = pd.DataFrame(creditos_data)
+
+    # Cuotas (cronograma vectorizado)
+    df_cuotas = build_cuotas_schedule(df_creditos, today=today, rng=np.random.default_rng(42))
+
+    return compact_frames(df_clientes, df_creditos, df_cuotas)
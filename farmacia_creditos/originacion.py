@@ -0,0 +1,197 @@
+"""
+=====================================================
+ORIGINACIÓN DE CRÉDITOS POR LOTES
+Equivalente de sp_CrearCredito con cronogramas calculados como arreglos
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.originacion creditos.csv --db sqlite:///farmacia.db --usuario migracion
+
+sp_CrearCredito inserta el crédito y luego sus cuotas con un WHILE, una
+fila por mes. originate_credits recibe muchos créditos a la vez:
+
+- build_schedule expande todos los cronogramas con np.repeat, con las
+  mismas reglas que el procedimiento: cuota n el DATEADD(MONTH, n,
+  fecha_desembolso) (fin de mes si el día no existe), capital
+  monto_capital / plazo_meses e interés (monto_capital * tasa / 100) / 12,
+  ambos redondeados a centavos como DECIMAL(18,2). El generador sintético
+  (build_cuotas_schedule) sigue usando cuotas cada 30 días.
+- Los ids se reservan a continuación del máximo actual, con la tabla
+  bloqueada, y cada tabla se escribe con un executemany (fast_executemany
+  en pyodbc): un viaje por tabla y por lote, en una transacción.
+"""
+
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.base_datos import connect
+from farmacia_creditos.datos import add_months
+
+
+COLUMNAS_CREDITO = ['id_cliente', 'monto_capital', 'tasa_interes', 'plazo_meses', 'fecha_desembolso']
+
+# Créditos por transacción en la línea de comandos
+LOTE = 50_000
+
+
+def _round_cents(numerador, denominador):
+    """numerador / denominador (enteros >= 0) redondeado a entero, mitades hacia arriba"""
+    return (2 * numerador + denominador) // (2 * denominador)
+
+
+def validate_credits(creditos):
+    """Aplica los CHECK de Creditos al lote; ValueError si alguna fila no cumple"""
+    faltantes = [columna for columna in COLUMNAS_CREDITO if columna not in creditos]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+
+    reglas = {
+        'monto_capital > 0': creditos['monto_capital'] > 0,
+        'tasa_interes >= 0': creditos['tasa_interes'] >= 0,
+        'plazo_meses > 0': creditos['plazo_meses'] > 0,
+        'fecha_desembolso': pd.to_datetime(creditos['fecha_desembolso']).notna(),
+        'id_cliente': creditos['id_cliente'].notna(),
+    }
+    errores = [f"{regla} ({int((~cumple).sum())} filas)" for regla, cumple in reglas.items() if not cumple.all()]
+    if errores:
+        raise ValueError(f"Créditos inválidos: {'; '.join(errores)}")
+
+
+def build_schedule(creditos):
+    """
+    Cuotas de los créditos (con id_credito asignado) como en sp_CrearCredito,
+    sin bucles de Python: id_credito, id_cliente, numero_cuota,
+    monto_capital, interes, monto_total y fecha_programada. La última
+    fecha_programada de cada crédito es su fecha_vencimiento_final.
+    """
+    plazos = creditos['plazo_meses'].to_numpy(dtype=np.int64)
+    total = int(plazos.sum())
+
+    fila_credito = np.repeat(np.arange(len(plazos)), plazos)
+    offsets = np.cumsum(plazos) - plazos
+    numero_cuota = np.arange(total, dtype=np.int64) - offsets[fila_credito] + 1
+
+    # Aritmética en centavos (capital) y centésimas (tasa): sin errores de
+    # redondeo binario al llevar a DECIMAL(18,2)
+    capital = np.rint(creditos['monto_capital'].to_numpy(dtype=np.float64) * 100).astype(np.int64)
+    tasa = np.rint(creditos['tasa_interes'].to_numpy(dtype=np.float64) * 100).astype(np.int64)
+    monto_cuota = _round_cents(capital, plazos) / 100
+    interes = _round_cents(capital * tasa, 120_000) / 100
+
+    fecha_desembolso = pd.to_datetime(creditos['fecha_desembolso']).to_numpy(dtype='datetime64[D]')
+
+    return pd.DataFrame({
+        'id_credito': creditos['id_credito'].to_numpy()[fila_credito],
+        'id_cliente': creditos['id_cliente'].to_numpy()[fila_credito],
+        'numero_cuota': numero_cuota,
+        'monto_capital': monto_cuota[fila_credito],
+        'interes': interes[fila_credito],
+        'monto_total': (monto_cuota + interes)[fila_credito],
+        'fecha_programada': add_months(fecha_desembolso[fila_credito], numero_cuota).astype('datetime64[ns]'),
+    })
+
+
+def _reserve_ids(cursor, tabla, columna, sqlite):
+    """Primer id libre de la tabla, bloqueándola hasta el fin de la transacción"""
+    bloqueo = '' if sqlite else ' WITH (TABLOCKX, HOLDLOCK)'
+    cursor.execute(f"SELECT COALESCE(MAX({columna}), 0) FROM {tabla}{bloqueo}")
+    return int(cursor.fetchone()[0]) + 1
+
+
+def _iso_dates(fechas):
+    """Fechas (sin vacíos) como texto YYYY-MM-DD"""
+    return np.datetime_as_string(np.asarray(fechas, dtype='datetime64[D]'), unit='D')
+
+
+def _insert(cursor, tabla, df, sqlite):
+    """Un executemany con los ids explícitos (IDENTITY_INSERT en SQL Server)"""
+    valores = [serie.tolist() if not serie.hasnans else serie.astype(object).where(serie.notna(), None).tolist()
+               for _, serie in df.items()]
+    columnas = ', '.join(df.columns)
+    marcadores = ', '.join('?' * len(df.columns))
+    if not sqlite:
+        cursor.execute(f"SET IDENTITY_INSERT {tabla} ON")
+    cursor.executemany(f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores})",
+                       list(zip(*valores)))
+    if not sqlite:
+        cursor.execute(f"SET IDENTITY_INSERT {tabla} OFF")
+
+
+def originate_credits(conn, creditos, usuario):
+    """
+    Crea los créditos (DataFrame con id_cliente, monto_capital, tasa_interes,
+    plazo_meses, fecha_desembolso y, opcional, observaciones) con estado
+    Activo y sus cuotas Pendientes, en una transacción.
+
+    Devuelve un dict con 'creditos' (el lote con el id_credito asignado) y
+    'cuotas' (el cronograma con su id_cuota).
+    """
+    validate_credits(creditos)
+    creditos = creditos.reset_index(drop=True)
+    sqlite = isinstance(conn, sqlite3.Connection)
+
+    with conn:
+        cursor = conn.cursor()
+        if hasattr(cursor, 'fast_executemany'):
+            cursor.fast_executemany = True
+        try:
+            if sqlite and not conn.in_transaction:
+                # Bloqueo de escritura antes de leer los máximos
+                cursor.execute("BEGIN IMMEDIATE")
+            primer_credito = _reserve_ids(cursor, 'Creditos', 'id_credito', sqlite)
+            creditos = creditos.assign(
+                id_credito=np.arange(primer_credito, primer_credito + len(creditos), dtype=np.int64)
+            )
+            cuotas = build_schedule(creditos)
+            primera_cuota = _reserve_ids(cursor, 'Cuotas', 'id_cuota', sqlite)
+            cuotas.insert(0, 'id_cuota', np.arange(primera_cuota, primera_cuota + len(cuotas), dtype=np.int64))
+
+            filas_creditos = creditos[['id_credito', *COLUMNAS_CREDITO]].assign(
+                fecha_desembolso=_iso_dates(pd.to_datetime(creditos['fecha_desembolso'])),
+                observaciones=creditos.get('observaciones'),
+                estado='Activo',
+                usuario_creacion=usuario,
+            )
+            filas_cuotas = cuotas.drop(columns='monto_total').assign(
+                fecha_programada=_iso_dates(cuotas['fecha_programada']),
+                estado='Pendiente',
+                usuario_creacion=usuario,
+            )
+            _insert(cursor, 'Creditos', filas_creditos, sqlite)
+            _insert(cursor, 'Cuotas', filas_cuotas, sqlite)
+        finally:
+            cursor.close()
+
+    return {'creditos': creditos, 'cuotas': cuotas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Crea créditos y cuotas por lotes (equivalente a sp_CrearCredito)')
+    parser.add_argument('archivo', help='CSV con id_cliente, monto_capital, tasa_interes, plazo_meses y fecha_desembolso')
+    parser.add_argument('--db', required=True, help="Base de datos ('sqlite:///ruta.db' o cadena ODBC)")
+    parser.add_argument('--usuario', required=True, help='Usuario que crea los créditos')
+    parser.add_argument('--lote', type=int, default=LOTE, help='Créditos por transacción')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    creditos = pd.read_csv(args.archivo, parse_dates=['fecha_desembolso'])
+    conn = connect(args.db)
+    n_creditos = n_cuotas = 0
+    try:
+        for desde in range(0, len(creditos), args.lote):
+            resultado = originate_credits(conn, creditos.iloc[desde:desde + args.lote], args.usuario)
+            n_creditos += len(resultado['creditos'])
+            n_cuotas += len(resultado['cuotas'])
+            print(f"[INFO] {n_creditos:,}/{len(creditos):,} créditos")
+    finally:
+        conn.close()
+
+    print(f"[SUCCESS] {n_creditos:,} créditos y {n_cuotas:,} cuotas en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
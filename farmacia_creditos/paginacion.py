@@ -0,0 +1,65 @@
+"""
+=====================================================
+TABLAS PAGINADAS
+Orden por índice y lectura de la página visible
+=====================================================
+
+El orden de una columna se calcula una vez por versión de los datos
+(sort_order). Para una selección de filas el orden se obtiene recorriendo
+ese índice con una máscara, sin volver a ordenar, y solo las filas de la
+página visible se copian del DataFrame. El formato (Bs, fechas) lo aplica
+st.column_config al mostrar la página.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+TAMANO_PAGINA = 100
+
+
+def sort_order(serie, ascending=True):
+    """Posiciones de todas las filas ordenadas por la serie (estable ante empates)"""
+    ordenada = serie.reset_index(drop=True).sort_values(ascending=ascending, kind='stable')
+    return ordenada.index.to_numpy(dtype=np.int64)
+
+
+class PagedRows:
+    """
+    Filas de df en el orden de un índice, leídas de a una página.
+
+    orden son posiciones de df ordenadas (None: el orden actual de df);
+    filas, las posiciones seleccionadas (None: todas).
+    """
+
+    def __init__(self, df, orden=None, filas=None):
+        self.df = df
+        if orden is None:
+            orden = np.arange(len(df))
+        if filas is not None:
+            seleccion = np.zeros(len(df), dtype=bool)
+            seleccion[filas] = True
+            orden = orden[seleccion[orden]]
+        self.orden = orden
+
+    def __len__(self):
+        return len(self.orden)
+
+    def n_paginas(self, tamano=TAMANO_PAGINA):
+        return max(1, -(-len(self) // tamano))
+
+    def page(self, numero, tamano=TAMANO_PAGINA, columnas=None):
+        """
+        Página `numero` (desde 1) con las columnas pedidas. Las categóricas
+        solo conservan las categorías de la página, para no enviar al
+        navegador el diccionario completo (por ejemplo, todos los clientes).
+        """
+        inicio = (numero - 1) * tamano
+        posiciones = self.orden[inicio:inicio + tamano]
+        columnas = list(self.df.columns) if columnas is None else list(columnas)
+        # Filas y columnas en un solo paso: solo se copia la página
+        pagina = self.df.iloc[posiciones, self.df.columns.get_indexer(columnas)].reset_index(drop=True)
+        for columna in columnas:
+            if isinstance(pagina[columna].dtype, pd.CategoricalDtype):
+                pagina[columna] = pagina[columna].cat.remove_unused_categories()
+        return pagina
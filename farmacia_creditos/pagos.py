@@ -0,0 +1,259 @@
+"""
+=====================================================
+REGISTRO DE PAGOS POR LOTES
+Equivalente de sp_RegistrarPago para archivos de conciliación completos
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.pagos conciliacion.csv --db sqlite:///farmacia.db --usuario conciliacion
+
+sp_RegistrarPago procesa un pago por llamada (SELECT, INSERT, UPDATE y un
+NOT EXISTS sobre las cuotas del crédito). apply_payments recibe el lote
+completo:
+
+1. Una consulta (por bloques de ids) trae las cuotas de todos los créditos
+   tocados por el lote.
+2. La validación es vectorizada, con las mismas reglas que el procedimiento
+   y los CHECK de Pagos: monto positivo, método de pago válido, cuota
+   existente y monto que no exceda saldo_pendiente. Los pagos de una misma
+   cuota se validan en el orden del lote contra el saldo que dejan los
+   anteriores aceptados, como si se llamara al procedimiento uno por uno.
+3. Transiciones: la cuota queda Pagada (con fecha_pago) si el monto pagado
+   alcanza monto_total y Parcial si no; el crédito pasa a Cancelado cuando
+   todas sus cuotas quedan Pagadas.
+4. Escritura con executemany (INSERT en Pagos, UPDATE de Cuotas y Creditos)
+   en una sola transacción: el lote se aplica completo o no se aplica.
+
+Los saldos se leen dentro de esa transacción con bloqueo de escritura
+(BEGIN IMMEDIATE en SQLite, UPDLOCK y HOLDLOCK en SQL Server): un
+sp_RegistrarPago u otro lote sobre las mismas cuotas espera a que el lote
+termine, así que monto_pagado nunca se escribe sobre un saldo viejo.
+
+Los pagos rechazados no detienen el lote; se devuelven con su motivo. Los
+importes se comparan en centavos enteros (DECIMAL(18,2) en la base). Las
+filas modificadas actualizan fecha_actualizacion, así que el refresco
+incremental del dashboard las recoge.
+"""
+
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.base_datos import LOTE_IDS, _fecha_param, _read_by_ids, _select, connect
+
+
+METODOS_PAGO = ['Efectivo', 'Tarjeta', 'Transferencia', 'Cheque', 'Otro']
+
+COLUMNAS_SALDOS = [
+    ('cu.id_cuota', 'id_cuota', 'int'),
+    ('cu.id_credito', 'id_credito', 'int'),
+    ('cu.monto_total', 'monto_total', 'float'),
+    ('COALESCE(cu.monto_pagado, 0)', 'monto_pagado', 'float'),
+    ('cu.estado', 'estado', 'str'),
+    ('cr.estado', 'estado_credito', 'str'),
+]
+
+MOTIVO_MONTO = 'El monto del pago debe ser positivo'
+MOTIVO_METODO = 'Método de pago inválido'
+MOTIVO_CUOTA = 'La cuota no existe'
+MOTIVO_SALDO = 'El monto del pago excede el saldo pendiente'
+
+# Bloqueo de las filas leídas hasta el fin de la transacción (SQL Server)
+BLOQUEO = ' WITH (UPDLOCK, HOLDLOCK)'
+
+
+def _centavos(valores):
+    return np.rint(np.asarray(valores, dtype=float) * 100).astype(np.int64)
+
+
+def load_balances(conn, ids_cuota, marcador='?', lote=LOTE_IDS, bloqueo=''):
+    """
+    Cuotas de los créditos a los que pertenecen ids_cuota (todas, no solo
+    las pagadas: hacen falta para decidir la cancelación del crédito), con
+    el estado del crédito. Primero se resuelven los créditos y luego se
+    leen sus cuotas, cada una una sola vez. bloqueo es la sugerencia de
+    tabla que se agrega a Cuotas y Creditos (por ejemplo BLOQUEO).
+    """
+    creditos = _read_by_ids(
+        conn, f"SELECT cu.id_credito AS id_credito FROM Cuotas cu{bloqueo}", 'cu.id_cuota',
+        pd.unique(np.asarray(ids_cuota, dtype=np.int64)), [('cu.id_credito', 'id_credito', 'int')], marcador, lote
+    )
+    return _read_by_ids(
+        conn,
+        f"SELECT {_select(COLUMNAS_SALDOS)} FROM Cuotas cu{bloqueo} "
+        f"INNER JOIN Creditos cr{bloqueo} ON cu.id_credito = cr.id_credito",
+        'cu.id_credito', pd.unique(creditos['id_credito'].to_numpy()), COLUMNAS_SALDOS, marcador, lote
+    )
+
+
+def validate_payments(pagos, cuotas):
+    """
+    Motivo de rechazo de cada pago (None si se acepta), en una pasada
+    vectorizada sobre el lote. cuotas es el resultado de load_balances.
+    """
+    id_cuota = pagos['id_cuota'].to_numpy(dtype=np.int64)
+    montos = _centavos(pagos['monto_pago'])
+    metodos = pagos['metodo_pago']
+
+    saldos = pd.Series(
+        _centavos(cuotas['monto_total']) - _centavos(cuotas['monto_pagado']), index=cuotas['id_cuota']
+    ).reindex(id_cuota)
+
+    motivo = np.full(len(pagos), None, dtype=object)
+    motivo[(~metodos.isin(METODOS_PAGO) & metodos.notna()).to_numpy()] = MOTIVO_METODO
+    motivo[montos <= 0] = MOTIVO_MONTO
+    motivo[saldos.isna().to_numpy()] = MOTIVO_CUOTA
+    saldos = saldos.fillna(0).to_numpy(dtype=np.int64)
+
+    # Saldo acumulado por cuota en el orden del lote. El primer pago que
+    # excede es un rechazo seguro (los anteriores entran); se descarta y se
+    # repite, una vuelta por rechazo de la misma cuota
+    codigos = pd.factorize(id_cuota)[0]
+    while True:
+        aceptado = pd.isna(motivo)
+        acumulado = pd.Series(np.where(aceptado, montos, 0)).groupby(codigos).cumsum().to_numpy()
+        excede = np.flatnonzero(aceptado & (acumulado > saldos))
+        if not len(excede):
+            return pd.Series(motivo, index=pagos.index, name='motivo')
+        _, primeros = np.unique(codigos[excede], return_index=True)
+        motivo[excede[primeros]] = MOTIVO_SALDO
+
+
+def plan_payments(pagos, cuotas, fecha):
+    """
+    Cambios del lote sobre las cuotas y créditos (sin escribir): DataFrame
+    de cuotas pagadas con su nuevo monto_pagado, estado y fecha_pago, y la
+    lista de créditos que quedan cancelados.
+    """
+    montos = pagos.groupby('id_cuota')['monto_pago'].sum()
+    cambios = cuotas.set_index('id_cuota').loc[montos.index]
+    pagado = _centavos(cambios['monto_pagado']) + _centavos(montos)
+    pagada = pagado >= _centavos(cambios['monto_total'])
+
+    cambios = pd.DataFrame({
+        'id_cuota': montos.index.to_numpy(dtype=np.int64),
+        'id_credito': cambios['id_credito'].to_numpy(),
+        'monto_pagado': pagado / 100,
+        'estado': np.where(pagada, 'Pagada', 'Parcial'),
+        'fecha_pago': np.where(pagada, fecha, None),
+    })
+
+    estado_final = cuotas['id_cuota'].map(cambios.set_index('id_cuota')['estado']).fillna(cuotas['estado'])
+    creditos = pd.DataFrame({
+        'id_credito': cuotas['id_credito'],
+        'pagado': estado_final == 'Pagada',
+        'abierto': cuotas['estado_credito'] != 'Cancelado',
+    }).groupby('id_credito').all()
+    cancelados = creditos.index[creditos['pagado'] & creditos['abierto'] & creditos.index.isin(cambios['id_credito'])]
+    return cambios, cancelados.to_numpy(dtype=np.int64).tolist()
+
+
+def _nulls(valores):
+    """Valores de Python para DB-API: NaN/NaT como None"""
+    serie = pd.Series(valores, dtype=object)
+    return serie.where(serie.notna(), None).tolist()
+
+
+def apply_payments(conn, pagos, usuario, fecha=None, marcador='?'):
+    """
+    Registra un lote de pagos (DataFrame con id_cuota, monto_pago,
+    metodo_pago y, opcional, numero_referencia) en una transacción.
+
+    fecha es la fecha de los pagos (por defecto hoy). Devuelve un dict con
+    'pagos' (el lote con las columnas aceptado y motivo), 'cuotas' (cambios
+    aplicados) y 'creditos_cancelados' (ids).
+    """
+    fecha = _fecha_param(fecha if fecha is not None else pd.Timestamp.today())
+    pagos = pagos.reset_index(drop=True)
+    if 'numero_referencia' not in pagos:
+        pagos = pagos.assign(numero_referencia=None)
+    sqlite = isinstance(conn, sqlite3.Connection)
+    m = marcador
+
+    with conn:
+        cursor = conn.cursor()
+        if hasattr(cursor, 'fast_executemany'):
+            # pyodbc: envía cada executemany como un arreglo de parámetros
+            cursor.fast_executemany = True
+        try:
+            if sqlite and not conn.in_transaction:
+                # Bloqueo de escritura antes de leer los saldos
+                cursor.execute("BEGIN IMMEDIATE")
+            cuotas = load_balances(conn, pagos['id_cuota'], marcador, bloqueo='' if sqlite else BLOQUEO)
+            motivo = validate_payments(pagos, cuotas)
+            resultado = pagos.assign(aceptado=motivo.isna(), motivo=motivo)
+            aceptados = resultado[resultado['aceptado']]
+            aceptados = aceptados.assign(monto_pago=_centavos(aceptados['monto_pago']) / 100)
+            cambios, cancelados = plan_payments(aceptados, cuotas, fecha)
+
+            id_credito = cuotas.set_index('id_cuota')['id_credito'].reindex(aceptados['id_cuota'])
+            filas_pagos = list(zip(
+                aceptados['id_cuota'].astype('int64').tolist(), id_credito.to_numpy(dtype=np.int64).tolist(),
+                aceptados['monto_pago'].tolist(), [fecha] * len(aceptados), _nulls(aceptados['metodo_pago']),
+                _nulls(aceptados['numero_referencia']), [usuario] * len(aceptados),
+            ))
+            filas_cuotas = list(zip(
+                cambios['monto_pagado'].tolist(), cambios['estado'].tolist(), cambios['fecha_pago'].tolist(),
+                [usuario] * len(cambios), cambios['id_cuota'].tolist(),
+            ))
+            if filas_pagos:
+                cursor.executemany(
+                    f"INSERT INTO Pagos (id_cuota, id_credito, monto_pago, fecha_pago, metodo_pago, "
+                    f"numero_referencia, usuario_registro) VALUES ({m}, {m}, {m}, {m}, {m}, {m}, {m})",
+                    filas_pagos
+                )
+                cursor.executemany(
+                    f"UPDATE Cuotas SET monto_pagado = {m}, estado = {m}, fecha_pago = COALESCE({m}, fecha_pago), "
+                    f"usuario_actualizacion = {m}, fecha_actualizacion = CURRENT_TIMESTAMP WHERE id_cuota = {m}",
+                    filas_cuotas
+                )
+            if cancelados:
+                cursor.executemany(
+                    f"UPDATE Creditos SET estado = 'Cancelado', usuario_actualizacion = {m}, "
+                    f"fecha_actualizacion = CURRENT_TIMESTAMP WHERE id_credito = {m}",
+                    [(usuario, id_credito) for id_credito in cancelados]
+                )
+        finally:
+            cursor.close()
+
+    return {'pagos': resultado, 'cuotas': cambios, 'creditos_cancelados': cancelados}
+
+
+def read_payments_file(ruta):
+    """Archivo de conciliación CSV (id_cuota, monto_pago, metodo_pago[, numero_referencia])"""
+    return pd.read_csv(ruta, dtype={'metodo_pago': object, 'numero_referencia': object})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Registra un archivo de pagos (equivalente a sp_RegistrarPago por lotes)')
+    parser.add_argument('archivo', help='CSV con id_cuota, monto_pago, metodo_pago y numero_referencia')
+    parser.add_argument('--db', required=True, help="Base de datos ('sqlite:///ruta.db' o cadena ODBC)")
+    parser.add_argument('--usuario', required=True, help='Usuario que registra los pagos')
+    parser.add_argument('--fecha', default=None, help='Fecha de los pagos (YYYY-MM-DD, por defecto hoy)')
+    parser.add_argument('--rechazos', default=None, help='CSV donde guardar los pagos rechazados')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    pagos = read_payments_file(args.archivo)
+    conn = connect(args.db)
+    try:
+        resultado = apply_payments(conn, pagos, args.usuario, args.fecha)
+    finally:
+        conn.close()
+
+    rechazados = resultado['pagos'][~resultado['pagos']['aceptado']]
+    print(f"[SUCCESS] {len(pagos) - len(rechazados):,} pagos aplicados sobre {len(resultado['cuotas']):,} cuotas, "
+          f"{len(resultado['creditos_cancelados']):,} créditos cancelados en {time.perf_counter() - inicio:.1f}s")
+    if len(rechazados):
+        print(f"[INFO] {len(rechazados):,} pagos rechazados:")
+        print(rechazados['motivo'].value_counts().to_string())
+        if args.rechazos:
+            rechazados.drop(columns='aceptado').to_csv(args.rechazos, index=False)
+            print(f"[INFO] Rechazos en '{args.rechazos}'")
+
+
+if __name__ == '__main__':
+    main()
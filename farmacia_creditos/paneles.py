@@ -0,0 +1,253 @@
+"""
+=====================================================
+FIGURAS DE LAS PESTAÑAS DEL DASHBOARD
+Construcción de los gráficos Plotly a partir de los datos del motor
+=====================================================
+
+Cada función recibe el DataFrame que devuelve PortfolioView.chart para su
+gráfico y arma la figura con el estilo del dashboard. No dependen de
+Streamlit: el dashboard las guarda en la caché de figuras y la suite de
+rendimiento las mide por separado.
+"""
+
+import plotly.express as px
+import plotly.graph_objects as go
+
+from farmacia_creditos.graficos import bar_trace, time_series_trace
+
+
+def estado_cuotas_figure(estado_cuotas):
+    """Torta del monto por estado de cuota (pestaña 1)"""
+    fig = px.pie(
+        estado_cuotas,
+        values='Monto',
+        names='Estado',
+        hole=0.4,
+        color='Estado',
+        color_discrete_map={
+            'Pagada': '#28a745',
+            'Pendiente': '#ffc107',
+            'Vencida': '#dc3545'
+        }
+    )
+
+    fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+def creditos_tipo_figure(creditos_tipo):
+    """Barras del monto otorgado por tipo de cliente (pestaña 1)"""
+    fig = px.bar(
+        creditos_tipo,
+        x='tipo_cliente',
+        y='monto_capital',
+        text='monto_capital',
+        color='tipo_cliente',
+        color_discrete_sequence=['#118DFF', '#E66C37']
+    )
+
+    fig.update_traces(
+        texttemplate='Bs %{text:,.0f}',
+        textposition='inside',
+        textfont=dict(size=12, color='white')
+    )
+    fig.update_layout(
+        height=350,
+        xaxis=dict(title="Tipo de Cliente", showgrid=False),
+        yaxis=dict(title="Monto Total (Bs)", showgrid=True, gridcolor='#f0f0f0'),
+        showlegend=False,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+def evolucion_figure(evolucion, titulo_x='Mes'):
+    """Área del monto otorgado por período (pestaña 1); titulo_x es la granularidad"""
+    # La serie se reduce en el servidor (LTTB) y pasa a WebGL si es larga
+    fig = go.Figure()
+
+    fig.add_trace(time_series_trace(
+        evolucion['Periodo'],
+        evolucion['Monto'],
+        name='Monto',
+        fill='tozeroy',
+        line=dict(color='#118DFF', width=2),
+        fillcolor='rgba(17, 141, 255, 0.2)'
+    ))
+
+    fig.update_layout(
+        height=350,
+        xaxis=dict(title=titulo_x, showgrid=False),
+        yaxis=dict(title='Monto (Bs)', showgrid=True, gridcolor='#f0f0f0'),
+        hovermode='x unified',
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+def morosos_figure(morosos):
+    """Barras horizontales de los clientes con más deuda vencida (pestaña 2)"""
+    fig = px.bar(
+        morosos,
+        x='Deuda',
+        y='Cliente',
+        orientation='h',
+        text='Deuda',
+        color_discrete_sequence=['#D64550']
+    )
+
+    fig.update_traces(
+        texttemplate='Bs %{text:,.0f}',
+        textposition='inside',
+        textfont=dict(size=10, color='white')
+    )
+    fig.update_layout(
+        height=400,
+        xaxis=dict(title="Deuda (Bs)", showgrid=True, gridcolor='#f0f0f0'),
+        yaxis=dict(title=""),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+def antiguedad_figure(antiguedad):
+    """Barras de deuda vencida por rango de mora; None si no hay vencidas (pestaña 2)"""
+    if antiguedad is None:
+        return None
+
+    fig = px.bar(
+        antiguedad,
+        x='rango_dias',
+        y='monto_total',
+        text='monto_total',
+        color='monto_total',
+        color_continuous_scale=['#ffc107', '#E66C37', '#D64550']
+    )
+
+    fig.update_traces(
+        texttemplate='Bs %{text:,.0f}',
+        textposition='outside'
+    )
+    fig.update_layout(
+        height=400,
+        xaxis=dict(title="Días de Mora", showgrid=False),
+        yaxis=dict(title="Monto (Bs)", showgrid=True, gridcolor='#f0f0f0'),
+        showlegend=False,
+        coloraxis_showscale=False,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+def escenarios_figure(escenarios):
+    """
+    Cobros programados (barras) frente a los esperados en la simulación
+    (línea) con su banda P5–P95 por semana; None si no hay (pestaña 2)
+    """
+    if len(escenarios) == 0:
+        return None
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=escenarios['periodo'],
+        y=escenarios['programado'],
+        name='Programado',
+        marker_color='#d9c2dd'
+    ))
+    fig.add_trace(go.Scatter(
+        x=escenarios['periodo'],
+        y=escenarios['p95'],
+        mode='lines',
+        line=dict(width=0),
+        showlegend=False,
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=escenarios['periodo'],
+        y=escenarios['p5'],
+        mode='lines',
+        line=dict(width=0),
+        fill='tonexty',
+        fillcolor='rgba(107,0,123,0.18)',
+        name='Banda P5–P95'
+    ))
+    fig.add_trace(go.Scatter(
+        x=escenarios['periodo'],
+        y=escenarios['esperado'],
+        mode='lines+markers',
+        name='Esperado',
+        line=dict(color='#6B007B', width=3),
+        marker=dict(size=6)
+    ))
+
+    # Total del horizonte: percentiles del acumulado por escenario
+    total = escenarios.iloc[-1]
+    fig.update_layout(
+        title=dict(
+            text=(f"Esperado: Bs {total['acumulado_esperado']:,.2f} "
+                  f"(P5 Bs {total['acumulado_p5']:,.2f} – P95 Bs {total['acumulado_p95']:,.2f}) "
+                  f"de Bs {escenarios['programado'].sum():,.2f} programados"),
+            font=dict(size=12)
+        ),
+        height=340,
+        xaxis=dict(title='Semana', showgrid=False),
+        yaxis=dict(title='Monto (Bs)', showgrid=True, gridcolor='#f0f0f0'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+def estado_creditos_figure(estado_dist):
+    """Torta de la cantidad de créditos por estado (pestaña 3)"""
+    fig = px.pie(
+        estado_dist,
+        values='Cantidad',
+        names='Estado',
+        hole=0.4,
+        color='Estado',
+        color_discrete_map={
+            'Activo': '#118DFF',
+            'Cancelado': '#28a745',
+            'Moroso': '#D64550'
+        }
+    )
+
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family='Segoe UI', size=11, color='#252423')
+    )
+    return fig
+
+
+# Figura de cada gráfico del motor (claves de motor.GRAFICOS) y de los
+# escenarios de cobranza (PortfolioView.collection_scenarios)
+FIGURAS = {
+    'estado_cuotas': estado_cuotas_figure,
+    'creditos_por_tipo': creditos_tipo_figure,
+    'evolucion_creditos': evolucion_figure,
+    'top_morosos': morosos_figure,
+    'antiguedad': antiguedad_figure,
+    'escenarios_cobro': escenarios_figure,
+    'estado_creditos': estado_creditos_figure,
+}
@@ -0,0 +1,233 @@
+"""
+=====================================================
+REFRESCO INCREMENTAL DESDE LA BASE
+Marcas de agua sobre fecha_actualizacion por tabla
+=====================================================
+
+La primera carga trae las tablas completas. Las siguientes solo leen las
+filas con COALESCE(fecha_actualizacion, fecha_creacion) igual o posterior
+a la última marca vista (las marcas tienen resolución de segundos, así que
+el límite se vuelve a leer) y las fusionan (upsert) por clave en los DataFrames en
+memoria. La recarga completa ocurre solo si cambia el esquema de alguna
+tabla o si se pide explícitamente.
+
+Los DataFrames nunca se modifican: cada refresco arma copias superficiales
+que solo reemplazan las columnas que cambian, así que los frames ya
+publicados en el DataStore siguen intactos.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.base_datos import (
+    CHUNK_SIZE,
+    load_clientes,
+    load_creditos,
+    load_cuotas,
+    read_schema_signature,
+    read_watermark,
+)
+
+
+CLAVES = {'clientes': 'id', 'creditos': 'id_credito', 'cuotas': 'id_cuota'}
+
+
+def _add_categories(serie, valores):
+    """Agrega a una columna categórica los valores que aún no tiene"""
+    nuevas = pd.Index(pd.unique(np.asarray(valores, dtype=object))).dropna().difference(serie.cat.categories)
+    return serie.cat.add_categories(nuevas) if len(nuevas) else serie
+
+
+def _align_dtypes(df, cambios):
+    """
+    Lleva los cambios (tipos de la base) a los tipos de df, que puede estar
+    compactado. Devuelve (df, cambios): df es una copia superficial cuyas
+    columnas categóricas ganan las categorías nuevas; el df recibido no cambia.
+    """
+    df = df.copy(deep=False)
+    cambios = cambios.copy()
+    for columna in cambios.columns:
+        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = _add_categories(df[columna], cambios[columna])
+        cambios[columna] = cambios[columna].astype(df[columna].dtype)
+    return df, cambios
+
+
+def upsert_by_key(df, cambios, clave):
+    """
+    Fusiona cambios en df por la columna clave (df ordenado por clave) y
+    devuelve un DataFrame nuevo; df no se modifica.
+
+    Las filas existentes se ubican por búsqueda binaria sobre la clave y
+    solo se copian las columnas en las que algún valor cambia; las nuevas se
+    agregan al final, reordenando solo si hace falta.
+    """
+    if cambios.empty:
+        return df
+    if df.empty:
+        return cambios.sort_values(clave, ignore_index=True)
+
+    df, cambios = _align_dtypes(df, cambios)
+    ids = df[clave].to_numpy()
+    nuevos_ids = cambios[clave].to_numpy()
+    posiciones = np.searchsorted(ids, nuevos_ids)
+    existe = posiciones < len(ids)
+    existe[existe] = ids[posiciones[existe]] == nuevos_ids[existe]
+
+    if existe.any():
+        filas = posiciones[existe]
+        for columna in cambios.columns:
+            valores = cambios[columna][existe].reset_index(drop=True)
+            if df[columna].iloc[filas].reset_index(drop=True).equals(valores):
+                continue
+            serie = df[columna].copy()
+            serie.iloc[filas] = valores.to_numpy()
+            df[columna] = serie
+
+    agregados = cambios[~existe]
+    if agregados.empty:
+        return df
+
+    resultado = pd.concat([df, agregados[df.columns]], ignore_index=True)
+    if agregados[clave].min() <= ids[-1] or not agregados[clave].is_monotonic_increasing:
+        resultado = resultado.sort_values(clave, ignore_index=True)
+    return resultado
+
+
+def _update_clientes(df, clientes):
+    """
+    Copia superficial de df con nombre_cliente y tipo_cliente tomados de
+    clientes (indexado por id) en sus filas; df si no tiene ninguna.
+    """
+    afectadas = np.flatnonzero(df['id_cliente'].isin(clientes.index).to_numpy())
+    if not len(afectadas):
+        return df
+
+    df = df.copy(deep=False)
+    ids = df['id_cliente'].to_numpy()[afectadas]
+    for destino, origen in (('nombre_cliente', 'nombre'), ('tipo_cliente', 'tipo')):
+        valores = clientes.loc[ids, origen].to_numpy()
+        serie = df[destino].copy()
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = _add_categories(serie, valores)
+        serie.iloc[afectadas] = valores
+        df[destino] = serie
+    return df
+
+
+class IncrementalLoader:
+    """
+    Mantiene en memoria (df_clientes, df_creditos, df_cuotas) sincronizados
+    con la base mediante marcas de agua por tabla.
+
+    connect_fn es una función sin argumentos que devuelve una conexión DB-API;
+    se abre una conexión por refresco. transform (por ejemplo compact_frames)
+    se aplica a los tres DataFrames tras cada recarga completa; los upserts
+    respetan los tipos resultantes. frames se reemplaza en cada refresco y
+    nunca se modifica, así que puede publicarse tal cual.
+    """
+
+    def __init__(self, connect_fn, chunk_size=CHUNK_SIZE, marcador='?', transform=None):
+        self.connect_fn = connect_fn
+        self.transform = transform
+        self.chunk_size = chunk_size
+        self.marcador = marcador
+        self.frames = None
+        self.watermarks = {}
+        self.schema = None
+        self.last_refresh = None
+        self.revision = 0
+        self.last_stats = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, full=False):
+        """Refresca los datos y devuelve (df_clientes, df_creditos, df_cuotas)"""
+        with self._lock:
+            conn = self.connect_fn()
+            try:
+                schema = read_schema_signature(conn)
+                if full or self.frames is None or schema != self.schema:
+                    self._full_reload(conn, schema)
+                else:
+                    self._incremental(conn)
+            finally:
+                conn.close()
+
+            self.last_refresh = time.time()
+            self.revision += 1
+            return self.frames
+
+    def update_frames(self, funcion):
+        """
+        Reemplaza los frames por funcion(frames), para cambios que ya se
+        escribieron en la base (el próximo refresco los vuelve a traer).
+        """
+        with self._lock:
+            if self.frames is not None:
+                self.frames = funcion(self.frames)
+                self.revision += 1
+            return self.frames
+
+    def refresh_if_stale(self, ttl):
+        """Refresca solo si pasaron más de ttl segundos desde el último refresco"""
+        if self.frames is not None and time.time() - self.last_refresh < ttl:
+            return self.frames
+        return self.refresh()
+
+    def _read_watermarks(self, conn):
+        # La marca se toma antes de leer: lo modificado durante la lectura
+        # vuelve a traerse en el siguiente refresco (el upsert es idempotente)
+        return {tabla: read_watermark(conn, tabla) for tabla in ('Clientes', 'Creditos', 'Cuotas')}
+
+    def _full_reload(self, conn, schema):
+        inicio = time.perf_counter()
+        marcas = self._read_watermarks(conn)
+        opciones = dict(chunk_size=self.chunk_size, marcador=self.marcador)
+
+        self.frames = (
+            load_clientes(conn, **opciones),
+            load_creditos(conn, **opciones),
+            load_cuotas(conn, **opciones),
+        )
+        if self.transform is not None:
+            self.frames = tuple(self.transform(*self.frames))
+        self.watermarks = marcas
+        self.schema = schema
+        self.last_stats = {
+            'modo': 'completo',
+            'filas': {nombre: len(df) for nombre, df in zip(CLAVES, self.frames)},
+            'segundos': time.perf_counter() - inicio,
+        }
+
+    def _incremental(self, conn):
+        inicio = time.perf_counter()
+        marcas = self._read_watermarks(conn)
+        opciones = dict(chunk_size=self.chunk_size, marcador=self.marcador)
+        df_clientes, df_creditos, df_cuotas = self.frames
+
+        cambios = {
+            'clientes': load_clientes(conn, desde=self.watermarks['Clientes'], **opciones),
+            'creditos': load_creditos(conn, desde=self.watermarks['Creditos'], **opciones),
+            'cuotas': load_cuotas(conn, desde=self.watermarks['Cuotas'], **opciones),
+        }
+
+        df_clientes = upsert_by_key(df_clientes, cambios['clientes'], CLAVES['clientes'])
+        df_creditos = upsert_by_key(df_creditos, cambios['creditos'], CLAVES['creditos'])
+        df_cuotas = upsert_by_key(df_cuotas, cambios['cuotas'], CLAVES['cuotas'])
+
+        # nombre_cliente y tipo_cliente están desnormalizados en créditos y cuotas
+        if not cambios['clientes'].empty:
+            clientes = cambios['clientes'].set_index('id')
+            df_creditos = _update_clientes(df_creditos, clientes)
+            df_cuotas = _update_clientes(df_cuotas, clientes)
+
+        self.frames = (df_clientes, df_creditos, df_cuotas)
+        self.watermarks = marcas
+        self.last_stats = {
+            'modo': 'incremental',
+            'filas': {nombre: len(df) for nombre, df in cambios.items()},
+            'segundos': time.perf_counter() - inicio,
+        }
@@ -0,0 +1,281 @@
+"""
+=====================================================
+SUITE DE RENDIMIENTO DEL DASHBOARD
+Tiempos de cada etapa a escalas fijas, con línea base y umbral
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.rendimiento --escalas 1k,100k \\
+        --salida rendimiento.json --base rendimiento_base.json --umbral 0.2
+
+    # Guardar los resultados como nueva línea base
+    python -m farmacia_creditos.rendimiento --escalas 1k,100k --guardar-base
+
+Cada escala genera una cartera con semilla y fecha fijas (mismos datos en
+cada corrida), la escribe y la vuelve a leer en Parquet y mide las etapas
+del dashboard: mora a la fecha de corte, índice y aplicación de filtros,
+KPIs, cubo, agregaciones de cada pestaña, calibración y simulación de los
+escenarios de cobranza y construcción de las figuras.
+
+Cada etapa se repite --repeticiones veces tras una ejecución de
+calentamiento y se guardan la mediana y el mínimo. Contra la línea base se
+compara el mínimo: si una etapa tarda más de (1 + umbral) veces lo
+guardado, y al menos MIN_DIFERENCIA_S más, el comando termina con código 1.
+Las etapas con una sola medición (la generación) se informan pero no se
+juzgan: una muestra no tiene mínimo que filtre el ruido.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.compacto import compact_frames
+from farmacia_creditos.cubo import PortfolioCube
+from farmacia_creditos.escenarios import CollectionSimulator
+from farmacia_creditos.filtros import FilterIndex
+from farmacia_creditos.generador import PLAZOS_MESES, read_portfolio_parquet, write_portfolio_parquet
+from farmacia_creditos.kpis import compute_kpis
+from farmacia_creditos.mora import AgingEngine
+from farmacia_creditos.motor import COLUMNAS_VENCIDAS, DIAS_PROYECCION, GRAFICOS, default_filters
+from farmacia_creditos.paginacion import PagedRows, sort_order
+from farmacia_creditos.paneles import FIGURAS
+
+
+# Escalas por cantidad aproximada de cuotas
+ESCALAS = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+ESCALAS_POR_DEFECTO = ['1k', '100k']
+
+SEMILLA = 42
+HOY = '2025-12-18'
+DIAS = 365
+CLIENTES_POR_CREDITO = 0.1
+
+REPETICIONES = 5
+UMBRAL = 0.2
+MIN_DIFERENCIA_S = 0.005
+
+# Gráficos de cada pestaña (los nombres de motor.GRAFICOS)
+PESTANAS = {
+    'pestana_estado': ['estado_cuotas', 'creditos_por_tipo', 'evolucion_creditos'],
+    'pestana_morosidad': ['top_morosos', 'antiguedad'],
+    'pestana_clientes': ['top_clientes_activos', 'estado_creditos'],
+}
+
+
+def portfolio_size(cuotas):
+    """(clientes, créditos) para generar aproximadamente `cuotas` cuotas"""
+    creditos = max(1, round(cuotas / float(np.mean(PLAZOS_MESES))))
+    return max(10, int(creditos * CLIENTES_POR_CREDITO)), creditos
+
+
+def _measure(funcion, repeticiones, calentamiento=0):
+    """
+    Ejecuta funcion() calentamiento veces sin medir y luego repeticiones
+    veces; devuelve (último resultado, tiempos en segundos). Como timeit, el
+    recolector de basura se desactiva durante cada medición para que sus
+    pausas no se atribuyan a la etapa.
+    """
+    for _ in range(calentamiento):
+        funcion()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        resultado = None
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+    return resultado, tiempos
+
+
+def _summary(tiempos):
+    return {'mediana_s': statistics.median(tiempos), 'min_s': min(tiempos), 'repeticiones': len(tiempos)}
+
+
+def run_scale(nombre, repeticiones=REPETICIONES, directorio=None, verbose=False):
+    """
+    Mide todas las etapas para la escala `nombre` (ver ESCALAS).
+    Devuelve un dict con el tamaño de la cartera y el tiempo de cada etapa.
+    """
+    n_clientes, n_creditos = portfolio_size(ESCALAS[nombre])
+    filtros = default_filters(HOY)
+    corte = filtros['fecha_corte']
+    etapas = {}
+
+    def medir(etapa, funcion, veces=repeticiones, calentamiento=1):
+        resultado, tiempos = _measure(funcion, veces, calentamiento)
+        etapas[etapa] = _summary(tiempos)
+        if verbose:
+            print(f"  {etapa:<20} {etapas[etapa]['min_s'] * 1000:>12,.1f} ms")
+        return resultado
+
+    with tempfile.TemporaryDirectory(dir=directorio) as ruta:
+        medir('generacion', lambda: write_portfolio_parquet(
+            ruta, n_clientes, n_creditos, dias=DIAS, seed=SEMILLA, today=HOY
+        ), veces=1, calentamiento=0)
+        df_clientes, df_creditos, df_cuotas = medir('carga', lambda: compact_frames(*read_portfolio_parquet(ruta)))
+
+    df_cuotas = medir('mora', lambda: AgingEngine(df_cuotas).at(corte))
+    indice = medir('indice', lambda: FilterIndex(df_creditos, df_cuotas))
+
+    def aplicar_filtros():
+        creditos = indice.filter_creditos(
+            df_creditos, filtros['tipo_cliente'], filtros['estado_credito'],
+            filtros['fecha_inicio'], filtros['fecha_fin']
+        )
+        return creditos, indice.filter_cuotas(df_cuotas, filtros['tipo_cliente'], filtros['estado_cuota'], creditos)
+
+    vista_creditos, vista_cuotas = medir('filtros', aplicar_filtros)
+    medir('kpis', lambda: compute_kpis(vista_creditos, vista_cuotas))
+    cubo = medir('cubo', lambda: PortfolioCube(df_creditos, df_cuotas))
+
+    datos_graficos = {}
+    for pestana, graficos in PESTANAS.items():
+        datos_graficos.update(medir(pestana, lambda: {
+            grafico: GRAFICOS[grafico](cubo, filtros) for grafico in graficos
+        }))
+
+    def detalle_cuotas():
+        vencida = (vista_cuotas.column('estado') == 'Vencida').to_numpy()
+        filas = vista_cuotas.filas if vista_cuotas.filas is not None else np.arange(len(vista_cuotas))
+        orden = sort_order(df_cuotas['dias_mora'], ascending=False)
+        return PagedRows(df_cuotas, orden, filas[vencida]).page(1, columnas=COLUMNAS_VENCIDAS)
+
+    medir('pestana_detalle', detalle_cuotas)
+
+    simulador = medir('escenarios_modelo', lambda: CollectionSimulator(df_clientes, df_cuotas, corte))
+    filas_vista = vista_cuotas.filas
+    datos_graficos['escenarios_cobro'] = medir('escenarios', lambda: simulador.simulate(filas_vista, DIAS_PROYECCION))
+    medir('figuras', lambda: [
+        construir(datos_graficos[grafico]) for grafico, construir in FIGURAS.items()
+    ])
+
+    return {
+        'clientes': n_clientes,
+        'creditos': len(df_creditos),
+        'cuotas': len(df_cuotas),
+        'etapas': etapas,
+    }
+
+
+def run_suite(escalas, repeticiones=REPETICIONES, directorio=None, verbose=False):
+    """Resultados de todas las escalas con los datos del entorno de ejecución"""
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'plataforma': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'semilla': SEMILLA,
+        'hoy': HOY,
+        'escalas': {},
+    }
+    for nombre in escalas:
+        if verbose:
+            print(f"[INFO] Escala {nombre} (~{ESCALAS[nombre]:,} cuotas)")
+        resultados['escalas'][nombre] = run_scale(nombre, repeticiones, directorio, verbose)
+    return resultados
+
+
+def compare_results(resultados, base, umbral=UMBRAL, min_diferencia=MIN_DIFERENCIA_S):
+    """
+    Compara el mínimo de cada etapa con la línea base. Devuelve una lista de
+    dicts (escala, etapa, base_s, actual_s, relacion, repetida, regresion)
+    con las etapas presentes en ambos; solo las medidas más de una vez en
+    los dos (repetida) pueden ser regresión.
+    """
+    comparacion = []
+    for escala, datos in resultados['escalas'].items():
+        etapas_base = base.get('escalas', {}).get(escala, {}).get('etapas', {})
+        for etapa, tiempos in datos['etapas'].items():
+            if etapa not in etapas_base:
+                continue
+            base_s = etapas_base[etapa]['min_s']
+            actual_s = tiempos['min_s']
+            repetida = min(tiempos['repeticiones'], etapas_base[etapa]['repeticiones']) > 1
+            comparacion.append({
+                'escala': escala,
+                'etapa': etapa,
+                'base_s': base_s,
+                'actual_s': actual_s,
+                'relacion': actual_s / base_s if base_s > 0 else float('inf'),
+                'repetida': repetida,
+                'regresion': repetida and actual_s > base_s * (1 + umbral) and actual_s - base_s > min_diferencia,
+            })
+    return comparacion
+
+
+def _write_json(ruta, datos):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mide el rendimiento del pipeline del dashboard de créditos')
+    parser.add_argument('--escalas', default=','.join(ESCALAS_POR_DEFECTO),
+                        help=f"Escalas separadas por comas ({', '.join(ESCALAS)})")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES, help='Repeticiones de cada etapa')
+    parser.add_argument('--salida', default='rendimiento.json', help='Archivo JSON con los resultados')
+    parser.add_argument('--base', default='rendimiento_base.json', help='Línea base con la que comparar')
+    parser.add_argument('--umbral', type=float, default=UMBRAL, help='Aumento relativo tolerado (0.2 = 20%%)')
+    parser.add_argument('--guardar-base', action='store_true', help='Guardar los resultados como línea base')
+    parser.add_argument('--tmp', default=None, help='Carpeta para los Parquet temporales')
+    args = parser.parse_args(argv)
+
+    escalas = [escala.strip() for escala in args.escalas.split(',') if escala.strip()]
+    desconocidas = [escala for escala in escalas if escala not in ESCALAS]
+    if desconocidas:
+        parser.error(f"Escalas desconocidas: {', '.join(desconocidas)}")
+
+    resultados = run_suite(escalas, args.repeticiones, args.tmp, verbose=True)
+    _write_json(args.salida, resultados)
+    print(f"\n[SUCCESS] Resultados en '{args.salida}'")
+
+    if args.guardar_base:
+        _write_json(args.base, resultados)
+        print(f"[SUCCESS] Línea base guardada en '{args.base}'")
+        return 0
+
+    if not os.path.exists(args.base):
+        print(f"[INFO] No hay línea base en '{args.base}' (usa --guardar-base para crearla)")
+        return 0
+
+    with open(args.base, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+
+    comparacion = compare_results(resultados, base, args.umbral)
+    regresiones = [fila for fila in comparacion if fila['regresion']]
+    print(f"\nComparación con '{args.base}' (umbral {args.umbral:.0%}):")
+    for fila in comparacion:
+        marca = 'REGRESIÓN' if fila['regresion'] else 'ok' if fila['repetida'] else 'una medición, sin umbral'
+        print(f"  {fila['escala']:>5} {fila['etapa']:<20} {fila['base_s'] * 1000:>10,.1f} ms → "
+              f"{fila['actual_s'] * 1000:>10,.1f} ms  ({fila['relacion']:.2f}x) {marca}")
+
+    if regresiones:
+        print(f"\n[ERROR] {len(regresiones)} etapa(s) más lentas que la línea base")
+        return 1
+    print("\n[SUCCESS] Sin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+=====================================================
+VENCIMIENTO INCREMENTAL DE CUOTAS
+Reemplazo de sp_ActualizarCuotasVencidas que solo mira lo nuevo
+=====================================================
+
+Uso:
+    python -m farmacia_creditos.vencimientos --db sqlite:///farmacia.db --estado vencimientos.json
+
+sp_ActualizarCuotasVencidas recorre todas las cuotas Pendientes con
+fecha_programada < GETDATE() y vuelve a derivar los créditos Morosos desde
+todas las cuotas Vencidas: tarda más a medida que crece el historial.
+OverdueJob parte del día hasta el que ya corrió (y del último id_cuota
+visto) y en cada corrida solo toca:
+
+- las cuotas Pendientes con fecha_programada en [última corrida, hoy), por
+  rango sobre idx_cuotas_fecha_programada en la base o por búsqueda binaria
+  sobre el orden de fecha_programada en memoria;
+- las cuotas creadas después de la corrida anterior (id_cuota mayor al
+  último visto) que ya estaban vencidas, por ejemplo de una migración;
+- los créditos Activos de esas cuotas, que pasan a Moroso.
+
+Como el motor de mora, una cuota vence el día siguiente a fecha_programada.
+La base se actualiza en una transacción (con fecha_actualizacion, que ve
+el refresco incremental) y los mismos ids se aplican a los DataFrames del
+dashboard, que se publican como una versión nueva: nunca se modifican las
+instantáneas en uso. Una corrida sin límite inferior revisa todo, como el
+procedimiento.
+
+La marca de la base (última corrida y último id_cuota) la guarda OverdueJob,
+opcionalmente en un JSON. La de unos DataFrames en memoria pertenece a esos
+frames: run_frames la recibe y la devuelve, y quien los tiene la guarda con
+ellos (el motor, en la instantánea). Frames recargados no tienen marca y se
+revisan completos.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.base_datos import LOTE_IDS, _build_where, _read_by_ids, _read_chunks, connect
+from farmacia_creditos.mora import _day_numbers, as_of_day
+from farmacia_creditos.pagos import BLOQUEO
+from farmacia_creditos.refresco import _add_categories
+
+
+USUARIO = 'vencimientos'
+
+COLUMNAS_VENCIDAS = [
+    ('id_cuota', 'id_cuota', 'int'),
+    ('id_credito', 'id_credito', 'int'),
+    ('estado', 'estado', 'str'),
+]
+
+
+def due_date_order(df_cuotas):
+    """
+    Posiciones de df_cuotas ordenadas por fecha_programada y los días
+    (desde 1970-01-01) en ese orden, para buscar rangos de vencimiento.
+    """
+    dias = _day_numbers(df_cuotas['fecha_programada'])
+    orden = np.argsort(dias, kind='stable')
+    return orden, dias[orden]
+
+
+def _day(fecha):
+    return int(fecha.to_datetime64().astype('datetime64[D]').astype(np.int64))
+
+
+def _with_state(df, clave, ids, estado):
+    """Copia de df (ordenado por clave) con `estado` en las filas de ids; df si no hay ninguna"""
+    if df.empty or not len(ids):
+        return df
+    claves = df[clave].to_numpy()
+    posiciones = np.searchsorted(claves, ids)
+    existe = posiciones < len(claves)
+    existe[existe] = claves[posiciones[existe]] == np.asarray(ids)[existe]
+    if not existe.any():
+        return df
+
+    serie = df['estado'].copy()
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = _add_categories(serie, [estado])
+    serie.iloc[posiciones[existe]] = estado
+    nuevo = df.copy(deep=False)
+    nuevo['estado'] = serie
+    return nuevo
+
+
+def _update_state(cursor, tabla, clave, ids, estado, previo, usuario, marcador, sqlite, lote=LOTE_IDS):
+    """
+    Pasa a `estado` las filas de ids que siguen en `previo`, por bloques de
+    lote ids, y devuelve las claves efectivamente actualizadas (RETURNING en
+    SQLite, OUTPUT inserted en SQL Server).
+    """
+    m = marcador
+    actualizadas = []
+    for inicio in range(0, len(ids), lote):
+        bloque = ids[inicio:inicio + lote].tolist()
+        where, params = _build_where([(clave, 'IN', bloque), ('estado', '=', previo)], m)
+        salida = ('', f" RETURNING {clave}") if sqlite else (f" OUTPUT inserted.{clave}", '')
+        cursor.execute(
+            f"UPDATE {tabla} SET estado = '{estado}', usuario_actualizacion = {m}, "
+            f"fecha_actualizacion = CURRENT_TIMESTAMP{salida[0]}{where}{salida[1]}",
+            [usuario] + params
+        )
+        actualizadas.extend(fila[0] for fila in cursor.fetchall())
+    return np.sort(np.asarray(actualizadas, dtype=np.int64))
+
+
+def apply_overdue(frames, ids_cuotas, ids_creditos):
+    """
+    (df_clientes, df_creditos, df_cuotas) nuevos con las cuotas ids_cuotas
+    Vencidas y los créditos ids_creditos Morosos. Solo se copia la columna
+    estado de los DataFrames que cambian.
+    """
+    df_clientes, df_creditos, df_cuotas = frames
+    return (
+        df_clientes,
+        _with_state(df_creditos, 'id_credito', ids_creditos, 'Moroso'),
+        _with_state(df_cuotas, 'id_cuota', ids_cuotas, 'Vencida'),
+    )
+
+
+class OverdueJob:
+    """
+    Marca cuotas Vencidas y créditos Morosos desde la corrida anterior.
+
+    ultima_corrida y ultimo_id_cuota son la marca de la base (run_db);
+    estado_path (opcional) es un JSON donde se guardan, para que una tarea
+    programada continúe donde quedó. run_frames no los usa ni los cambia.
+    last_stats tiene las filas tocadas y la duración de la última corrida.
+    """
+
+    def __init__(self, estado_path=None):
+        self.estado_path = estado_path
+        self.ultima_corrida = None
+        self.ultimo_id_cuota = None
+        self.last_stats = {}
+        self._lock = threading.Lock()
+        if estado_path and os.path.exists(estado_path):
+            with open(estado_path, encoding='utf-8') as archivo:
+                estado = json.load(archivo)
+            self.ultima_corrida = as_of_day(estado['ultima_corrida']) if estado.get('ultima_corrida') else None
+            self.ultimo_id_cuota = estado.get('ultimo_id_cuota')
+
+    def _save(self, hasta, ultimo_id):
+        self.ultima_corrida = hasta
+        self.ultimo_id_cuota = ultimo_id
+        if self.estado_path:
+            with open(self.estado_path, 'w', encoding='utf-8') as archivo:
+                json.dump({'ultima_corrida': hasta.strftime('%Y-%m-%d'), 'ultimo_id_cuota': ultimo_id}, archivo)
+
+    def _record(self, origen, desde, hasta, cuotas, creditos, inicio):
+        self.last_stats = {
+            'origen': origen,
+            'desde': desde,
+            'hasta': hasta,
+            'cuotas': len(cuotas),
+            'creditos': len(creditos),
+            'segundos': time.perf_counter() - inicio,
+        }
+
+    def run_db(self, conn, hoy=None, usuario=USUARIO, marcador='?'):
+        """
+        Actualiza la base en una transacción. Devuelve los ids de cuotas que
+        pasaron a Vencida y de créditos que pasaron a Moroso, según las filas
+        que cambiaron los UPDATE.
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            hasta = as_of_day(hoy)
+            desde = self.ultima_corrida
+            sqlite = isinstance(conn, sqlite3.Connection)
+            m = marcador
+
+            with conn:
+                cursor = conn.cursor()
+                try:
+                    if sqlite and not conn.in_transaction:
+                        # Bloqueo de escritura antes de leer las cuotas a vencer
+                        cursor.execute("BEGIN IMMEDIATE")
+                    # En SQL Server, las filas leídas quedan bloqueadas hasta el
+                    # commit, como en pagos: un pago no las cambia entre la
+                    # lectura y el UPDATE
+                    bloqueo = '' if sqlite else BLOQUEO
+                    # Con límite inferior, solo el rango de fechas en el WHERE: así se
+                    # usa idx_cuotas_fecha_programada y no idx_cuotas_estado (que
+                    # recorrería todas las Pendientes); el estado se filtra al leer
+                    consulta = f"SELECT id_cuota, id_credito, estado FROM Cuotas{bloqueo}"
+                    antes_de_hoy = ('fecha_programada', '<', hasta.strftime('%Y-%m-%d'))
+                    if desde is None:
+                        condiciones = [('estado', '=', 'Pendiente'), antes_de_hoy]
+                    else:
+                        condiciones = [('fecha_programada', '>=', desde.strftime('%Y-%m-%d')), antes_de_hoy]
+                    where, params = _build_where(condiciones, m)
+                    vencidas = [_read_chunks(conn, consulta + where, params, COLUMNAS_VENCIDAS)]
+                    if desde is not None and self.ultimo_id_cuota is not None:
+                        # Con el estado, SQLite busca por (estado, rowid) y no por la fecha
+                        where, params = _build_where(
+                            [('id_cuota', '>', self.ultimo_id_cuota), ('estado', '=', 'Pendiente'), antes_de_hoy], m
+                        )
+                        vencidas.append(_read_chunks(conn, consulta + where, params, COLUMNAS_VENCIDAS))
+                    vencidas = pd.concat(vencidas, ignore_index=True).drop_duplicates('id_cuota')
+                    vencidas = vencidas[vencidas['estado'] == 'Pendiente']
+
+                    creditos = _read_by_ids(
+                        conn, f"SELECT id_credito, estado FROM Creditos{bloqueo}", 'id_credito',
+                        pd.unique(vencidas['id_credito'].to_numpy()),
+                        [('id_credito', 'id_credito', 'int'), ('estado', 'estado', 'str')], m
+                    )
+
+                    # Solo las filas que el UPDATE cambió se devuelven y se
+                    # aplican a los DataFrames
+                    ids_cuotas = _update_state(cursor, 'Cuotas', 'id_cuota', vencidas['id_cuota'].to_numpy(),
+                                               'Vencida', 'Pendiente', usuario, m, sqlite)
+                    morosos = _update_state(
+                        cursor, 'Creditos', 'id_credito',
+                        creditos.loc[creditos['estado'] == 'Activo', 'id_credito'].to_numpy(),
+                        'Moroso', 'Activo', usuario, m, sqlite
+                    )
+                    cursor.execute("SELECT MAX(id_cuota) FROM Cuotas")
+                    ultimo_id = cursor.fetchone()[0]
+                finally:
+                    cursor.close()
+
+            self._save(hasta, ultimo_id)
+            self._record('base', desde, hasta, ids_cuotas, morosos, inicio)
+            return {'cuotas': ids_cuotas, 'creditos': morosos}
+
+    def run_frames(self, frames, hoy=None, orden=None, desde=None, ultimo_id_cuota=None):
+        """
+        Misma corrida sobre DataFrames en memoria (sin base de datos).
+
+        desde y ultimo_id_cuota son la marca de la corrida anterior sobre
+        estos frames; sin desde se revisan todas las cuotas. orden es
+        due_date_order(df_cuotas), si ya se calculó. Devuelve los frames
+        nuevos y los cambios: ids de cuotas y créditos, y la marca para la
+        próxima corrida ('hasta' y 'ultimo_id_cuota').
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            hasta = as_of_day(hoy)
+            desde = as_of_day(desde) if desde is not None else None
+            df_creditos, df_cuotas = frames[1], frames[2]
+            orden, dias = orden if orden is not None else due_date_order(df_cuotas)
+
+            # Rango de vencimiento por búsqueda binaria sobre fecha_programada
+            fin = np.searchsorted(dias, _day(hasta), side='left')
+            comienzo = np.searchsorted(dias, _day(desde), side='left') if desde is not None else 0
+            posiciones = orden[comienzo:fin]
+
+            ids = df_cuotas['id_cuota'].to_numpy()
+            if desde is not None and ultimo_id_cuota is not None and len(ids):
+                nuevas = np.arange(np.searchsorted(ids, ultimo_id_cuota, side='right'), len(ids))
+                nuevas = nuevas[_day_numbers(df_cuotas['fecha_programada'].iloc[nuevas]) < _day(hasta)]
+                posiciones = np.union1d(posiciones, nuevas)
+
+            pendiente = (df_cuotas['estado'].iloc[posiciones] == 'Pendiente').to_numpy()
+            posiciones = posiciones[pendiente]
+            ids_cuotas = ids[posiciones]
+
+            id_credito = pd.unique(df_cuotas['id_credito'].to_numpy()[posiciones])
+            activos = df_creditos['id_credito'].isin(id_credito) & (df_creditos['estado'] == 'Activo')
+            morosos = df_creditos.loc[activos, 'id_credito'].to_numpy()
+
+            nuevos = apply_overdue(frames, ids_cuotas, morosos)
+            ultimo_id = int(ids[-1]) if len(ids) else ultimo_id_cuota
+            self._record('memoria', desde, hasta, ids_cuotas, morosos, inicio)
+            return nuevos, {'cuotas': ids_cuotas, 'creditos': morosos, 'hasta': hasta, 'ultimo_id_cuota': ultimo_id}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Marca cuotas vencidas y créditos morosos desde la última corrida')
+    parser.add_argument('--db', required=True, help="Base de datos ('sqlite:///ruta.db' o cadena ODBC)")
+    parser.add_argument('--estado', default='vencimientos.json', help='JSON con la última corrida')
+    parser.add_argument('--hoy', default=None, help='Día de la corrida (YYYY-MM-DD, por defecto hoy)')
+    parser.add_argument('--usuario', default=USUARIO, help='Usuario de auditoría')
+    args = parser.parse_args(argv)
+
+    trabajo = OverdueJob(args.estado)
+    conn = connect(args.db)
+    try:
+        trabajo.run_db(conn, args.hoy, args.usuario)
+    finally:
+        conn.close()
+
+    stats = trabajo.last_stats
+    desde = stats['desde'].strftime('%Y-%m-%d') if stats['desde'] is not None else 'inicio'
+    print(f"[SUCCESS] {stats['cuotas']:,} cuotas vencidas y {stats['creditos']:,} créditos morosos "
+          f"({desde} a {stats['hasta']:%Y-%m-%d}) en {stats['segundos']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,16 @@ Fecha: 2025-12-18
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import numpy as np
+import functools
+import os
+import uuid
+
+# Solo módulos livianos antes del encabezado: pandas, el motor y Plotly se
+# importan más abajo, con el esqueleto de KPIs ya en pantalla
+from farmacia_creditos.arranque import record_first_kpi, shared_engine, start_warm_up, startup_stats
+from farmacia_creditos.figuras import FigureCache
+from farmacia_creditos.instrumentacion import JsonlExporter, RerunTimer
 
 # Configuración de la página
 st.set_page_config(
@@ -90,15 +95,19 @@ st.markdown("""
     .card-cobrar { border-left-color: #6B007B; }
     .card-morosidad { border-left-color: #D9B300; }
 
-    .stTabs [data-baseweb="tab-list"] {
+    .powerbi-card h2.cargando { color: #c8c6c4; }
+
+    /* Selector de pestañas (st.radio horizontal con aspecto de pestañas) */
+    .st-key-pestana [role="radiogroup"] {
         gap: 0;
         background-color: transparent;
         padding: 0;
         border-bottom: 1px solid #e0e0e0;
     }
 
-    .stTabs [data-baseweb="tab"] {
+    .st-key-pestana [data-baseweb="radio"] {
         height: 44px;
+        margin: 0;
         padding: 0 16px;
         background-color: transparent;
         border-radius: 0;
@@ -108,7 +117,11 @@ st.markdown("""
         border-bottom: 2px solid transparent;
     }
 
-    .stTabs [aria-selected="true"] {
+    .st-key-pestana [data-baseweb="radio"] > div:first-child {
+        display: none;
+    }
+
+    .st-key-pestana [data-baseweb="radio"]:has(input:checked) {
         background-color: transparent;
         color: #252423;
         border-bottom: 2px solid #0078d4;
@@ -147,125 +160,163 @@ st.markdown("""
 
 
 # =====================================================
-# GENERACIÓN DE DATOS DE EJEMPLO
+# INSTRUMENTACIÓN
 # =====================================================
 
-@st.cache_data
-def generate_sample_data():
-    """Genera datos de ejemplo para el sistema de créditos"""
-
-    np.random.seed(42)
-
-    # Fechas
-    today = datetime.now()
-    start_date = today - timedelta(days=365)
-
-    # Clientes Naturales (5)
-    clientes_natural = [
-        {'id': 1, 'nombre': 'Juan Pérez García', 'tipo': 'Natural', 'nit': '12345001', 'telefono': '555-1001', 'riesgo': 'Bajo'},
-        {'id': 2, 'nombre': 'María López Sánchez', 'tipo': 'Natural', 'nit': '12345002', 'telefono': '555-1002', 'riesgo': 'Bajo'},
-        {'id': 3, 'nombre': 'Carlos Rodríguez Méndez', 'tipo': 'Natural', 'nit': '12345003', 'telefono': '555-1003', 'riesgo': 'Medio'},
-        {'id': 4, 'nombre': 'Ana Martínez Torres', 'tipo': 'Natural', 'nit': '12345004', 'telefono': '555-1004', 'riesgo': 'Bajo'},
-        {'id': 5, 'nombre': 'Luis Gómez Ramírez', 'tipo': 'Natural', 'nit': '12345005', 'telefono': '555-1005', 'riesgo': 'Alto'}
-    ]
-
-    # Clientes Jurídicos (5)
-    clientes_juridico = [
-        {'id': 6, 'nombre': 'Farmacia Central S.A.', 'tipo': 'Jurídico', 'nit': '987654001', 'telefono': '555-2001', 'razon_social': 'Farmacia Central Sociedad Anónima', 'riesgo': 'Bajo'},
-        {'id': 7, 'nombre': 'Distribuidora Médica Ltda.', 'tipo': 'Jurídico', 'nit': '987654002', 'telefono': '555-2002', 'razon_social': 'Distribuidora Médica Limitada', 'riesgo': 'Medio'},
-        {'id': 8, 'nombre': 'Clínica San Rafael', 'tipo': 'Jurídico', 'nit': '987654003', 'telefono': '555-2003', 'razon_social': 'Clínica San Rafael S.A.', 'riesgo': 'Bajo'},
-        {'id': 9, 'nombre': 'Hospital Metropolitano', 'tipo': 'Jurídico', 'nit': '987654004', 'telefono': '555-2004', 'razon_social': 'Hospital Metropolitano S.A.', 'riesgo': 'Bajo'},
-        {'id': 10, 'nombre': 'Laboratorios Unidos S.A.', 'tipo': 'Jurídico', 'nit': '987654005', 'telefono': '555-2005', 'razon_social': 'Laboratorios Unidos Sociedad Anónima', 'riesgo': 'Medio'}
-    ]
-
-    df_clientes = pd.DataFrame(clientes_natural + clientes_juridico)
-
-    # Créditos
-    creditos_data = []
-    for i in range(200):
-        cliente = df_clientes.sample(1).iloc[0]
-        monto_capital = np.random.uniform(500, 15000)
-        tasa_interes = np.random.uniform(5, 18)
-        fecha_desembolso = start_date + timedelta(days=np.random.randint(0, 365))
-        plazo_meses = np.random.choice([3, 6, 12, 18, 24])
-
-        creditos_data.append({
-            'id_credito': i + 1,
-            'id_cliente': cliente['id'],
-            'nombre_cliente': cliente['nombre'],
-            'tipo_cliente': cliente['tipo'],
-            'monto_capital': monto_capital,
-            'tasa_interes': tasa_interes,
-            'fecha_desembolso': fecha_desembolso,
-            'plazo_meses': plazo_meses,
-            'estado': np.random.choice(['Activo', 'Cancelado', 'Moroso'], p=[0.6, 0.25, 0.15])
-        })
-
-    df_creditos = pd.DataFrame(creditos_data)
-
-    # Cuotas
-    cuotas_data = []
-    cuota_id = 1
-
-    for _, credito in df_creditos.iterrows():
-        monto_cuota = credito['monto_capital'] / credito['plazo_meses']
-        interes_mensual = (credito['monto_capital'] * credito['tasa_interes'] / 100) / 12
-
-        for mes in range(credito['plazo_meses']):
-            fecha_programada = credito['fecha_desembolso'] + timedelta(days=30 * (mes + 1))
-
-            # Determinar si está pagada, vencida o pendiente
-            if fecha_programada < today - timedelta(days=30):
-                if credito['estado'] == 'Moroso' and np.random.random() > 0.3:
-                    estado_cuota = 'Vencida'
-                    fecha_pago = None
-                    dias_mora = (today - fecha_programada).days
-                else:
-                    estado_cuota = 'Pagada'
-                    fecha_pago = fecha_programada + timedelta(days=np.random.randint(-5, 10))
-                    dias_mora = max(0, (fecha_pago - fecha_programada).days)
-            elif fecha_programada < today:
-                if np.random.random() > 0.7:
-                    estado_cuota = 'Vencida'
-                    fecha_pago = None
-                    dias_mora = (today - fecha_programada).days
-                else:
-                    estado_cuota = 'Pagada'
-                    fecha_pago = fecha_programada + timedelta(days=np.random.randint(-3, 5))
-                    dias_mora = max(0, (fecha_pago - fecha_programada).days)
-            else:
-                estado_cuota = 'Pendiente'
-                fecha_pago = None
-                dias_mora = 0
-
-            cuotas_data.append({
-                'id_cuota': cuota_id,
-                'id_credito': credito['id_credito'],
-                'id_cliente': credito['id_cliente'],
-                'nombre_cliente': credito['nombre_cliente'],
-                'tipo_cliente': credito['tipo_cliente'],
-                'numero_cuota': mes + 1,
-                'monto_capital': monto_cuota,
-                'interes': interes_mensual,
-                'monto_total': monto_cuota + interes_mensual,
-                'fecha_programada': fecha_programada,
-                'fecha_pago': fecha_pago,
-                'estado': estado_cuota,
-                'dias_mora': dias_mora
-            })
-            cuota_id += 1
-
-    df_cuotas = pd.DataFrame(cuotas_data)
-
-    return df_clientes, df_creditos, df_cuotas
+@st.cache_resource
+def get_timings_exporter():
+    """Exportador JSONL de los tiempos de cada rerun (FARMACIA_TIEMPOS_JSONL); None si no se define"""
+    ruta = os.environ.get('FARMACIA_TIEMPOS_JSONL')
+    return JsonlExporter(ruta) if ruta else None
+
+
+def debug_enabled():
+    """Panel de tiempos: FARMACIA_DEBUG=1 o ?debug=1 en la URL"""
+    return os.environ.get('FARMACIA_DEBUG') == '1' or st.query_params.get('debug') == '1'
+
+
+def start_timer(tipo='rerun'):
+    """Temporizador nuevo para este rerun, guardado en la sesión"""
+    if 'id_sesion' not in st.session_state:
+        st.session_state['id_sesion'] = uuid.uuid4().hex[:12]
+    # Un rerun interrumpido (el usuario cambió un widget) no llega a cerrar el suyo
+    anterior = st.session_state.get('temporizador')
+    if anterior is not None and not anterior.terminado:
+        anterior.finish()
+
+    temporizador = RerunTimer(tipo, st.session_state['id_sesion'], perfilar=st.session_state.get('perfilar', False))
+    st.session_state['temporizador'] = temporizador
+    return temporizador
+
+
+def finish_timer(temporizador):
+    """Cierra el temporizador y exporta su registro si hay exportador"""
+    registro = temporizador.finish()
+    exportador = get_timings_exporter()
+    if exportador is not None:
+        exportador.write(registro)
+    return registro
+
+
+def timed_section(nombre, **datos):
+    """Sección del temporizador del rerun en curso"""
+    return st.session_state['temporizador'].section(nombre, **datos)
+
+
+def timed_fragment(nombre):
+    """
+    Mide el cuerpo de un fragmento como una sección. En un rerun solo del
+    fragmento (el temporizador de la sesión ya se cerró) abre y exporta un
+    registro propio de tipo 'fragmento'.
+    """
+    def decorador(render):
+        @functools.wraps(render)
+        def envoltura(*args, **kwargs):
+            temporizador = st.session_state.get('temporizador')
+            propio = temporizador is None or temporizador.terminado
+            if propio:
+                temporizador = start_timer('fragmento')
+                temporizador.datos['pestana'] = nombre
+            with temporizador.section(f'pestaña: {nombre}'):
+                render(*args, **kwargs)
+            if propio:
+                finish_timer(temporizador)
+        return envoltura
+    return decorador
+
+
+def kpi_card(titulo, clase, valor, cargando=False):
+    """HTML de una tarjeta de KPI; con cargando=True el valor se atenúa"""
+    return f"""
+        <div class="powerbi-card {clase}">
+            <h3>{titulo}</h3>
+            <h2{' class="cargando"' if cargando else ''}>{valor}</h2>
+        </div>
+    """
+
+
+# Tiempos de este rerun (panel de depuración y exportación JSONL)
+temporizador = start_timer()
+
+# Datos y agregados de la selección por defecto en un hilo de fondo (una vez
+# por proceso; con python -m farmacia_creditos.arranque ya empezó al iniciar)
+start_warm_up()
 
 
 # =====================================================
-# CARGAR DATOS
+# HEADER DEL DASHBOARD
 # =====================================================
 
-with st.spinner('Cargando datos de créditos...'):
-    df_clientes, df_creditos, df_cuotas = generate_sample_data()
+st.markdown("""
+    <div class="powerbi-header">
+        <h1>💊 Farmacia - Sistema de Gestión de Créditos y Cobranzas</h1>
+    </div>
+""", unsafe_allow_html=True)
+
+# Esqueleto de los KPIs: se muestra antes de importar y cargar los datos y
+# cada tarjeta se reemplaza al tener su valor
+TARJETAS = [
+    ('Créditos Otorgados', 'card-creditos'),
+    ('Deuda Impaga', 'card-impaga'),
+    ('Cuotas Vencidas', 'card-vencido'),
+    ('Por Cobrar', 'card-cobrar'),
+    ('Tasa Morosidad', 'card-morosidad'),
+]
+tarjetas = [columna.empty() for columna in st.columns(len(TARJETAS))]
+for tarjeta, (titulo, clase) in zip(tarjetas, TARJETAS):
+    tarjeta.markdown(kpi_card(titulo, clase, '—', cargando=True), unsafe_allow_html=True)
+
+
+# =====================================================
+# MOTOR DE LA CARTERA
+# =====================================================
+
+with temporizador.section('importaciones'):
+    from farmacia_creditos.compacto import memory_report
+    from farmacia_creditos.motor import COLUMNAS_VENCIDAS, PortfolioView, normalize_filters
+    from farmacia_creditos.paginacion import TAMANO_PAGINA, PagedRows
+
+
+def show_paged_table(tabla, clave, columnas, nombres, column_config, tamano=TAMANO_PAGINA, height=400):
+    """Muestra la página elegida de un PagedRows; el formato lo da column_config"""
+    pagina = 1
+    if tabla.n_paginas(tamano) > 1:
+        pagina = st.number_input(
+            f"Página (de {tabla.n_paginas(tamano):,})",
+            min_value=1,
+            max_value=tabla.n_paginas(tamano),
+            value=1,
+            step=1,
+            key=clave
+        )
+        inicio = (pagina - 1) * tamano
+        st.caption(f"Filas {inicio + 1:,}–{min(inicio + tamano, len(tabla)):,} de {len(tabla):,}")
+
+    datos_pagina = tabla.page(pagina, tamano, columnas)
+    datos_pagina.columns = nombres
+    st.dataframe(
+        datos_pagina,
+        use_container_width=True,
+        height=height,
+        hide_index=True,
+        column_config=column_config
+    )
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Caché LRU de figuras Plotly, una por proceso y compartida entre sesiones"""
+    return FigureCache(int(float(os.environ.get('FARMACIA_FIGURAS_MB', 64)) * 1024 * 1024))
+
+
+def cached_figure(clave, construir):
+    """Figura de la caché compartida; construir() solo se llama en un fallo"""
+    cache = get_figure_cache()
+    with timed_section(f'figura: {clave[0]}') as seccion:
+        fig = cache.get_or_build(clave, construir)
+    # Bytes del JSON que se envía al navegador
+    seccion['bytes'] = cache.size_of(clave)
+    return fig
 
 
 # =====================================================
@@ -286,6 +337,12 @@ fecha_fin = st.sidebar.date_input(
     value=datetime.now(),
     max_value=datetime.now()
 )
+fecha_corte = st.sidebar.date_input(
+    "Fecha de corte (mora)",
+    value=datetime.now(),
+    max_value=datetime.now(),
+    help="Estado y días de mora de las cuotas calculados a esta fecha"
+)
 
 # Filtro de tipo de cliente
 st.sidebar.subheader("Tipo de Cliente")
@@ -313,87 +370,94 @@ estado_cuota = st.sidebar.multiselect(
 
 
 # =====================================================
-# APLICAR FILTROS
+# CARGAR DATOS
 # =====================================================
 
-# Filtrar créditos
-df_creditos_filtered = df_creditos[
-    (df_creditos['tipo_cliente'].isin(tipo_cliente)) &
-    (df_creditos['estado'].isin(estado_credito)) &
-    (df_creditos['fecha_desembolso'] >= pd.to_datetime(fecha_inicio)) &
-    (df_creditos['fecha_desembolso'] <= pd.to_datetime(fecha_fin))
-].copy()
-
-# Filtrar cuotas
-df_cuotas_filtered = df_cuotas[
-    (df_cuotas['tipo_cliente'].isin(tipo_cliente)) &
-    (df_cuotas['estado'].isin(estado_cuota))
-].copy()
+# La fuente la eligen FARMACIA_DB ('sqlite:///ruta.db' o cadena ODBC) y
+# FARMACIA_DATOS_PARQUET; con FARMACIA_DB_INCREMENTAL=1 las tablas quedan en
+# memoria y cada FARMACIA_DB_TTL segundos solo se traen las filas modificadas.
+# El motor es uno por proceso, compartido por todas las sesiones.
+motor = shared_engine()
+
+recargar = False
+if motor.incremental:
+    recargar = st.sidebar.button("🔄 Recargar datos")
+
+filtros = normalize_filters({
+    'tipo_cliente': tipo_cliente,
+    'estado_credito': estado_credito,
+    'estado_cuota': estado_cuota,
+    'fecha_inicio': fecha_inicio,
+    'fecha_fin': fecha_fin,
+    'fecha_corte': fecha_corte,
+})
+
+# Los DataFrames viven una sola vez en el almacén del motor
+with st.spinner('Cargando datos de créditos...'):
+    with temporizador.section('carga') as seccion:
+        datos = motor.snapshot(filtros, recargar=recargar)
+        seccion['filas'] = len(datos.frames[2])
+    if recargar:
+        get_figure_cache().invalidate()
 
 
 # =====================================================
-# HEADER DEL DASHBOARD
+# APLICAR FILTROS
 # =====================================================
 
-st.markdown("""
-    <div class="powerbi-header">
-        <h1>💊 Farmacia - Sistema de Gestión de Créditos y Cobranzas</h1>
-    </div>
-""", unsafe_allow_html=True)
+# La vista aplica la fecha de corte (estado y mora) y los filtros combinando
+# bitmaps precalculados, sin copiar filas
+with temporizador.section('filtros') as seccion:
+    vista = PortfolioView(datos, filtros)
+    seccion['filas'] = len(vista.cuotas)
+temporizador.datos['version'] = datos.version
+
+# Memoria ocupada por los datos en representación compacta
+with st.sidebar.expander("💾 Memoria"):
+    reporte_memoria = memory_report(clientes=vista.df_clientes, creditos=vista.df_creditos, cuotas=vista.df_cuotas)
+    st.dataframe(
+        reporte_memoria,
+        hide_index=True,
+        column_config={
+            'bytes': st.column_config.NumberColumn('Bytes', format='%d'),
+            'bytes_por_fila': st.column_config.NumberColumn('Bytes/fila', format='%.1f'),
+        }
+    )
+    st.caption(
+        f"Almacén compartido: {motor.store.bytes / 2**20:,.1f} de {motor.store.max_bytes / 2**20:,.0f} MB · "
+        f"{len(motor.store.stats())} fuente(s) · versión {vista.datos.version}"
+    )
 
 
 # =====================================================
 # KPIs PRINCIPALES
 # =====================================================
 
-col1, col2, col3, col4, col5 = st.columns(5)
-
-# Calcular métricas
-total_creditos = df_creditos_filtered['monto_capital'].sum()
-deuda_impaga = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida']['monto_total'].sum()
-cuotas_vencidas = len(df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida'])
-por_cobrar = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Pendiente']['monto_total'].sum()
-tasa_morosidad = (deuda_impaga / total_creditos * 100) if total_creditos > 0 else 0
-
-with col1:
-    st.markdown(f"""
-        <div class="powerbi-card card-creditos">
-            <h3>Créditos Otorgados</h3>
-            <h2>Bs {total_creditos:,.2f}</h2>
-        </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f"""
-        <div class="powerbi-card card-impaga">
-            <h3>Deuda Impaga</h3>
-            <h2>Bs {deuda_impaga:,.2f}</h2>
-        </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    st.markdown(f"""
-        <div class="powerbi-card card-vencido">
-            <h3>Cuotas Vencidas</h3>
-            <h2>{cuotas_vencidas:,}</h2>
-        </div>
-    """, unsafe_allow_html=True)
-
-with col4:
-    st.markdown(f"""
-        <div class="powerbi-card card-cobrar">
-            <h3>Por Cobrar</h3>
-            <h2>Bs {por_cobrar:,.2f}</h2>
-        </div>
-    """, unsafe_allow_html=True)
-
-with col5:
-    st.markdown(f"""
-        <div class="powerbi-card card-morosidad">
-            <h3>Tasa Morosidad</h3>
-            <h2>{tasa_morosidad:.1f}%</h2>
-        </div>
-    """, unsafe_allow_html=True)
+# Calcular métricas (una sola pasada, memoizada por selección de filtros)
+with temporizador.section('kpis') as seccion:
+    kpis = motor.kpis(vista)
+    seccion['filas'] = len(vista.cuotas)
+total_creditos = kpis['total_creditos']
+deuda_impaga = kpis['deuda_impaga']
+cuotas_vencidas = kpis['cuotas_vencidas']
+por_cobrar = kpis['por_cobrar']
+tasa_morosidad = kpis['tasa_morosidad']
+
+valores = [
+    f"Bs {total_creditos:,.2f}",
+    f"Bs {deuda_impaga:,.2f}",
+    f"{cuotas_vencidas:,}",
+    f"Bs {por_cobrar:,.2f}",
+    f"{tasa_morosidad:.1f}%",
+]
+for tarjeta, (titulo, clase), valor in zip(tarjetas, TARJETAS, valores):
+    tarjeta.markdown(kpi_card(titulo, clase, valor), unsafe_allow_html=True)
+
+# Tiempo hasta los KPIs en este rerun y, una vez por proceso, desde el arranque
+temporizador.datos['kpis_ms'] = temporizador.elapsed_ms()
+primer_kpi = record_first_kpi()
+if primer_kpi is not None:
+    temporizador.datos['primer_kpi_s'] = primer_kpi
 
 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -416,43 +480,42 @@ elif tasa_morosidad > 5:
 # SISTEMA DE PESTAÑAS
 # =====================================================
 
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Estado de Créditos", "💰 Análisis de Morosidad", "👥 Clientes", "📋 Detalle de Cuotas"])
+# Solo se ejecuta la pestaña elegida: st.tabs corre el código de las cuatro
+# en cada rerun. Cada pestaña es un fragmento, así que sus propios widgets
+# vuelven a ejecutar solo esa pestaña.
+PESTANAS = ["📊 Estado de Créditos", "💰 Análisis de Morosidad", "👥 Clientes", "📋 Detalle de Cuotas"]
+
+pestana = st.radio(
+    "Pestaña",
+    PESTANAS,
+    horizontal=True,
+    label_visibility='collapsed',
+    key='pestana'
+)
+temporizador.datos['pestana'] = pestana
+
+# Plotly Express (lo más pesado de importar) después de los KPIs
+with temporizador.section('importaciones: gráficos'):
+    from farmacia_creditos.paneles import (
+        antiguedad_figure, creditos_tipo_figure, escenarios_figure, estado_creditos_figure,
+        estado_cuotas_figure, evolucion_figure, morosos_figure
+    )
 
 # =====================================================
 # TAB 1: ESTADO DE CRÉDITOS
 # =====================================================
 
-with tab1:
+@st.fragment
+@timed_fragment('Estado de Créditos')
+def render_estado_creditos(vista):
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("Estado de Cuotas")
 
-        estado_cuotas = df_cuotas_filtered.groupby('estado').agg({
-            'monto_total': 'sum',
-            'id_cuota': 'count'
-        }).reset_index()
-        estado_cuotas.columns = ['Estado', 'Monto', 'Cantidad']
-
-        fig = px.pie(
-            estado_cuotas,
-            values='Monto',
-            names='Estado',
-            hole=0.4,
-            color='Estado',
-            color_discrete_map={
-                'Pagada': '#28a745',
-                'Pendiente': '#ffc107',
-                'Vencida': '#dc3545'
-            }
-        )
-
-        fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
-        fig.update_layout(
-            height=350,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(family='Segoe UI', size=11, color='#252423')
+        fig = cached_figure(
+            ('estado_cuotas', *vista.clave),
+            lambda: estado_cuotas_figure(vista.chart('estado_cuotas'))
         )
 
         st.plotly_chart(fig, use_container_width=True)
@@ -460,32 +523,9 @@ with tab1:
     with col2:
         st.subheader("Créditos por Tipo de Cliente")
 
-        creditos_tipo = df_creditos_filtered.groupby('tipo_cliente').agg({
-            'monto_capital': 'sum'
-        }).reset_index()
-
-        fig = px.bar(
-            creditos_tipo,
-            x='tipo_cliente',
-            y='monto_capital',
-            text='monto_capital',
-            color='tipo_cliente',
-            color_discrete_sequence=['#118DFF', '#E66C37']
-        )
-
-        fig.update_traces(
-            texttemplate='Bs %{text:,.0f}',
-            textposition='inside',
-            textfont=dict(size=12, color='white')
-        )
-        fig.update_layout(
-            height=350,
-            xaxis=dict(title="Tipo de Cliente", showgrid=False),
-            yaxis=dict(title="Monto Total (Bs)", showgrid=True, gridcolor='#f0f0f0'),
-            showlegend=False,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(family='Segoe UI', size=11, color='#252423')
+        fig = cached_figure(
+            ('creditos_tipo', *vista.clave),
+            lambda: creditos_tipo_figure(vista.chart('creditos_por_tipo'))
         )
 
         st.plotly_chart(fig, use_container_width=True)
@@ -493,34 +533,19 @@ with tab1:
     # Evolución de créditos
     st.subheader("Evolución de Créditos Otorgados")
 
-    df_creditos_filtered['mes'] = df_creditos_filtered['fecha_desembolso'].dt.to_period('M').astype(str)
-    evolucion = df_creditos_filtered.groupby('mes').agg({
-        'monto_capital': 'sum',
-        'id_credito': 'count'
-    }).reset_index()
-    evolucion.columns = ['Mes', 'Monto', 'Cantidad']
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(
-        x=evolucion['Mes'],
-        y=evolucion['Monto'],
-        name='Monto',
-        fill='tozeroy',
-        line=dict(color='#118DFF', width=2),
-        fillcolor='rgba(17, 141, 255, 0.2)'
-    ))
-
-    fig.update_layout(
-        height=350,
-        xaxis=dict(title='Mes', showgrid=False),
-        yaxis=dict(title='Monto (Bs)', showgrid=True, gridcolor='#f0f0f0'),
-        hovermode='x unified',
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        font=dict(family='Segoe UI', size=11, color='#252423')
+    granularidad = st.radio(
+        "Granularidad",
+        ['Día', 'Semana', 'Mes'],
+        index=2,
+        horizontal=True,
+        key='granularidad_evolucion'
     )
 
+    fig = cached_figure(('evolucion', granularidad, *vista.clave), lambda: evolucion_figure(
+        vista.chart('evolucion_creditos', frecuencia={'Día': 'D', 'Semana': 'W', 'Mes': 'M'}[granularidad]),
+        titulo_x=granularidad
+    ))
+
     st.plotly_chart(fig, use_container_width=True)
 
 
@@ -528,39 +553,17 @@ with tab1:
 # TAB 2: ANÁLISIS DE MOROSIDAD
 # =====================================================
 
-with tab2:
+@st.fragment
+@timed_fragment('Análisis de Morosidad')
+def render_morosidad(vista):
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("Top 10 Clientes Morosos")
 
-        morosos = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida'].groupby('nombre_cliente').agg({
-            'monto_total': 'sum',
-            'id_cuota': 'count'
-        }).reset_index().sort_values('monto_total', ascending=True).tail(10)
-        morosos.columns = ['Cliente', 'Deuda', 'Cuotas']
-
-        fig = px.bar(
-            morosos,
-            x='Deuda',
-            y='Cliente',
-            orientation='h',
-            text='Deuda',
-            color_discrete_sequence=['#D64550']
-        )
-
-        fig.update_traces(
-            texttemplate='Bs %{text:,.0f}',
-            textposition='inside',
-            textfont=dict(size=10, color='white')
-        )
-        fig.update_layout(
-            height=400,
-            xaxis=dict(title="Deuda (Bs)", showgrid=True, gridcolor='#f0f0f0'),
-            yaxis=dict(title=""),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(family='Segoe UI', size=11, color='#252423')
+        fig = cached_figure(
+            ('morosos', *vista.clave),
+            lambda: morosos_figure(vista.chart('top_morosos'))
         )
 
         st.plotly_chart(fig, use_container_width=True)
@@ -568,92 +571,50 @@ with tab2:
     with col2:
         st.subheader("Antigüedad de Deuda")
 
-        vencidas = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida'].copy()
-
-        if len(vencidas) > 0:
-            vencidas['rango_dias'] = pd.cut(
-                vencidas['dias_mora'],
-                bins=[0, 30, 60, 90, 180, 999],
-                labels=['0-30 días', '31-60 días', '61-90 días', '91-180 días', '>180 días']
-            )
-
-            antiguedad = vencidas.groupby('rango_dias').agg({
-                'monto_total': 'sum'
-            }).reset_index()
-
-            fig = px.bar(
-                antiguedad,
-                x='rango_dias',
-                y='monto_total',
-                text='monto_total',
-                color='monto_total',
-                color_continuous_scale=['#ffc107', '#E66C37', '#D64550']
-            )
-
-            fig.update_traces(
-                texttemplate='Bs %{text:,.0f}',
-                textposition='outside'
-            )
-            fig.update_layout(
-                height=400,
-                xaxis=dict(title="Días de Mora", showgrid=False),
-                yaxis=dict(title="Monto (Bs)", showgrid=True, gridcolor='#f0f0f0'),
-                showlegend=False,
-                coloraxis_showscale=False,
-                plot_bgcolor='white',
-                paper_bgcolor='white',
-                font=dict(family='Segoe UI', size=11, color='#252423')
-            )
+        fig = cached_figure(
+            ('antiguedad', *vista.clave),
+            lambda: antiguedad_figure(vista.chart('antiguedad'))
+        )
 
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No hay cuotas vencidas en el período seleccionado")
 
-    # Proyección de cobros
-    st.subheader("Proyección de Cobros Próximos 90 Días")
-
-    hoy = datetime.now()
-    proximos_90 = hoy + timedelta(days=90)
-
-    proximas_cuotas = df_cuotas_filtered[
-        (df_cuotas_filtered['estado'] == 'Pendiente') &
-        (df_cuotas_filtered['fecha_programada'] <= proximos_90)
-    ].copy()
-
-    if len(proximas_cuotas) > 0:
-        proximas_cuotas['semana'] = proximas_cuotas['fecha_programada'].dt.to_period('W').astype(str)
-        proyeccion = proximas_cuotas.groupby('semana').agg({
-            'monto_total': 'sum'
-        }).reset_index()
-
-        fig = go.Figure()
-
-        fig.add_trace(go.Bar(
-            x=proyeccion['semana'],
-            y=proyeccion['monto_total'],
-            name='Cobros Proyectados',
-            marker_color='#6B007B'
-        ))
-
-        fig.update_layout(
-            height=300,
-            xaxis=dict(title='Semana', showgrid=False),
-            yaxis=dict(title='Monto (Bs)', showgrid=True, gridcolor='#f0f0f0'),
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(family='Segoe UI', size=11, color='#252423')
-        )
+    # Proyección de cobros: escenarios Monte Carlo según el riesgo del
+    # cliente y el atraso histórico (incluye lo que se recupera de vencidas)
+    horizonte = st.radio(
+        "Horizonte",
+        [30, 60, 90, 180],
+        index=2,
+        horizontal=True,
+        format_func=lambda dias: f"{dias} días",
+        key='horizonte_proyeccion'
+    )
+    st.subheader(f"Proyección de Cobros Próximos {horizonte} Días")
+
+    fig = cached_figure(
+        ('escenarios', horizonte, *vista.clave),
+        lambda: escenarios_figure(vista.collection_scenarios(dias=horizonte))
+    )
 
+    if fig is not None:
         st.plotly_chart(fig, use_container_width=True)
+        st.caption(
+            "Banda P5–P95 de los escenarios simulados según el riesgo del cliente y el atraso "
+            "histórico de sus pagos; incluye la recuperación de cuotas vencidas"
+        )
     else:
-        st.info("No hay cobros proyectados para los próximos 90 días")
+        st.info(f"No hay cobros proyectados para los próximos {horizonte} días")
 
 
 # =====================================================
 # TAB 3: CLIENTES
 # =====================================================
 
-with tab3:
+@st.fragment
+@timed_fragment('Clientes')
+def render_clientes(vista):
     st.subheader("Análisis de Clientes por Categoría")
 
     col1, col2 = st.columns(2)
@@ -662,45 +623,28 @@ with tab3:
         # Clientes con más créditos activos
         st.markdown("**Top Clientes Activos**")
 
-        clientes_activos = df_creditos_filtered[df_creditos_filtered['estado'] == 'Activo'].groupby('nombre_cliente').agg({
-            'id_credito': 'count',
-            'monto_capital': 'sum'
-        }).reset_index().sort_values('monto_capital', ascending=False).head(10)
-        clientes_activos.columns = ['Cliente', 'Créditos', 'Monto Total']
-
-        clientes_activos['Créditos'] = clientes_activos['Créditos'].astype(int)
-        clientes_activos['Monto Total'] = clientes_activos['Monto Total'].apply(lambda x: f"Bs {x:,.2f}")
-
-        st.dataframe(clientes_activos, use_container_width=True, height=350)
+        clientes_activos = vista.chart('top_clientes_activos', n=None)
+
+        show_paged_table(
+            PagedRows(clientes_activos),
+            clave='pagina_clientes_activos',
+            columnas=['Cliente', 'Créditos', 'Monto Total'],
+            nombres=['Cliente', 'Créditos', 'Monto Total'],
+            column_config={
+                'Créditos': st.column_config.NumberColumn(format='%d'),
+                'Monto Total': st.column_config.NumberColumn(format='Bs %.2f'),
+            },
+            tamano=10,
+            height=350
+        )
 
     with col2:
         # Distribución de créditos por estado
         st.markdown("**Estado de Créditos**")
 
-        estado_dist = df_creditos_filtered.groupby('estado').agg({
-            'id_credito': 'count'
-        }).reset_index()
-        estado_dist.columns = ['Estado', 'Cantidad']
-
-        fig = px.pie(
-            estado_dist,
-            values='Cantidad',
-            names='Estado',
-            hole=0.4,
-            color='Estado',
-            color_discrete_map={
-                'Activo': '#118DFF',
-                'Cancelado': '#28a745',
-                'Moroso': '#D64550'
-            }
-        )
-
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        fig.update_layout(
-            height=350,
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(family='Segoe UI', size=11, color='#252423')
+        fig = cached_figure(
+            ('estado_creditos', *vista.clave),
+            lambda: estado_creditos_figure(vista.chart('estado_creditos'))
         )
 
         st.plotly_chart(fig, use_container_width=True)
@@ -710,41 +654,71 @@ with tab3:
 # TAB 4: DETALLE DE CUOTAS
 # =====================================================
 
-with tab4:
+@st.fragment
+@timed_fragment('Detalle de Cuotas')
+def render_detalle_cuotas(vista, kpis):
     st.subheader("Detalle de Cuotas Vencidas")
 
-    cuotas_vencidas_detalle = df_cuotas_filtered[
-        df_cuotas_filtered['estado'] == 'Vencida'
-    ][['nombre_cliente', 'tipo_cliente', 'numero_cuota', 'monto_total', 'fecha_programada', 'dias_mora']].copy()
-
-    cuotas_vencidas_detalle = cuotas_vencidas_detalle.sort_values('dias_mora', ascending=False)
-
-    # Formatear
-    cuotas_vencidas_detalle['monto_total'] = cuotas_vencidas_detalle['monto_total'].apply(lambda x: f"Bs {x:,.2f}")
-    cuotas_vencidas_detalle['fecha_programada'] = cuotas_vencidas_detalle['fecha_programada'].dt.strftime('%Y-%m-%d')
-
-    cuotas_vencidas_detalle.columns = ['Cliente', 'Tipo', 'Cuota #', 'Monto', 'Fecha Vencimiento', 'Días Mora']
-
-    st.dataframe(cuotas_vencidas_detalle, use_container_width=True, height=400)
+    # Cuotas vencidas de la vista en el orden precalculado de dias_mora
+    # (descendente); solo se copia la página visible
+    show_paged_table(
+        vista.overdue_rows(),
+        clave='pagina_cuotas_vencidas',
+        columnas=COLUMNAS_VENCIDAS,
+        nombres=['Cliente', 'Tipo', 'Cuota #', 'Monto', 'Fecha Vencimiento', 'Días Mora'],
+        column_config={
+            'Monto': st.column_config.NumberColumn(format='Bs %.2f'),
+            'Fecha Vencimiento': st.column_config.DateColumn(format='YYYY-MM-DD'),
+        }
+    )
 
     # Resumen estadístico
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total Cuotas Vencidas", len(cuotas_vencidas_detalle))
+        st.metric("Total Cuotas Vencidas", kpis['cuotas_vencidas'])
 
     with col2:
-        promedio_mora = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida']['dias_mora'].mean()
-        st.metric("Promedio Días Mora", f"{promedio_mora:.0f} días")
+        st.metric("Promedio Días Mora", f"{kpis['promedio_mora']:.0f} días")
 
     with col3:
-        max_mora = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida']['dias_mora'].max()
-        st.metric("Máxima Mora", f"{max_mora:.0f} días")
+        st.metric("Máxima Mora", f"{kpis['max_mora']:.0f} días")
 
     with col4:
-        clientes_morosos = df_cuotas_filtered[df_cuotas_filtered['estado'] == 'Vencida']['nombre_cliente'].nunique()
-        st.metric("Clientes Morosos", clientes_morosos)
+        st.metric("Clientes Morosos", kpis['clientes_morosos'])
+
+
+# =====================================================
+# PESTAÑA ACTIVA
+# =====================================================
+
+# Las figuras se comparten entre sesiones: la clave de cada una incluye
+# vista.clave (versión de datos, fecha de corte y hash de los filtros)
+if pestana == PESTANAS[0]:
+    render_estado_creditos(vista)
+elif pestana == PESTANAS[1]:
+    render_morosidad(vista)
+elif pestana == PESTANAS[2]:
+    render_clientes(vista)
+else:
+    render_detalle_cuotas(vista, kpis)
+
+
+# Contadores de la caché de figuras (al final: incluyen este rerun)
+with st.sidebar.expander("🖼️ Caché de gráficos"):
+    estadisticas = get_figure_cache().stats()
+    st.write(
+        f"Aciertos: {estadisticas['aciertos']:,} · Fallos: {estadisticas['fallos']:,} "
+        f"({estadisticas['tasa_aciertos']:.0%})"
+    )
+    st.write(
+        f"Entradas: {estadisticas['entradas']:,} · Desalojos: {estadisticas['desalojos']:,}"
+    )
+    st.progress(
+        min(estadisticas['bytes'] / estadisticas['max_bytes'], 1.0),
+        text=f"{estadisticas['bytes'] / 2**20:.1f} de {estadisticas['max_bytes'] / 2**20:.0f} MB"
+    )
 
 
 # =====================================================
@@ -757,3 +731,40 @@ st.markdown("""
         <p>💊 Farmacia - Sistema de Gestión de Créditos</p>
     </div>
 """, unsafe_allow_html=True)
+
+
+# =====================================================
+# TIEMPOS DEL RERUN
+# =====================================================
+
+# Al final del script: incluye todas las secciones de este rerun
+registro_tiempos = finish_timer(temporizador)
+
+if debug_enabled():
+    with st.sidebar.expander("⏱️ Tiempos del rerun", expanded=True):
+        st.write(f"Total: {registro_tiempos['total_ms']:,.0f} ms · versión de datos {datos.version}")
+        st.caption("Las pestañas incluyen el tiempo de sus figuras")
+        secciones = temporizador.frame()
+        st.dataframe(
+            secciones,
+            hide_index=True,
+            column_order=[columna for columna in ['nombre', 'ms', 'filas', 'bytes'] if columna in secciones],
+            column_config={
+                'nombre': st.column_config.TextColumn('Sección'),
+                'ms': st.column_config.NumberColumn('ms', format='%.1f'),
+                'filas': st.column_config.NumberColumn('Filas', format='%d'),
+                'bytes': st.column_config.NumberColumn('Bytes', format='%d'),
+            }
+        )
+        arranque = startup_stats()
+        if arranque['calentando']:
+            st.caption("Calentamiento del proceso en curso")
+        elif arranque['calentamiento_s'] is not None:
+            st.caption(f"Calentamiento del proceso: {arranque['calentamiento_s']:.1f} s")
+        if arranque['primer_kpi_s'] is not None:
+            st.caption(f"Primer KPI del proceso: {arranque['primer_kpi_s']:.1f} s desde el arranque")
+        if arranque['error']:
+            st.caption(f"Error en el calentamiento: {arranque['error']}")
+        st.checkbox("Perfilar reruns (cProfile)", key='perfilar')
+        if temporizador.perfil is not None:
+            st.code(temporizador.profile_text(), language='text')
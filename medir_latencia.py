@@ -0,0 +1,308 @@
+"""
+Medición de la latencia que percibe el usuario del dashboard
+
+Uso:
+    python medir_latencia.py --escala 100k --iteraciones 10 --salida latencia.json
+    python medir_latencia.py --url http://localhost:8501 --iteraciones 5
+    python medir_latencia.py --escala 100k --base latencia_base.json
+
+Usa el mismo navegador headless que tomar_capturas.py. Cada iteración abre
+una sesión nueva del dashboard y sigue el mismo guion: carga de la página,
+clic en cada pestaña y vuelta a la primera, quitar un estado de crédito del
+filtro y volver a agregarlo.
+
+Un observador que se inyecta antes de que cargue la página (Chrome DevTools
+Protocol) marca con performance.mark el primer KPI con valor ('kpis') y el
+final de cada rerun ('rendered:N'): Streamlit terminó el script, no quedan
+esqueletos ni spinners y cada gráfico Plotly está dibujado. La latencia de
+una interacción va del instante previo a la acción hasta esa marca, ambos
+medidos con el reloj de la página. De cada carga se guardan también los
+tiempos de Navigation Timing y un resumen de Resource Timing.
+
+Sin --url se levanta un dashboard local (con --escala, sobre una cartera
+Parquet generada con la semilla de la suite de rendimiento). El JSON tiene
+p50, p95, mínimo, máximo y las muestras de cada interacción; con --base se
+compara contra un JSON anterior.
+"""
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+from datetime import datetime
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from tomar_capturas import SELECTOR_PESTANAS, start_browser, start_dashboard
+
+ESCALAS = ['muestra', '1k', '100k', '1m', '10m']
+
+# Último valor por defecto del filtro "Estado de Crédito": Backspace lo
+# quita y escribirlo lo vuelve a agregar
+ESTADO_FILTRO = 'Moroso'
+FILTRO_ESTADO_CREDITO = 1
+
+OBSERVADOR_JS = r"""
+(() => {
+    const estado = window.__latencia = {reruns: 0, ultimo: null, kpis: null};
+    let corriendo = false;
+    let pendiente = false;
+
+    const completo = () => {
+        const app = document.querySelector('[data-testid="stApp"]');
+        if (!app || app.getAttribute('data-test-script-state') !== 'notRunning') return false;
+        if (document.querySelector('[data-testid="stSkeleton"], [data-testid="stSpinner"], .powerbi-card h2.cargando')) return false;
+        for (const grafico of document.querySelectorAll('[data-testid="stPlotlyChart"]')) {
+            if (!grafico.querySelector('.main-svg')) return false;
+        }
+        return true;
+    };
+
+    const revisar = () => {
+        pendiente = false;
+        if (estado.kpis === null && document.querySelector('.powerbi-card h2:not(.cargando)')) {
+            performance.mark('kpis');
+            estado.kpis = performance.now();
+        }
+        if (corriendo && completo()) {
+            corriendo = false;
+            estado.reruns += 1;
+            performance.mark('rendered:' + estado.reruns);
+            estado.ultimo = performance.now();
+        }
+    };
+
+    new MutationObserver(registros => {
+        // Los cambios de estado se leen de cada registro: un rerun más corto
+        // que un cuadro también se cuenta
+        for (const registro of registros) {
+            if (registro.attributeName === 'data-test-script-state' &&
+                (registro.oldValue === 'running' || registro.target.getAttribute(registro.attributeName) === 'running')) {
+                corriendo = true;
+            }
+        }
+        if (!pendiente) {
+            pendiente = true;
+            requestAnimationFrame(revisar);
+        }
+    }).observe(document, {
+        subtree: true, childList: true,
+        attributes: true, attributeOldValue: true, attributeFilter: ['data-test-script-state'],
+    });
+})();
+"""
+
+TIEMPOS_CARGA_JS = """
+const navegacion = performance.getEntriesByType('navigation')[0];
+const recursos = performance.getEntriesByType('resource');
+return {
+    respuesta_ms: navegacion.responseEnd,
+    dom_ms: navegacion.domContentLoadedEventEnd,
+    load_ms: navegacion.loadEventEnd,
+    primer_kpi_ms: window.__latencia.kpis,
+    render_ms: performance.getEntriesByName('rendered:1')[0].startTime,
+    recursos: recursos.length,
+    recursos_kb: recursos.reduce((total, recurso) => total + recurso.transferSize, 0) / 1024,
+};
+"""
+
+
+def start_instrumented_browser(chromedriver):
+    """Navegador headless con el observador de renders en cada documento"""
+    driver = start_browser(chromedriver)
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': OBSERVADOR_JS})
+    return driver
+
+
+def reruns(driver):
+    return driver.execute_script("return window.__latencia.reruns")
+
+
+def open_session(driver, url, timeout):
+    """Carga el dashboard (sesión nueva) y devuelve los tiempos de la carga en ms"""
+    driver.get(url)
+    WebDriverWait(driver, timeout, poll_frequency=0.05).until(
+        lambda d: d.execute_script("return window.__latencia !== undefined && window.__latencia.reruns > 0")
+    )
+    return driver.execute_script(TIEMPOS_CARGA_JS)
+
+
+def timed_interaction(driver, accion, timeout):
+    """Ejecuta accion() y devuelve los ms hasta el final del rerun que provoca"""
+    previos, inicio = driver.execute_script(
+        "performance.mark('accion'); return [window.__latencia.reruns, performance.now()]"
+    )
+    accion()
+    WebDriverWait(driver, timeout, poll_frequency=0.05).until(lambda d: reruns(d) > previos)
+    return driver.execute_script("return window.__latencia.ultimo") - inicio
+
+
+def tab_names(driver):
+    return [pestana.text.strip() for pestana in driver.find_elements(By.CSS_SELECTOR, SELECTOR_PESTANAS)]
+
+
+def click_tab(driver, indice):
+    driver.find_elements(By.CSS_SELECTOR, SELECTOR_PESTANAS)[indice].click()
+
+
+def multiselect_input(driver, indice):
+    """Campo de texto del multiselect `indice` del sidebar"""
+    return driver.find_elements(
+        By.CSS_SELECTOR, '[data-testid="stSidebar"] [data-testid="stMultiSelect"] input'
+    )[indice]
+
+
+def run_iteration(driver, url, timeout):
+    """Una pasada del guion; devuelve {interacción: ms}"""
+    carga = open_session(driver, url, timeout)
+    muestras = {
+        'carga: respuesta': carga['respuesta_ms'],
+        'carga: DOM listo': carga['dom_ms'],
+        'carga: load': carga['load_ms'],
+        'carga: primer KPI': carga['primer_kpi_ms'],
+        'carga: render completo': carga['render_ms'],
+        'carga: recursos (KB)': carga['recursos_kb'],
+    }
+
+    pestanas = tab_names(driver)
+    for indice in list(range(1, len(pestanas))) + [0]:
+        muestras[f'pestaña: {pestanas[indice]}'] = timed_interaction(
+            driver, lambda: click_tab(driver, indice), timeout
+        )
+
+    muestras['filtro: quitar estado de crédito'] = timed_interaction(
+        driver, lambda: multiselect_input(driver, FILTRO_ESTADO_CREDITO).send_keys(Keys.BACKSPACE), timeout
+    )
+    muestras['filtro: agregar estado de crédito'] = timed_interaction(
+        driver, lambda: multiselect_input(driver, FILTRO_ESTADO_CREDITO).send_keys(ESTADO_FILTRO, Keys.ENTER), timeout
+    )
+    multiselect_input(driver, FILTRO_ESTADO_CREDITO).send_keys(Keys.ESCAPE)
+    return muestras
+
+
+def summarize(iteraciones):
+    """p50, p95, mínimo y máximo de cada interacción, con sus muestras"""
+    resumen = {}
+    for nombre in iteraciones[0]:
+        valores = np.array([muestras[nombre] for muestras in iteraciones], dtype=float)
+        p50, p95 = np.percentile(valores, [50, 95])
+        resumen[nombre] = {
+            'n': len(valores),
+            'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1),
+            'min_ms': round(float(valores.min()), 1),
+            'max_ms': round(float(valores.max()), 1),
+            'muestras_ms': [round(float(valor), 1) for valor in valores],
+        }
+    return resumen
+
+
+def git_revision():
+    """Commit del árbol medido (None fuera de un repositorio git)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def generate_dataset(escala, directorio):
+    """Cartera Parquet de la escala, con la semilla de la suite de rendimiento"""
+    from farmacia_creditos.generador import write_portfolio_parquet
+    from farmacia_creditos.rendimiento import DIAS, ESCALAS as CUOTAS, SEMILLA, portfolio_size
+
+    n_clientes, n_creditos = portfolio_size(CUOTAS[escala])
+    write_portfolio_parquet(directorio, n_clientes, n_creditos, dias=DIAS, seed=SEMILLA)
+    return directorio
+
+
+def print_summary(resumen, base=None):
+    print(f"\n{'Interacción':<45} {'p50 ms':>10} {'p95 ms':>10}")
+    for nombre, datos in resumen.items():
+        linea = f"{nombre:<45} {datos['p50_ms']:>10,.1f} {datos['p95_ms']:>10,.1f}"
+        anterior = (base or {}).get('interacciones', {}).get(nombre)
+        if anterior and anterior['p50_ms'] > 0:
+            linea += (f"   base {anterior['p50_ms']:>8,.1f} / {anterior['p95_ms']:>8,.1f}"
+                      f"  ({datos['p50_ms'] / anterior['p50_ms']:.2f}x p50)")
+        print(linea)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Latencia percibida del dashboard (p50/p95 por interacción)')
+    parser.add_argument('--url', default=None, help='Dashboard ya corriendo (si falta, se levanta uno local)')
+    parser.add_argument('--puerto', type=int, default=8502, help='Puerto del dashboard local')
+    parser.add_argument('--escala', choices=ESCALAS, default='muestra',
+                        help='Datos del dashboard local: de ejemplo o cartera generada')
+    parser.add_argument('--iteraciones', type=int, default=10, help='Pasadas medidas del guion')
+    parser.add_argument('--calentamiento', type=int, default=1, help='Pasadas previas sin medir')
+    parser.add_argument('--salida', default='latencia.json', help='Archivo JSON con los resultados')
+    parser.add_argument('--base', default=None, help='JSON de una medición anterior para comparar')
+    parser.add_argument('--timeout', type=float, default=120, help='Segundos máximos por interacción')
+    args = parser.parse_args(argv)
+
+    if args.url and args.escala != 'muestra':
+        parser.error('--escala solo se aplica al dashboard local (sin --url)')
+
+    url = args.url or f'http://localhost:{args.puerto}'
+    dashboard = None
+    driver = None
+    with tempfile.TemporaryDirectory() as directorio:
+        try:
+            if not args.url:
+                entorno = {}
+                if args.escala != 'muestra':
+                    print(f"[INFO] Generando cartera {args.escala}...")
+                    entorno['FARMACIA_DATOS_PARQUET'] = generate_dataset(args.escala, directorio)
+                dashboard = start_dashboard(args.puerto, args.timeout, entorno)
+
+            driver = start_instrumented_browser(ChromeDriverManager().install())
+            for numero in range(args.calentamiento):
+                run_iteration(driver, url, args.timeout)
+                print(f"[INFO] Calentamiento {numero + 1}/{args.calentamiento}")
+
+            iteraciones = []
+            for numero in range(args.iteraciones):
+                iteraciones.append(run_iteration(driver, url, args.timeout))
+                print(f"[INFO] Iteración {numero + 1}/{args.iteraciones}")
+
+            resultados = {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_revision(),
+                'url': url if args.url else None,
+                'escala': args.escala if not args.url else None,
+                'navegador': driver.capabilities.get('browserVersion'),
+                'iteraciones': args.iteraciones,
+                'calentamiento': args.calentamiento,
+                'interacciones': summarize(iteraciones),
+            }
+        except Exception as e:
+            print(f"[ERROR] {e!r}")
+            return 1
+        finally:
+            if driver is not None:
+                driver.quit()
+            if dashboard is not None:
+                dashboard.terminate()
+                dashboard.wait()
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+
+    base = None
+    if args.base:
+        with open(args.base, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+    print_summary(resultados['interacciones'], base)
+    print(f"\n[SUCCESS] Resultados en '{args.salida}'")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
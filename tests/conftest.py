@@ -0,0 +1,20 @@
+import pytest
+
+from farmacia_creditos.base_datos import create_sqlite_database, insert_dataframes
+from farmacia_creditos.muestra import generate_sample_data
+
+
+@pytest.fixture
+def base_muestra(tmp_path):
+    """Archivo SQLite con los datos de ejemplo: (destino, conexión)"""
+    ruta = tmp_path / 'farmacia.db'
+    conn = create_sqlite_database(str(ruta))
+    insert_dataframes(conn, *generate_sample_data())
+    yield f'sqlite:///{ruta}', conn
+    conn.close()
+
+
+@pytest.fixture
+def muestra():
+    """(df_clientes, df_creditos, df_cuotas) de ejemplo, como los recibe el motor"""
+    return generate_sample_data()
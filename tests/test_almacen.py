@@ -0,0 +1,87 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos import almacen
+from farmacia_creditos.almacen import DataStore, Snapshot
+
+
+def _snapshot():
+    return Snapshot(('prueba',), [pd.DataFrame({'a': np.arange(1000), 'b': np.ones(1000)})])
+
+
+def test_a_slow_build_does_not_block_other_keys():
+    snapshot = _snapshot()
+    snapshot.derived('listo', lambda: 1)
+    empezo, seguir = threading.Event(), threading.Event()
+
+    def lento():
+        empezo.set()
+        seguir.wait(5)
+        return 2
+
+    hilo = threading.Thread(target=snapshot.derived, args=('lento', lento))
+    hilo.start()
+    assert empezo.wait(5)
+    try:
+        assert snapshot.derived('listo', lambda: 3) == 1
+        assert snapshot.derived('otro', lambda: 4) == 4
+    finally:
+        seguir.set()
+        hilo.join()
+    assert snapshot.derived('lento', lambda: 5) == 2
+
+
+def test_concurrent_callers_build_once():
+    snapshot = _snapshot()
+    llamadas = []
+    barrera = threading.Barrier(8)
+
+    def construir():
+        llamadas.append(1)
+        return object()
+
+    resultados = []
+
+    def pedir():
+        barrera.wait()
+        resultados.append(snapshot.derived('cubo', construir))
+
+    hilos = [threading.Thread(target=pedir) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(llamadas) == 1
+    assert len({id(resultado) for resultado in resultados}) == 1
+
+
+def test_derived_bytes_count_only_new_arrays(monkeypatch):
+    monkeypatch.setattr(almacen, 'MAX_DERIVADOS', 2)
+    snapshot = _snapshot()
+    base = snapshot.bytes
+    df = snapshot.frames[0]
+
+    # Columnas y vistas de los frames no suman
+    snapshot.derived('vista', lambda: {'a': df['a'].to_numpy()[::2], 'df': df})
+    assert snapshot.bytes == base
+    nuevo = np.zeros(500)
+    snapshot.derived('nuevo', lambda: (nuevo, nuevo[:10]))
+    assert snapshot.bytes == base + nuevo.nbytes
+    # Un arreglo ya contado por otro derivado no se cuenta dos veces
+    snapshot.derived('repetido', lambda: [nuevo])
+    assert snapshot.bytes == base + nuevo.nbytes
+
+    # Al desalojar 'vista' y 'nuevo' se descuenta lo que se les cargó
+    snapshot.derived('otro', lambda: np.zeros(100, dtype=np.int32))
+    assert list(snapshot._derivados) == ['repetido', 'otro']
+    assert snapshot.bytes == base + 400
+
+
+def test_store_budget_includes_derived():
+    store = DataStore(max_bytes=10**9)
+    snapshot = store.get(('prueba',), lambda: _snapshot().frames)
+    antes = store.bytes
+    snapshot.derived('cubo', lambda: np.zeros(1000))
+    assert store.bytes == antes + 8000
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmacia_creditos.compacto import RIESGOS
+from farmacia_creditos.escenarios import (IMPAGO, MAX_SEMANAS, N_RESULTADOS, PESO_PREVIO, SEMANAS_IMPAGO,
+                                          CollectionSimulator)
+from farmacia_creditos.mora import AgingEngine
+
+
+@pytest.fixture
+def cartera(muestra):
+    df_clientes, _, df_cuotas = muestra
+    corte = pd.Timestamp.today().normalize()
+    df_cuotas = AgingEngine(df_cuotas).at(corte)
+    # Nivel de riesgo y días desde el vencimiento de cada cuota, en pandas
+    riesgo = df_cuotas['id_cliente'].map(df_clientes.set_index('id')['riesgo'])
+    tabla = pd.DataFrame({
+        'grupo': pd.Categorical(riesgo, categories=RIESGOS).codes,
+        'atraso': (corte - df_cuotas['fecha_programada'].dt.normalize()).dt.days,
+        'pagada': df_cuotas['estado'] == 'Pagada',
+        'dias_mora': df_cuotas['dias_mora'],
+        'monto': df_cuotas['monto_total'].astype(float),
+    })
+    return df_clientes, df_cuotas, corte, tabla
+
+
+def test_calibration_counts_the_observed_history(cartera):
+    df_clientes, df_cuotas, corte, tabla = cartera
+    simulador = CollectionSimulator(df_clientes, df_cuotas, corte)
+
+    observadas = tabla[tabla['atraso'] >= 7 * SEMANAS_IMPAGO]
+    resultado = np.where(observadas['pagada'], np.minimum(observadas['dias_mora'] // 7, IMPAGO), IMPAGO)
+    esperado = (pd.crosstab(observadas['grupo'], resultado)
+                .reindex(index=range(len(RIESGOS) + 1), columns=range(N_RESULTADOS), fill_value=0))
+    np.testing.assert_array_equal(simulador.historia, esperado.to_numpy())
+
+    previa = esperado.sum() / esperado.to_numpy().sum()
+    probabilidades = (esperado + PESO_PREVIO * previa).div(esperado.sum(axis=1) + PESO_PREVIO, axis=0)
+    np.testing.assert_allclose(simulador.probabilidades, probabilidades.to_numpy())
+    np.testing.assert_allclose(simulador.probabilidades.sum(axis=1), 1.0)
+
+
+def _expected_collections(tabla, probabilidades, semanas):
+    """Cobro esperado por semana, cuota por cuota"""
+    cobros = np.zeros(semanas)
+    abiertas = tabla[~tabla['pagada'] & (tabla['atraso'] < 7 * SEMANAS_IMPAGO)
+                     & (tabla['atraso'] > -7 * MAX_SEMANAS)]
+    for fila in abiertas.itertuples():
+        p = probabilidades[fila.grupo]
+        if fila.atraso <= 0:
+            semana, desde = -fila.atraso // 7, 0
+        else:
+            # Atrasada j semanas: solo atrasos >= j, y se cobra dentro de k - j semanas
+            desde = fila.atraso // 7
+            semana = -desde
+            p = np.where(np.arange(N_RESULTADOS) >= desde, p, 0) / p[desde:].sum()
+        for atraso in range(desde, IMPAGO):
+            if 0 <= semana + atraso < semanas:
+                cobros[semana + atraso] += p[atraso] * fila.monto
+    return cobros
+
+
+@pytest.mark.parametrize('dias', [30, 90, 180])
+def test_mean_matches_the_expected_collections(cartera, dias):
+    df_clientes, df_cuotas, corte, tabla = cartera
+    simulador = CollectionSimulator(df_clientes, df_cuotas, corte, correlacion=0)
+    semanas = -(-dias // 7)
+
+    resultado = simulador.simulate(dias=dias, escenarios=20_000)
+    esperado = _expected_collections(tabla, simulador.probabilidades, semanas)
+    assert len(resultado) == semanas
+    np.testing.assert_allclose(resultado['esperado'], esperado, rtol=0.01, atol=0.002 * esperado.max())
+    assert resultado['acumulado_esperado'].iloc[-1] == pytest.approx(esperado.sum(), rel=0.005)
+
+    # Lo programado es lo que vence cada semana, sin simular
+    futuras = tabla[~tabla['pagada'] & (tabla['atraso'] <= 0) & (tabla['atraso'] > -7 * semanas)]
+    programado = futuras.groupby(-futuras['atraso'] // 7)['monto'].sum().reindex(range(semanas), fill_value=0)
+    np.testing.assert_allclose(resultado['programado'], programado.to_numpy())
+    assert (resultado['periodo'] == corte + pd.to_timedelta(7 * np.arange(semanas), unit='D')).all()
+
+
+def test_correlated_defaults_widen_the_bands(cartera):
+    df_clientes, df_cuotas, corte, _ = cartera
+    independiente = CollectionSimulator(df_clientes, df_cuotas, corte, correlacion=0).simulate(dias=90)
+    correlacionado = CollectionSimulator(df_clientes, df_cuotas, corte).simulate(dias=90)
+
+    assert correlacionado['acumulado_esperado'].iloc[-1] == pytest.approx(
+        independiente['acumulado_esperado'].iloc[-1], rel=0.02)
+    ancho = (correlacionado['acumulado_p95'] - correlacionado['acumulado_p5']).iloc[-1]
+    assert ancho > (independiente['acumulado_p95'] - independiente['acumulado_p5']).iloc[-1]
+    for resultado in (independiente, correlacionado):
+        assert (resultado['p5'] <= resultado['esperado']).all()
+        assert (resultado['esperado'] <= resultado['p95']).all()
+        assert (np.diff(resultado['acumulado_esperado']) >= 0).all()
+
+
+def test_same_seed_same_result_and_subsets(cartera):
+    df_clientes, df_cuotas, corte, tabla = cartera
+    simulador = CollectionSimulator(df_clientes, df_cuotas, corte)
+
+    pd.testing.assert_frame_equal(simulador.simulate(semilla=3), simulador.simulate(semilla=3))
+    assert not simulador.simulate(semilla=3).equals(simulador.simulate(semilla=4))
+
+    filas = np.flatnonzero(tabla['grupo'].to_numpy() == RIESGOS.index('Alto'))
+    alto = simulador.simulate(filas)
+    futuras = tabla.iloc[filas]
+    futuras = futuras[~futuras['pagada'] & (futuras['atraso'] <= 0) & (futuras['atraso'] > -7 * len(alto))]
+    assert alto['programado'].sum() == pytest.approx(futuras['monto'].sum())
+
+    vacio = simulador.simulate(np.array([], dtype=np.int64))
+    assert vacio.empty and 'acumulado_p95' in vacio
+    with pytest.raises(ValueError):
+        simulador.simulate(dias=0)
+    with pytest.raises(ValueError):
+        simulador.simulate(escenarios=0)
@@ -0,0 +1,109 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmacia_creditos.filtros import FilterIndex, _credit_offsets
+
+
+TIPOS = [['Natural', 'Jurídico'], ['Natural'], ['Jurídico'], [], ['Otro']]
+ESTADOS_CREDITO = [['Activo', 'Cancelado', 'Moroso'], ['Activo', 'Moroso'], ['Cancelado']]
+ESTADOS_CUOTA = [['Pagada', 'Pendiente', 'Vencida'], ['Vencida'], ['Pendiente', 'Pagada']]
+
+
+def _posiciones(vista):
+    return np.arange(len(vista.df)) if vista.filas is None else np.asarray(vista.filas)
+
+
+def _periodos(df_creditos):
+    fechas = df_creditos['fecha_desembolso'].sort_values()
+    return [
+        (fechas.iloc[0], fechas.iloc[-1]),
+        (fechas.iloc[0] - pd.Timedelta(days=30), fechas.iloc[-1] + pd.Timedelta(days=30)),
+        (fechas.iloc[len(fechas) // 4], fechas.iloc[len(fechas) // 2]),
+        (fechas.iloc[-1] + pd.Timedelta(days=1), fechas.iloc[-1] + pd.Timedelta(days=10)),
+    ]
+
+
+@pytest.mark.parametrize('tipo, estado', list(itertools.product(TIPOS, ESTADOS_CREDITO)))
+def test_filter_creditos_matches_boolean_masks(muestra, tipo, estado):
+    _, df_creditos, df_cuotas = muestra
+    indice = FilterIndex(df_creditos, df_cuotas)
+
+    for inicio, fin in _periodos(df_creditos):
+        vista = indice.filter_creditos(df_creditos, tipo, estado, inicio, fin)
+        mascara = (df_creditos['tipo_cliente'].isin(tipo) & df_creditos['estado'].isin(estado)
+                   & df_creditos['fecha_desembolso'].between(inicio, fin))
+        np.testing.assert_array_equal(_posiciones(vista), np.flatnonzero(mascara))
+        pd.testing.assert_frame_equal(vista.frame(), df_creditos[mascara.to_numpy()].reset_index(drop=True))
+
+
+@pytest.mark.parametrize('tipo, estado', list(itertools.product(TIPOS, ESTADOS_CUOTA)))
+def test_filter_cuotas_matches_boolean_masks(muestra, tipo, estado):
+    _, df_creditos, df_cuotas = muestra
+    indice = FilterIndex(df_creditos, df_cuotas)
+
+    vista = indice.filter_cuotas(df_cuotas, tipo, estado)
+    mascara = df_cuotas['tipo_cliente'].isin(tipo) & df_cuotas['estado'].isin(estado)
+    np.testing.assert_array_equal(_posiciones(vista), np.flatnonzero(mascara))
+    assert len(vista) == mascara.sum()
+
+
+def test_selecting_everything_does_not_copy(muestra):
+    _, df_creditos, df_cuotas = muestra
+    indice = FilterIndex(df_creditos, df_cuotas)
+    inicio, fin = _periodos(df_creditos)[0]
+
+    creditos = indice.filter_creditos(df_creditos, TIPOS[0], ESTADOS_CREDITO[0], inicio, fin)
+    cuotas = indice.filter_cuotas(df_cuotas, TIPOS[0], ESTADOS_CUOTA[0], creditos)
+    assert creditos.filas is None and cuotas.filas is None
+    assert creditos.frame() is df_creditos
+    assert cuotas.column('monto_total') is df_cuotas['monto_total']
+
+
+def _desordenados(muestra):
+    """Créditos barajados y sin algunos créditos: sus cuotas quedan huérfanas"""
+    _, df_creditos, df_cuotas = muestra
+    rng = np.random.default_rng(5)
+    filas = rng.permutation(len(df_creditos))[:-15]
+    return df_creditos.iloc[filas].reset_index(drop=True), df_cuotas.iloc[rng.permutation(len(df_cuotas))]
+
+
+def test_credit_offsets_list_each_credit_cuotas(muestra):
+    df_creditos, df_cuotas = _desordenados(muestra)
+    offsets, posiciones = _credit_offsets(df_creditos, df_cuotas)
+
+    ids_cuota = df_cuotas['id_credito'].to_numpy()
+    assert offsets[0] == 0 and offsets[-1] == len(posiciones)
+    assert len(posiciones) == df_cuotas['id_credito'].isin(df_creditos['id_credito']).sum()
+    for fila, id_credito in enumerate(df_creditos['id_credito']):
+        tramo = posiciones[offsets[fila]:offsets[fila + 1]]
+        # Posiciones crecientes dentro del tramo (argsort estable)
+        np.testing.assert_array_equal(tramo, np.flatnonzero(ids_cuota == id_credito))
+
+
+@pytest.mark.parametrize('estado', ESTADOS_CREDITO)
+def test_credit_filters_reach_their_cuotas(muestra, estado):
+    df_creditos, df_cuotas = _desordenados(muestra)
+    indice = FilterIndex(df_creditos, df_cuotas)
+
+    for inicio, fin in _periodos(df_creditos):
+        creditos = indice.filter_creditos(df_creditos, TIPOS[0], estado, inicio, fin)
+        cuotas = indice.filter_cuotas(df_cuotas, TIPOS[0], ['Pendiente', 'Vencida'], creditos)
+        elegidos = creditos.frame()['id_credito']
+        mascara = df_cuotas['estado'].isin(['Pendiente', 'Vencida']) & df_cuotas['id_credito'].isin(elegidos)
+        np.testing.assert_array_equal(_posiciones(cuotas), np.flatnonzero(mascara))
+
+
+def test_orphan_cuotas_drop_out_with_every_credit_selected(muestra):
+    df_creditos, df_cuotas = _desordenados(muestra)
+    indice = FilterIndex(df_creditos, df_cuotas)
+    inicio, fin = _periodos(df_creditos)[1]
+
+    creditos = indice.filter_creditos(df_creditos, TIPOS[0], ESTADOS_CREDITO[0], inicio, fin)
+    assert creditos.filas is None
+    cuotas = indice.filter_cuotas(df_cuotas, TIPOS[0], ESTADOS_CUOTA[0], creditos)
+    mascara = df_cuotas['id_credito'].isin(df_creditos['id_credito'])
+    assert not mascara.all()
+    np.testing.assert_array_equal(_posiciones(cuotas), np.flatnonzero(mascara))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from farmacia_creditos.graficos import bar_bins, bar_trace, lttb_indices, time_series_trace
+
+
+def _lttb(x, y, n_puntos):
+    """LTTB punto por punto, con los mismos grupos que lttb_indices"""
+    bordes = [int(borde) for borde in np.linspace(1, len(x) - 1, n_puntos - 1)]
+    elegidos = [0]
+    for grupo in range(n_puntos - 2):
+        siguiente = range(bordes[grupo + 1], bordes[grupo + 2] if grupo + 2 < len(bordes) else len(x))
+        x_medio = sum(x[i] for i in siguiente) / len(siguiente)
+        y_medio = sum(y[i] for i in siguiente) / len(siguiente)
+        a = elegidos[-1]
+        areas = [abs((x[a] - x_medio) * (y[i] - y[a]) - (x[a] - x[i]) * (y_medio - y[a]))
+                 for i in range(bordes[grupo], bordes[grupo + 1])]
+        elegidos.append(bordes[grupo] + areas.index(max(areas)))
+    return elegidos + [len(x) - 1]
+
+
+@pytest.mark.parametrize('n, n_puntos', [(1000, 100), (1001, 3), (5000, 1500), (37, 36)])
+def test_lttb_keeps_the_endpoints_and_n_points(n, n_puntos):
+    rng = np.random.default_rng(n)
+    x = np.sort(rng.uniform(0, 100, n))
+    y = np.cumsum(rng.normal(size=n))
+
+    posiciones = lttb_indices(x, y, n_puntos)
+    assert len(posiciones) == n_puntos
+    assert posiciones[0] == 0 and posiciones[-1] == n - 1
+    assert np.all(np.diff(posiciones) > 0)
+    assert posiciones.tolist() == _lttb(x.tolist(), y.tolist(), n_puntos)
+
+
+def test_lttb_keeps_a_spike_and_accepts_dates():
+    fechas = pd.date_range('2024-01-01', periods=2000, freq='D').to_numpy()
+    y = np.zeros(2000)
+    y[1234] = 50.0
+
+    posiciones = lttb_indices(fechas, y, 40)
+    assert 1234 in posiciones
+    assert len(posiciones) == 40
+
+
+@pytest.mark.parametrize('n_puntos', [2, 10, 20])
+def test_lttb_returns_everything_when_it_cannot_reduce(n_puntos):
+    x = np.arange(10)
+    np.testing.assert_array_equal(lttb_indices(x, x * 2.0, n_puntos), np.arange(10))
+
+
+def test_time_series_trace_switches_to_webgl():
+    x = np.arange(5000)
+    grande = time_series_trace(x, np.sin(x / 50.0), max_puntos=1500, umbral_webgl=1000)
+    chica = time_series_trace(x[:500], np.sin(x[:500] / 50.0), max_puntos=1500, umbral_webgl=1000)
+    assert isinstance(grande, go.Scattergl) and len(grande.x) == 1500
+    assert isinstance(chica, go.Scatter) and len(chica.x) == 500
+
+
+@pytest.mark.parametrize('n, max_barras', [(1000, 120), (121, 120), (360, 120), (50, 7)])
+def test_bar_bins_sum_consecutive_bars(n, max_barras):
+    rng = np.random.default_rng(n)
+    x = pd.date_range('2024-01-01', periods=n, freq='W').to_numpy()
+    y = rng.uniform(0, 1000, n)
+
+    x_barras, y_barras = bar_bins(x, y, max_barras)
+    ancho = -(-n // max_barras)
+    esperado = pd.Series(y).groupby(np.arange(n) // ancho).agg(['sum', 'size'])
+    assert len(x_barras) == len(y_barras) <= max_barras
+    assert (esperado['size'].iloc[:-1] == ancho).all()
+    np.testing.assert_array_equal(x_barras, x[::ancho])
+    np.testing.assert_allclose(y_barras, esperado['sum'].to_numpy())
+    assert y_barras.sum() == pytest.approx(y.sum())
+
+
+def test_bar_bins_leave_short_series_alone():
+    x, y = ['a', 'b', 'c'], [1, 2, 3]
+    x_barras, y_barras = bar_bins(x, y, 3)
+    assert x_barras.tolist() == x and y_barras.tolist() == [1.0, 2.0, 3.0]
+    assert len(bar_trace(np.arange(500), np.ones(500), max_barras=100).x) == 100
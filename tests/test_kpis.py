@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmacia_creditos.filtros import FilteredView, FilterIndex
+from farmacia_creditos.kpis import compute_kpis, filter_key
+
+
+def _kpis_pandas(creditos, cuotas):
+    """KPIs del dashboard original, con máscaras sobre los DataFrames filtrados"""
+    total_creditos = creditos['monto_capital'].sum()
+    vencidas = cuotas[cuotas['estado'] == 'Vencida']
+    deuda_impaga = vencidas['monto_total'].sum()
+    return {
+        'total_creditos': total_creditos,
+        'deuda_impaga': deuda_impaga,
+        'cuotas_vencidas': len(vencidas),
+        'por_cobrar': cuotas.loc[cuotas['estado'] == 'Pendiente', 'monto_total'].sum(),
+        'tasa_morosidad': (deuda_impaga / total_creditos * 100) if total_creditos > 0 else 0,
+        'promedio_mora': vencidas['dias_mora'].mean() if len(vencidas) else float('nan'),
+        'max_mora': vencidas['dias_mora'].max() if len(vencidas) else float('nan'),
+        'clientes_morosos': vencidas['nombre_cliente'].nunique(),
+    }
+
+
+def _assert_kpis(resultado, esperado):
+    assert resultado.keys() == esperado.keys()
+    for clave, valor in esperado.items():
+        if isinstance(valor, float) and math.isnan(valor):
+            assert math.isnan(resultado[clave]), clave
+        else:
+            assert resultado[clave] == pytest.approx(valor, rel=1e-12), clave
+
+
+@pytest.mark.parametrize('tipo, estado_credito, estado_cuota', [
+    (['Natural', 'Jurídico'], ['Activo', 'Cancelado', 'Moroso'], ['Pagada', 'Pendiente', 'Vencida']),
+    (['Jurídico'], ['Activo', 'Moroso'], ['Pendiente', 'Vencida']),
+    (['Natural'], ['Moroso'], ['Vencida']),
+    (['Natural', 'Jurídico'], ['Activo'], ['Pagada', 'Pendiente']),
+    ([], ['Activo'], ['Vencida']),
+])
+def test_compute_kpis_matches_masks(muestra, tipo, estado_credito, estado_cuota):
+    _, df_creditos, df_cuotas = muestra
+    indice = FilterIndex(df_creditos, df_cuotas)
+    inicio = df_creditos['fecha_desembolso'].min() + pd.Timedelta(days=20)
+    fin = df_creditos['fecha_desembolso'].max()
+
+    creditos = indice.filter_creditos(df_creditos, tipo, estado_credito, inicio, fin)
+    cuotas = indice.filter_cuotas(df_cuotas, tipo, estado_cuota, creditos)
+
+    mascara = (df_creditos['tipo_cliente'].isin(tipo) & df_creditos['estado'].isin(estado_credito)
+               & df_creditos['fecha_desembolso'].between(inicio, fin))
+    filtrados = df_creditos[mascara]
+    de_cuotas = (df_cuotas['tipo_cliente'].isin(tipo) & df_cuotas['estado'].isin(estado_cuota)
+                 & df_cuotas['id_credito'].isin(filtrados['id_credito']))
+    _assert_kpis(compute_kpis(creditos, cuotas), _kpis_pandas(filtrados, df_cuotas[de_cuotas]))
+
+
+def test_object_columns_give_the_same_kpis(muestra):
+    _, df_creditos, df_cuotas = muestra
+    texto = df_cuotas.astype({'estado': object, 'nombre_cliente': object})
+
+    _assert_kpis(compute_kpis(FilteredView(df_creditos), FilteredView(texto)),
+                 compute_kpis(FilteredView(df_creditos), FilteredView(df_cuotas)))
+    filas = np.flatnonzero(df_cuotas['id_cliente'].to_numpy() % 2 == 0)
+    _assert_kpis(compute_kpis(FilteredView(df_creditos), FilteredView(texto, filas)),
+                 _kpis_pandas(df_creditos, df_cuotas.iloc[filas]))
+
+
+def test_filter_key_ignores_selection_order():
+    assert (filter_key(['Natural', 'Jurídico'], ['Activo'], ['Vencida', 'Pagada'], '2025-01-01', '2025-06-30')
+            == filter_key(['Jurídico', 'Natural'], ['Activo'], ['Pagada', 'Vencida'], '2025-01-01', '2025-06-30'))
+    assert (filter_key(['Natural'], ['Activo'], ['Vencida'], '2025-01-01', '2025-06-30')
+            != filter_key(['Natural'], ['Activo'], ['Vencida'], '2025-01-02', '2025-06-30'))
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmacia_creditos.mora import ETIQUETAS_MORA, AgingEngine, aging_bucket
+
+
+def _con_parciales(df_cuotas):
+    """Cuotas de ejemplo con algunas Parciales y algunas Pagadas sin fecha de pago"""
+    df = df_cuotas.copy()
+    rng = np.random.default_rng(8)
+    sin_pagar = np.flatnonzero(df['fecha_pago'].isna().to_numpy())
+    df.loc[df.index[rng.choice(sin_pagar, 40, replace=False)], 'estado'] = 'Parcial'
+    pagadas = np.flatnonzero(df['fecha_pago'].notna().to_numpy())
+    sin_fecha = df.index[rng.choice(pagadas, 15, replace=False)]
+    df.loc[sin_fecha, 'fecha_pago'] = pd.NaT
+    df.loc[sin_fecha, 'dias_mora'] = 7
+    return df
+
+
+def _al_corte(df, corte):
+    """Estado y mora de cada cuota a la fecha de corte, fila por fila"""
+    estados, dias = [], []
+    for fila in df.itertuples():
+        if (pd.notna(fila.fecha_pago) and fila.fecha_pago.normalize() <= corte) or (
+                fila.estado == 'Pagada' and pd.isna(fila.fecha_pago)):
+            estados.append('Pagada')
+            dias.append(fila.dias_mora if pd.isna(fila.fecha_pago)
+                        else max((fila.fecha_pago.normalize() - fila.fecha_programada.normalize()).days, 0))
+        elif fila.estado == 'Parcial':
+            estados.append('Parcial')
+            dias.append(0)
+        elif fila.fecha_programada.normalize() < corte:
+            estados.append('Vencida')
+            dias.append((corte - fila.fecha_programada.normalize()).days)
+        else:
+            estados.append('Pendiente')
+            dias.append(0)
+    return estados, dias
+
+
+@pytest.mark.parametrize('dias_atras', [0, 45, 200, 400])
+def test_at_matches_a_direct_recompute(muestra, dias_atras):
+    df_cuotas = _con_parciales(muestra[2])
+    motor = AgingEngine(df_cuotas)
+    corte = pd.Timestamp.today().normalize() - pd.Timedelta(days=dias_atras)
+
+    resultado = motor.at(corte + pd.Timedelta(hours=15))
+    estados, dias = _al_corte(df_cuotas, corte)
+    assert resultado['estado'].astype(object).tolist() == estados
+    assert resultado['dias_mora'].tolist() == dias
+    pd.testing.assert_series_equal(resultado['rango_mora'], aging_bucket(resultado['dias_mora']),
+                                   check_names=False)
+    assert list(resultado['rango_mora'].cat.categories) == ETIQUETAS_MORA
+
+    # Las demás columnas son las originales, sin copiar
+    for columna in ('id_cuota', 'monto_total', 'fecha_programada'):
+        assert np.shares_memory(resultado[columna].to_numpy(), df_cuotas[columna].to_numpy())
+
+
+def test_results_are_memoized_per_day(muestra):
+    motor = AgingEngine(muestra[2], max_dias=2)
+    dias = [pd.Timestamp('2025-03-01') + pd.Timedelta(days=i) for i in range(3)]
+
+    primero = motor.at(dias[0])
+    assert motor.at(dias[0] + pd.Timedelta(hours=8))['estado'].array is primero['estado'].array
+    motor.at(dias[1])
+    motor.at(dias[2])
+    assert list(motor._resultados) == dias[1:]
+    pd.testing.assert_frame_equal(motor.at(dias[0]), primero)
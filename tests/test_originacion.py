@@ -0,0 +1,109 @@
+import calendar
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmacia_creditos.base_datos import create_sqlite_database
+from farmacia_creditos.originacion import originate_credits
+
+
+@pytest.fixture
+def conn():
+    conn = create_sqlite_database()
+    with conn:
+        conn.executemany("INSERT INTO Clientes (id_cliente, tipo_cliente, nombre, nit) VALUES (?, 'Natural', ?, ?)",
+                         [(i, f'Cliente {i}', str(i)) for i in range(1, 11)])
+    yield conn
+    conn.close()
+
+
+def _creditos(filas):
+    return pd.DataFrame(filas, columns=['id_cliente', 'monto_capital', 'tasa_interes', 'plazo_meses', 'fecha_desembolso'])
+
+
+def _cuotas(conn, id_credito):
+    return conn.execute(
+        "SELECT numero_cuota, monto_capital, interes, fecha_programada FROM Cuotas "
+        "WHERE id_credito = ? ORDER BY numero_cuota", (id_credito,)).fetchall()
+
+
+def test_due_dates_clamp_to_month_end(conn):
+    resultado = originate_credits(conn, _creditos([(1, 900, 0, 3, '2024-01-31'), (1, 900, 0, 2, '2023-12-31')]), 'prueba')
+    primero, segundo = resultado['creditos']['id_credito'].tolist()
+
+    assert [fila[3] for fila in _cuotas(conn, primero)] == ['2024-02-29', '2024-03-31', '2024-04-30']
+    assert [fila[3] for fila in _cuotas(conn, segundo)] == ['2024-01-31', '2024-02-29']
+
+
+def test_last_due_date_equals_fecha_vencimiento_final(conn):
+    fechas = ['2024-01-31', '2024-03-31', '2024-05-31', '2023-11-30', '2024-02-29', '2024-08-15']
+    resultado = originate_credits(conn, _creditos([(1, 1000, 10, plazo, fecha) for fecha in fechas
+                                                   for plazo in (1, 3, 12, 13)]), 'prueba')
+
+    ultimas = conn.execute(
+        "SELECT cr.fecha_vencimiento_final, MAX(cu.fecha_programada) FROM Creditos cr "
+        "INNER JOIN Cuotas cu ON cu.id_credito = cr.id_credito GROUP BY cr.id_credito").fetchall()
+    assert len(ultimas) == len(resultado['creditos'])
+    assert all(final == ultima for final, ultima in ultimas)
+    assert ('2024-04-30', '2024-04-30') in ultimas
+
+
+def test_amounts_are_rounded_like_decimal_18_2(conn):
+    resultado = originate_credits(conn, _creditos([
+        (1, 1000, 12.5, 3, '2025-01-10'),    # 333.333.. y 10.4166..
+        (1, 100.01, 0.06, 2, '2025-01-10'),  # 50.005 y 0.005: mitades hacia arriba
+    ]), 'prueba')
+    primero, segundo = resultado['creditos']['id_credito'].tolist()
+
+    assert {fila[1:3] for fila in _cuotas(conn, primero)} == {(333.33, 10.42)}
+    assert {fila[1:3] for fila in _cuotas(conn, segundo)} == {(50.01, 0.01)}
+    assert conn.execute("SELECT DISTINCT ROUND(monto_total, 2), estado FROM Cuotas WHERE id_credito = ?",
+                        (segundo,)).fetchall() == [(50.02, 'Pendiente')]
+
+
+def test_ids_continue_after_existing_rows(conn):
+    originate_credits(conn, _creditos([(1, 500, 5, 2, '2025-01-10')]), 'prueba')
+    resultado = originate_credits(conn, _creditos([(2, 500, 5, 3, '2025-01-10')] * 2), 'prueba')
+
+    assert resultado['creditos']['id_credito'].tolist() == [2, 3]
+    assert resultado['cuotas']['id_cuota'].tolist() == list(range(3, 9))
+    assert conn.execute("SELECT COUNT(*) FROM Cuotas").fetchone()[0] == 8
+
+
+def _centavos(valor):
+    return float(valor.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+def _crear_credito(id_cliente, monto_capital, tasa_interes, plazo_meses, fecha_desembolso):
+    """Cuotas de sp_CrearCredito, una por vuelta del WHILE"""
+    capital, tasa = Decimal(str(monto_capital)), Decimal(str(tasa_interes))
+    monto_cuota = _centavos(capital / plazo_meses)
+    interes = _centavos(capital * tasa / 100 / 12)
+    cuotas = []
+    for contador in range(1, plazo_meses + 1):
+        mes = fecha_desembolso.month - 1 + contador
+        anio, mes = fecha_desembolso.year + mes // 12, mes % 12 + 1
+        dia = min(fecha_desembolso.day, calendar.monthrange(anio, mes)[1])
+        cuotas.append((contador, monto_cuota, interes, date(anio, mes, dia).isoformat()))
+    return cuotas
+
+
+def test_matches_the_stored_procedure(conn):
+    rng = np.random.default_rng(11)
+    n = 500
+    creditos = _creditos(zip(
+        rng.integers(1, 11, n),
+        np.round(rng.uniform(100, 20000, n), 2),
+        np.round(rng.uniform(0, 30, n), 2),
+        rng.choice([1, 3, 6, 12, 18, 24], n),
+        pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, n), unit='D'),
+    ))
+    resultado = originate_credits(conn, creditos, 'prueba')
+
+    for fila, id_credito in zip(creditos.itertuples(), resultado['creditos']['id_credito']):
+        esperado = _crear_credito(fila.id_cliente, fila.monto_capital, fila.tasa_interes,
+                                  int(fila.plazo_meses), fila.fecha_desembolso.date())
+        assert _cuotas(conn, int(id_credito)) == esperado
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.muestra import generate_sample_data
+from farmacia_creditos.paginacion import PagedRows, sort_order
+
+
+def test_page_matches_sorting_the_selection():
+    df_cuotas = generate_sample_data()[2]
+    filas = np.flatnonzero(df_cuotas['estado'].to_numpy() != 'Pagada')
+    columnas = ['monto_total', 'nombre_cliente', 'id_cuota']
+    paginas = PagedRows(df_cuotas, sort_order(df_cuotas['monto_total'], ascending=False), filas)
+
+    esperado = (df_cuotas.iloc[filas].sort_values('monto_total', ascending=False, kind='stable')[columnas]
+                .reset_index(drop=True))
+    tamano = 7
+    assert paginas.n_paginas(tamano) == -(-len(filas) // tamano)
+    for numero in (1, 2, paginas.n_paginas(tamano)):
+        pagina = paginas.page(numero, tamano, columnas)
+        assert list(pagina.columns) == columnas
+        parte = esperado.iloc[(numero - 1) * tamano:numero * tamano].reset_index(drop=True)
+        pd.testing.assert_frame_equal(pagina, parte, check_categorical=False)
+        for columna in columnas:
+            if isinstance(pagina[columna].dtype, pd.CategoricalDtype):
+                assert set(pagina[columna].cat.categories) == set(pagina[columna])
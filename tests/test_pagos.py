@@ -0,0 +1,162 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from farmacia_creditos.base_datos import create_sqlite_database
+from farmacia_creditos.pagos import MOTIVO_CUOTA, MOTIVO_METODO, MOTIVO_MONTO, MOTIVO_SALDO, apply_payments
+
+
+FECHA = '2025-06-30'
+
+
+@pytest.fixture
+def conn():
+    """Crédito 1 con dos cuotas de 110 y crédito 2 con una cuota de 55"""
+    conn = create_sqlite_database()
+    with conn:
+        conn.execute("INSERT INTO Clientes (id_cliente, tipo_cliente, nombre, nit) VALUES (1, 'Natural', 'Ana', '1')")
+        conn.executemany(
+            "INSERT INTO Creditos (id_credito, id_cliente, monto_capital, tasa_interes, plazo_meses, fecha_desembolso) "
+            "VALUES (?, 1, ?, 10, ?, '2025-01-15')",
+            [(1, 200, 2), (2, 50, 1)]
+        )
+        conn.executemany(
+            "INSERT INTO Cuotas (id_cuota, id_credito, id_cliente, numero_cuota, monto_capital, interes, "
+            "fecha_programada) VALUES (?, ?, 1, ?, ?, ?, ?)",
+            [(1, 1, 1, 100, 10, '2025-02-15'), (2, 1, 2, 100, 10, '2025-03-15'), (3, 2, 1, 50, 5, '2025-02-15')]
+        )
+    yield conn
+    conn.close()
+
+
+def _pagos(filas):
+    return pd.DataFrame(filas, columns=['id_cuota', 'monto_pago', 'metodo_pago'])
+
+
+def _cuotas(conn):
+    return {fila[0]: fila[1:] for fila in conn.execute(
+        "SELECT id_cuota, monto_pagado, estado, fecha_pago FROM Cuotas ORDER BY id_cuota")}
+
+
+def _estado_credito(conn, id_credito):
+    return conn.execute("SELECT estado FROM Creditos WHERE id_credito = ?", (id_credito,)).fetchone()[0]
+
+
+def test_payments_are_validated_in_batch_order(conn):
+    resultado = apply_payments(conn, _pagos([
+        (1, 60, 'Efectivo'), (1, 60, 'Efectivo'), (1, 50, 'Tarjeta'), (1, 0.01, 'Efectivo'),
+    ]), 'caja', FECHA)
+
+    assert resultado['pagos']['aceptado'].tolist() == [True, False, True, False]
+    assert resultado['pagos']['motivo'].tolist() == [None, MOTIVO_SALDO, None, MOTIVO_SALDO]
+    assert _cuotas(conn)[1] == (110, 'Pagada', FECHA)
+    assert conn.execute("SELECT COUNT(*), SUM(monto_pago) FROM Pagos").fetchone() == (2, 110)
+
+
+def test_invalid_payments_are_rejected(conn):
+    resultado = apply_payments(conn, _pagos([
+        (1, -5, 'Efectivo'), (1, 10, 'Bitcoin'), (99, 10, 'Efectivo'), (3, 10, None),
+    ]), 'caja', FECHA)
+
+    assert resultado['pagos']['motivo'].tolist() == [MOTIVO_MONTO, MOTIVO_METODO, MOTIVO_CUOTA, None]
+    assert _cuotas(conn)[3] == (10, 'Parcial', None)
+
+
+def test_partial_then_paid(conn):
+    apply_payments(conn, _pagos([(3, 20.004, 'Efectivo')]), 'caja', FECHA)
+    assert _cuotas(conn)[3] == (20, 'Parcial', None)
+    assert _estado_credito(conn, 2) == 'Activo'
+
+    apply_payments(conn, _pagos([(3, 35, 'Transferencia')]), 'caja', '2025-07-01')
+    assert _cuotas(conn)[3] == (55, 'Pagada', '2025-07-01')
+    assert _estado_credito(conn, 2) == 'Cancelado'
+
+
+def test_credit_is_cancelled_when_all_cuotas_are_paid(conn):
+    resultado = apply_payments(conn, _pagos([(1, 110, 'Efectivo')]), 'caja', FECHA)
+    assert resultado['creditos_cancelados'] == []
+    assert _estado_credito(conn, 1) == 'Activo'
+
+    resultado = apply_payments(conn, _pagos([(2, 50, 'Efectivo'), (2, 60, 'Cheque')]), 'caja', FECHA)
+    assert resultado['creditos_cancelados'] == [1]
+    assert _estado_credito(conn, 1) == 'Cancelado'
+    assert _estado_credito(conn, 2) == 'Activo'
+
+
+def test_empty_batch(conn):
+    resultado = apply_payments(conn, _pagos([]), 'caja', FECHA)
+
+    assert resultado['pagos'].empty
+    assert resultado['cuotas'].empty
+    assert resultado['creditos_cancelados'] == []
+    assert conn.execute("SELECT COUNT(*) FROM Pagos").fetchone()[0] == 0
+
+
+def test_balances_are_read_under_a_write_lock(tmp_path):
+    ruta = str(tmp_path / 'farmacia.db')
+    create_sqlite_database(ruta).close()
+    otro = sqlite3.connect(ruta)
+    otro.execute("BEGIN IMMEDIATE")
+    try:
+        conn = sqlite3.connect(ruta, timeout=0.1)
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            apply_payments(conn, _pagos([(1, 10, 'Efectivo')]), 'caja', FECHA)
+        conn.close()
+    finally:
+        otro.rollback()
+        otro.close()
+
+
+def _registrar_pago(conn, id_cuota, monto, metodo, usuario, fecha):
+    """sp_RegistrarPago, llamada por llamada"""
+    id_credito, saldo = conn.execute(
+        "SELECT id_credito, saldo_pendiente FROM Cuotas WHERE id_cuota = ?", (id_cuota,)).fetchone()
+    if round(monto * 100) > round(saldo * 100):
+        return False
+    with conn:
+        conn.execute(
+            "INSERT INTO Pagos (id_cuota, id_credito, monto_pago, fecha_pago, metodo_pago, usuario_registro) "
+            "VALUES (?, ?, ?, ?, ?, ?)", (id_cuota, id_credito, monto, fecha, metodo, usuario))
+        conn.execute(
+            "UPDATE Cuotas SET monto_pagado = ROUND(IFNULL(monto_pagado, 0) + ?, 2), "
+            "fecha_pago = CASE WHEN ROUND(IFNULL(monto_pagado, 0) + ?, 2) >= ROUND(monto_total, 2) THEN ? "
+            "ELSE fecha_pago END, "
+            "estado = CASE WHEN ROUND(IFNULL(monto_pagado, 0) + ?, 2) >= ROUND(monto_total, 2) THEN 'Pagada' "
+            "ELSE 'Parcial' END WHERE id_cuota = ?", (monto, monto, fecha, monto, id_cuota))
+        if not conn.execute("SELECT 1 FROM Cuotas WHERE id_credito = ? AND estado != 'Pagada'",
+                            (id_credito,)).fetchone():
+            conn.execute("UPDATE Creditos SET estado = 'Cancelado' WHERE id_credito = ?", (id_credito,))
+    return True
+
+
+def test_matches_the_stored_procedure_one_call_at_a_time(base_muestra):
+    _, conn = base_muestra
+    referencia = sqlite3.connect(':memory:')
+    conn.backup(referencia)
+
+    # Cuotas completas o mitades, muchas veces sobre pocos créditos: hay
+    # rechazos por saldo, cuotas Parciales y Pagadas y créditos que se cancelan
+    rng = np.random.default_rng(7)
+    cuotas = conn.execute(
+        "SELECT id_cuota, monto_total FROM Cuotas WHERE estado != 'Pagada' AND id_credito <= 8").fetchall()
+    elegidas = rng.integers(0, len(cuotas), 600)
+    fracciones = rng.choice([1, 0.5], 600)
+    pagos = _pagos([
+        (cuotas[i][0], round(float(cuotas[i][1]) * fraccion, 2), 'Efectivo') for i, fraccion in zip(elegidas, fracciones)
+    ])
+
+    resultado = apply_payments(conn, pagos, 'caja', FECHA)
+    aceptados = [
+        _registrar_pago(referencia, int(fila.id_cuota), fila.monto_pago, fila.metodo_pago, 'caja', FECHA)
+        for fila in pagos.itertuples()
+    ]
+
+    assert resultado['pagos']['aceptado'].tolist() == aceptados
+    assert set(resultado['cuotas']['estado']) == {'Parcial', 'Pagada'}
+    consulta_cuotas = "SELECT id_cuota, ROUND(monto_pagado, 2), estado, fecha_pago FROM Cuotas ORDER BY id_cuota"
+    consulta_creditos = "SELECT id_credito, estado FROM Creditos ORDER BY id_credito"
+    assert conn.execute(consulta_cuotas).fetchall() == referencia.execute(consulta_cuotas).fetchall()
+    assert conn.execute(consulta_creditos).fetchall() == referencia.execute(consulta_creditos).fetchall()
+    referencia.close()
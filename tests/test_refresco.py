@@ -0,0 +1,50 @@
+import pandas as pd
+
+from farmacia_creditos.base_datos import connect
+from farmacia_creditos.compacto import compact_frames
+from farmacia_creditos.motor import PortfolioEngine, normalize_filters
+from farmacia_creditos.refresco import IncrementalLoader
+
+
+def _modificar(conn):
+    with conn:
+        conn.execute("UPDATE Cuotas SET estado = 'Vencida', fecha_actualizacion = CURRENT_TIMESTAMP "
+                     "WHERE id_cuota IN (1, 2, 3)")
+        conn.execute("UPDATE Creditos SET estado = 'Moroso', fecha_actualizacion = CURRENT_TIMESTAMP "
+                     "WHERE id_credito = 1")
+        conn.execute("UPDATE Clientes SET nombre = 'Cliente Renombrado', fecha_actualizacion = CURRENT_TIMESTAMP "
+                     "WHERE id_cliente = 1")
+
+
+def test_refresh_does_not_modify_previous_frames(base_muestra):
+    destino, conn = base_muestra
+    loader = IncrementalLoader(lambda: connect(destino), transform=compact_frames)
+    anteriores = loader.refresh()
+    copias = [df.copy(deep=True) for df in anteriores]
+
+    _modificar(conn)
+    nuevos = loader.refresh()
+
+    assert loader.last_stats['modo'] == 'incremental'
+    for df, copia in zip(anteriores, copias):
+        pd.testing.assert_frame_equal(df, copia)
+
+    completos = IncrementalLoader(lambda: connect(destino), transform=compact_frames).refresh()
+    for df, completo in zip(nuevos, completos):
+        pd.testing.assert_frame_equal(df, completo, check_categorical=False)
+
+
+def test_published_snapshot_is_stable_after_refresh(base_muestra):
+    destino, conn = base_muestra
+    motor = PortfolioEngine(destino, incremental=True, ttl_db=0)
+    filtros = normalize_filters()
+    s1 = motor.snapshot(filtros)
+    estados = s1.frames[2]['estado'].copy()
+
+    _modificar(conn)
+    s2 = motor.snapshot(filtros)
+
+    assert s2.version != s1.version
+    assert s2.frames[2] is not s1.frames[2]
+    pd.testing.assert_series_equal(s1.frames[2]['estado'], estados)
+    assert (s2.frames[2].set_index('id_cuota').loc[[1, 2, 3], 'estado'] == 'Vencida').all()
@@ -0,0 +1,22 @@
+import pytest
+
+from farmacia_creditos.rendimiento import compare_results
+
+
+def _resultados(etapas):
+    return {'escalas': {'1k': {'etapas': {
+        etapa: {'mediana_s': min_s, 'min_s': min_s, 'repeticiones': repeticiones}
+        for etapa, (min_s, repeticiones) in etapas.items()
+    }}}}
+
+
+def test_only_repeated_stages_can_regress():
+    base = _resultados({'generacion': (0.1, 1), 'cubo': (0.1, 5), 'kpis': (0.1, 5), 'mora': (0.1, 5)})
+    actual = _resultados({'generacion': (0.3, 1), 'cubo': (0.3, 5), 'kpis': (0.104, 5), 'mora': (0.3, 1),
+                          'nueva': (0.3, 5)})
+
+    filas = {fila['etapa']: fila for fila in compare_results(actual, base, umbral=0.2, min_diferencia=0.005)}
+    assert set(filas) == {'generacion', 'cubo', 'kpis', 'mora'}
+    assert [etapa for etapa, fila in filas.items() if fila['regresion']] == ['cubo']
+    assert not filas['generacion']['repetida'] and not filas['mora']['repetida']
+    assert filas['generacion']['relacion'] == pytest.approx(3.0)
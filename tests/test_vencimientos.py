@@ -0,0 +1,143 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from farmacia_creditos.motor import PortfolioEngine, normalize_filters
+from farmacia_creditos.muestra import generate_sample_data
+from farmacia_creditos.originacion import originate_credits
+from farmacia_creditos.vencimientos import OverdueJob, _update_state
+
+
+def _actualizar_cuotas_vencidas(conn, hoy):
+    """sp_ActualizarCuotasVencidas (recorrido completo), con vencimiento al día siguiente"""
+    with conn:
+        conn.execute("UPDATE Cuotas SET estado = 'Vencida' WHERE fecha_programada < ? AND estado = 'Pendiente'",
+                     (hoy.strftime('%Y-%m-%d'),))
+        conn.execute("UPDATE Creditos SET estado = 'Moroso' WHERE id_credito IN "
+                     "(SELECT DISTINCT id_credito FROM Cuotas WHERE estado = 'Vencida') AND estado = 'Activo'")
+
+
+def _estados(conn):
+    return (conn.execute("SELECT id_cuota, estado FROM Cuotas ORDER BY id_cuota").fetchall(),
+            conn.execute("SELECT id_credito, estado FROM Creditos ORDER BY id_credito").fetchall())
+
+
+def test_run_db_matches_the_full_scan(base_muestra, tmp_path):
+    _, conn = base_muestra
+    inicio = pd.Timestamp.today().normalize() - pd.Timedelta(days=60)
+    # Créditos con todas las cuotas Pendientes, que vencen a lo largo de la prueba
+    rng = np.random.default_rng(3)
+    originate_credits(conn, pd.DataFrame({
+        'id_cliente': rng.integers(1, 11, 300), 'monto_capital': 1000, 'tasa_interes': 12,
+        'plazo_meses': rng.choice([3, 6, 12], 300),
+        'fecha_desembolso': inicio - pd.to_timedelta(rng.integers(0, 365, 300), unit='D'),
+    }), 'prueba')
+    referencia = sqlite3.connect(':memory:')
+    conn.backup(referencia)
+
+    # El procedimiento ya corrió antes de que el trabajo lo reemplace
+    for base in (conn, referencia):
+        _actualizar_cuotas_vencidas(base, inicio)
+
+    estado = str(tmp_path / 'vencimientos.json')
+    trabajo = OverdueJob(estado)
+    dias_con_cambios = 0
+    for dia in range(40):
+        hoy = inicio + pd.Timedelta(days=dia)
+        if dia == 20:
+            # Migración: créditos nuevos con cuotas ya vencidas, y un reinicio del proceso
+            migrados = pd.DataFrame({
+                'id_cliente': [1, 2, 6], 'monto_capital': [1000, 2500, 9000], 'tasa_interes': [12, 10, 8],
+                'plazo_meses': [6, 12, 3], 'fecha_desembolso': [hoy - pd.Timedelta(days=200)] * 3,
+            })
+            for base in (conn, referencia):
+                originate_credits(base, migrados, 'migracion')
+            trabajo = OverdueJob(estado)
+            assert trabajo.ultima_corrida == hoy - pd.Timedelta(days=1)
+
+        trabajo.run_db(conn, hoy)
+        dias_con_cambios += trabajo.last_stats['cuotas'] > 0
+        _actualizar_cuotas_vencidas(referencia, hoy)
+        assert _estados(conn) == _estados(referencia), hoy
+
+    assert trabajo.last_stats['desde'] == hoy - pd.Timedelta(days=1)
+    assert dias_con_cambios > 20
+    referencia.close()
+
+
+def test_run_frames_incremental_matches_a_full_pass():
+    frames = generate_sample_data()
+    estados = [df['estado'].copy() for df in frames[1:]]
+    trabajo = OverdueJob()
+
+    inicio = pd.Timestamp.today().normalize() - pd.Timedelta(days=90)
+    actuales, marca = frames, {}
+    for dia in range(0, 120, 7):
+        hoy = inicio + pd.Timedelta(days=dia)
+        actuales, cambios = trabajo.run_frames(actuales, hoy, desde=marca.get('hasta'),
+                                               ultimo_id_cuota=marca.get('ultimo_id_cuota'))
+        marca = cambios
+        completos, _ = OverdueJob().run_frames(frames, hoy)
+        for actual, completo in zip(actuales, completos):
+            pd.testing.assert_frame_equal(actual, completo)
+
+    assert trabajo.ultima_corrida is None
+    for df, estado in zip(frames[1:], estados):
+        pd.testing.assert_series_equal(df['estado'], estado)
+
+
+def test_engine_watermark_lives_in_the_snapshot(tmp_path):
+    estado = tmp_path / 'vencimientos.json'
+    motor = PortfolioEngine(estado_vencimientos=str(estado))
+    hoy = pd.Timestamp.today().normalize() - pd.Timedelta(days=30)
+
+    motor.update_overdue(hoy)
+    # Recarga (TTL, memoria o recargar): la instantánea nueva no tiene marca
+    motor.store.invalidate()
+    stats = motor.update_overdue(hoy + pd.Timedelta(days=1))
+    assert stats['desde'] is None
+
+    cuotas = motor.snapshot(normalize_filters()).frames[2]
+    pendientes = (cuotas['estado'] == 'Pendiente') & (cuotas['fecha_programada'] < hoy + pd.Timedelta(days=1))
+    assert not pendientes.any()
+
+    stats = motor.update_overdue(hoy + pd.Timedelta(days=2))
+    assert stats['desde'] == hoy + pd.Timedelta(days=1)
+    assert not estado.exists()
+
+
+def test_update_state_returns_only_changed_rows(base_muestra):
+    _, conn = base_muestra
+    ids = np.array([fila[0] for fila in conn.execute(
+        "SELECT id_cuota FROM Cuotas WHERE estado = 'Pendiente' ORDER BY id_cuota LIMIT 5")])
+    # Un pago que llegó entre la lectura y el UPDATE
+    conn.execute("UPDATE Cuotas SET estado = 'Pagada' WHERE id_cuota = ?", (int(ids[2]),))
+
+    cursor = conn.cursor()
+    actualizadas = _update_state(cursor, 'Cuotas', 'id_cuota', ids, 'Vencida', 'Pendiente', 'prueba', '?', True, lote=2)
+    conn.commit()
+
+    assert actualizadas.tolist() == np.delete(ids, 2).tolist()
+    assert conn.execute("SELECT estado FROM Cuotas WHERE id_cuota = ?", (int(ids[2]),)).fetchone()[0] == 'Pagada'
+
+
+class _CursorSqlServer:
+    def __init__(self):
+        self.sentencias = []
+
+    def execute(self, sql, params):
+        self.sentencias.append(sql)
+
+    def fetchall(self):
+        return [(1,)]
+
+
+def test_update_state_uses_output_on_sql_server():
+    cursor = _CursorSqlServer()
+    _update_state(cursor, 'Creditos', 'id_credito', np.array([1]), 'Moroso', 'Activo', 'prueba', '?', False)
+
+    assert cursor.sentencias == [
+        "UPDATE Creditos SET estado = 'Moroso', usuario_actualizacion = ?, fecha_actualizacion = CURRENT_TIMESTAMP "
+        "OUTPUT inserted.id_credito WHERE id_credito IN (?) AND estado = ?"
+    ]
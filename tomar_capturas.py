@@ -1,77 +1,215 @@
 """
 Script para tomar capturas de pantalla del dashboard
+
+Uso:
+    python tomar_capturas.py                      # dashboard ya corriendo en :8501
+    python tomar_capturas.py --paralelo           # una sesión de navegador por pestaña
+    python tomar_capturas.py --lanzar --paralelo  # levanta un dashboard local y lo cierra al final
+
+No hay esperas fijas: cada captura se toma cuando Streamlit terminó el rerun
+(stApp con data-test-script-state="notRunning", sin esqueletos ni spinners,
+tarjetas de KPI con valor y cada gráfico Plotly dibujado) y aparece el
+subtítulo de la pestaña elegida.
 """
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
-import time
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+CARPETA = 'screenshots'
+
+# (archivo, descripción, índice de la pestaña, subtítulo que indica que se
+# dibujó, desplazamiento vertical)
+CAPTURAS = [
+    ('01_kpis_principales.png', 'KPIs principales', 0, 'Créditos por Tipo de Cliente', 0),
+    ('02_estado_creditos.png', 'Estado de creditos', 0, 'Créditos por Tipo de Cliente', 500),
+    ('03_analisis_morosidad.png', 'Analisis de morosidad', 1, 'Top 10 Clientes Morosos', 0),
+    ('04_clientes.png', 'Clientes', 2, 'Análisis de Clientes por Categoría', 0),
+    ('05_detalle_cuotas.png', 'Detalle de cuotas', 3, 'Detalle de Cuotas Vencidas', 0),
+]
+
+SELECTOR_PESTANAS = '.st-key-pestana [data-baseweb="radio"]'
+
+# Verdadero cuando el rerun terminó y todo lo visible está dibujado
+RENDER_COMPLETO_JS = """
+const app = document.querySelector('[data-testid="stApp"]');
+if (!app || app.getAttribute('data-test-script-state') !== 'notRunning') return false;
+if (document.querySelector('[data-testid="stSkeleton"], [data-testid="stSpinner"], .powerbi-card h2.cargando')) return false;
+for (const grafico of document.querySelectorAll('[data-testid="stPlotlyChart"]')) {
+    if (!grafico.querySelector('.main-svg')) return false;
+}
+return [...document.querySelectorAll('h3')].some(h => h.textContent.includes(arguments[0]));
+"""
+
+
+def chrome_options():
+    """Chrome en modo headless"""
+    opciones = Options()
+    opciones.add_argument('--headless=new')
+    opciones.add_argument('--window-size=1920,1200')
+    opciones.add_argument('--disable-gpu')
+    opciones.add_argument('--no-sandbox')
+    opciones.add_argument('--disable-dev-shm-usage')
+    return opciones
+
+
+def start_browser(chromedriver):
+    """Chrome headless con su propio proceso de chromedriver"""
+    return webdriver.Chrome(service=Service(chromedriver), options=chrome_options())
+
+
+def wait_rendered(driver, subtitulo, timeout):
+    """Espera a que el dashboard termine de dibujar la pestaña con ese subtítulo"""
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        lambda d: d.execute_script(RENDER_COMPLETO_JS, subtitulo)
+    )
+
+
+def open_tab(driver, url, indice, subtitulo, timeout):
+    """Carga el dashboard y, si hace falta, elige la pestaña `indice`"""
+    driver.get(url)
+    wait_rendered(driver, CAPTURAS[0][3], timeout)
+    if indice > 0:
+        pestanas = driver.find_elements(By.CSS_SELECTOR, SELECTOR_PESTANAS)
+        pestanas[indice].click()
+        wait_rendered(driver, subtitulo, timeout)
+
+
+def scroll_to(driver, y, timeout):
+    """Desplaza la ventana y espera a que llegue a la posición (o al final de la página)"""
+    driver.execute_script("window.scrollTo(0, arguments[0])", y)
+    WebDriverWait(driver, timeout, poll_frequency=0.05).until(lambda d: d.execute_script(
+        "return Math.round(window.scrollY) === arguments[0]"
+        " || window.scrollY + window.innerHeight >= document.documentElement.scrollHeight", y
+    ))
+
+
+def save_capture(driver, archivo, descripcion, numero):
+    driver.save_screenshot(os.path.join(CARPETA, archivo))
+    print(f"[OK] Captura {numero}: {descripcion}")
+
+
+def capture_sequential(chromedriver, url, timeout):
+    """Todas las capturas en un solo navegador, pestaña por pestaña"""
+    driver = start_browser(chromedriver)
+    try:
+        pestana_actual = None
+        for numero, (archivo, descripcion, indice, subtitulo, desplazamiento) in enumerate(CAPTURAS, 1):
+            if pestana_actual is None:
+                open_tab(driver, url, indice, subtitulo, timeout)
+            elif indice != pestana_actual:
+                driver.find_elements(By.CSS_SELECTOR, SELECTOR_PESTANAS)[indice].click()
+                wait_rendered(driver, subtitulo, timeout)
+            pestana_actual = indice
+            scroll_to(driver, desplazamiento, timeout)
+            save_capture(driver, archivo, descripcion, numero)
+    finally:
+        driver.quit()
+
+
+def capture_tab(chromedriver, url, indice, timeout):
+    """Capturas de una pestaña en su propio navegador (sesión de Streamlit aparte)"""
+    capturas = [(numero, captura) for numero, captura in enumerate(CAPTURAS, 1) if captura[2] == indice]
+    driver = start_browser(chromedriver)
+    try:
+        open_tab(driver, url, indice, capturas[0][1][3], timeout)
+        for numero, (archivo, descripcion, _, _, desplazamiento) in capturas:
+            scroll_to(driver, desplazamiento, timeout)
+            save_capture(driver, archivo, descripcion, numero)
+    finally:
+        driver.quit()
+
+
+def capture_parallel(chromedriver, url, timeout):
+    """Una sesión de navegador por pestaña, todas a la vez"""
+    pestanas = sorted({captura[2] for captura in CAPTURAS})
+    with ThreadPoolExecutor(max_workers=len(pestanas)) as ejecutor:
+        trabajos = [ejecutor.submit(capture_tab, chromedriver, url, indice, timeout) for indice in pestanas]
+        for trabajo in trabajos:
+            trabajo.result()
+
+
+def start_dashboard(puerto, timeout, entorno=None):
+    """
+    Levanta el dashboard en este equipo (con el calentamiento de
+    farmacia_creditos.arranque) y espera a que responda /_stcore/health.
+    entorno agrega variables (por ejemplo FARMACIA_DATOS_PARQUET).
+    """
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'farmacia_creditos.arranque',
+         '--server.headless', 'true', '--server.port', str(puerto)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, **(entorno or {})},
+        stdout=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El dashboard terminó al iniciar (código {proceso.returncode})")
+        try:
+            with urllib.request.urlopen(f'http://localhost:{puerto}/_stcore/health', timeout=1) as respuesta:
+                if respuesta.status == 200:
+                    return proceso
+        except OSError:
+            pass
+        time.sleep(0.1)
+    proceso.terminate()
+    raise RuntimeError(f"El dashboard no respondió en {timeout}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Capturas de pantalla del dashboard de créditos')
+    parser.add_argument('--url', default=None, help='URL del dashboard (por defecto http://localhost:<puerto>)')
+    parser.add_argument('--puerto', type=int, default=8501, help='Puerto del dashboard')
+    parser.add_argument('--paralelo', action='store_true', help='Capturar las pestañas en navegadores paralelos')
+    parser.add_argument('--lanzar', action='store_true', help='Levantar un dashboard local para las capturas')
+    parser.add_argument('--timeout', type=float, default=60, help='Segundos máximos de espera por captura')
+    args = parser.parse_args(argv)
+
+    url = args.url or f'http://localhost:{args.puerto}'
+
+    # Crear carpeta para screenshots
+    os.makedirs(CARPETA, exist_ok=True)
+
+    inicio = time.perf_counter()
+    dashboard = None
+    try:
+        if args.lanzar:
+            dashboard = start_dashboard(args.puerto, args.timeout)
+
+        # Se descarga una vez; cada navegador arranca su propio chromedriver
+        chromedriver = ChromeDriverManager().install()
+        if args.paralelo:
+            capture_parallel(chromedriver, url, args.timeout)
+        else:
+            capture_sequential(chromedriver, url, args.timeout)
+
+        print(f"\n[SUCCESS] Todas las capturas tomadas en {time.perf_counter() - inicio:.1f}s!")
+        print(f"Revisa la carpeta '{CARPETA}/'")
+
+    except Exception as e:
+        print(f"[ERROR] {e!r}")
+        print("Asegúrate de que:")
+        print(f"1. El dashboard esté corriendo en {url} (o usa --lanzar)")
+        print("2. Chrome esté instalado")
+        print("3. ChromeDriver esté instalado (pip install selenium)")
+        return 1
+
+    finally:
+        if dashboard is not None:
+            dashboard.terminate()
+            dashboard.wait()
+    return 0
+
 
-# Configurar Chrome en modo headless
-chrome_options = Options()
-chrome_options.add_argument('--headless=new')
-chrome_options.add_argument('--window-size=1920,1200')
-chrome_options.add_argument('--disable-gpu')
-chrome_options.add_argument('--no-sandbox')
-chrome_options.add_argument('--disable-dev-shm-usage')
-
-# Crear carpeta para screenshots
-os.makedirs('screenshots', exist_ok=True)
-
-# Iniciar navegador con webdriver-manager
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-try:
-    # Ir al dashboard
-    driver.get('http://localhost:8501')
-
-    # Esperar a que cargue
-    time.sleep(10)
-
-    # Captura 1: Vista principal con KPIs
-    driver.save_screenshot('screenshots/01_kpis_principales.png')
-    print("[OK] Captura 1: KPIs principales")
-
-    # Scroll para ver más contenido
-    driver.execute_script("window.scrollTo(0, 500)")
-    time.sleep(2)
-    driver.save_screenshot('screenshots/02_estado_creditos.png')
-    print("[OK] Captura 2: Estado de creditos")
-
-    # Click en tab 2
-    tabs = driver.find_elements(By.CSS_SELECTOR, '[data-baseweb="tab"]')
-    if len(tabs) > 1:
-        tabs[1].click()
-        time.sleep(3)
-        driver.save_screenshot('screenshots/03_analisis_morosidad.png')
-        print("[OK] Captura 3: Analisis de morosidad")
-
-    # Click en tab 3
-    if len(tabs) > 2:
-        tabs[2].click()
-        time.sleep(3)
-        driver.save_screenshot('screenshots/04_clientes.png')
-        print("[OK] Captura 4: Clientes")
-
-    # Click en tab 4
-    if len(tabs) > 3:
-        tabs[3].click()
-        time.sleep(3)
-        driver.save_screenshot('screenshots/05_detalle_cuotas.png')
-        print("[OK] Captura 5: Detalle de cuotas")
-
-    print("\n[SUCCESS] Todas las capturas tomadas exitosamente!")
-    print("Revisa la carpeta 'screenshots/'")
-
-except Exception as e:
-    print(f"[ERROR] {e}")
-    print("Asegúrate de que:")
-    print("1. El dashboard esté corriendo en http://localhost:8501")
-    print("2. Chrome esté instalado")
-    print("3. ChromeDriver esté instalado (pip install selenium)")
-
-finally:
-    driver.quit()
+if __name__ == '__main__':
+    sys.exit(main())